@@ -0,0 +1,3 @@
+"""
+API clients for Google Maps Places API (New) and Apify
+"""
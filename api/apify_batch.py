@@ -0,0 +1,310 @@
+"""
+Parallel Apify runs for many restaurants
+
+Scraping one restaurant per blocking actor call takes 30-60 seconds each,
+so a 200-restaurant refresh would take hours. Instead:
+- several restaurant URLs are packed into the startUrls of one run
+- several runs are started at once with .start() and polled with the
+  async Apify client, so the waiting overlaps
+- each page of a run's dataset is handed on as soon as it is read (and
+  fanned back out by place id), so only one page per run is in memory
+- identical run inputs in one batch share a single run, and a run input
+  whose run is still in progress (e.g. a sync that was interrupted and
+  restarted) picks that run up instead of paying for the scrape twice. Finished runs are never reused: an incremental sync sends
+  the same input until new reviews are stored, so an old dataset would
+  hide them
+
+Usage:
+    def store_page(urls, items):
+        for place_id, place_items in group_by_place(items).items():
+            ...
+
+    batch = ApifyBatch(api_key, cache=ResponseCache())
+    async for result in batch.run([build_run_input(urls, start_date) for urls in packs], store_page):
+        print(result.urls, result.fetched, result.error)
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+
+from api.apify_client import (
+    ACTOR_ID, ACTIVE_RUN_STATES, COST_PER_1000_REVIEWS, MAX_REVIEWS, PAGE_SIZE, POLL_INTERVAL,
+    build_run_input, make_client, sync_start_date
+)
+from api.cache import make_key
+from api.limits import MAX_PARALLEL_RUNS, URLS_PER_RUN
+from api.singleflight import AsyncSingleFlight
+from storage.archive import APIFY_REVIEWS, archive_raw
+
+# How long a started run is remembered, so a restarted sync can pick it up
+RUN_REUSE_TTL = 24 * 60 * 60
+
+# Result of one actor run; 'fetched' is the number of items read
+RunResult = namedtuple('RunResult', ['urls', 'run_id', 'reused', 'fetched', 'error'])
+
+
+def pack_urls(urls, per_run=URLS_PER_RUN):
+    """
+    Split restaurant URLs into groups of at most per_run
+
+    Args:
+        urls: List of Google Maps URLs
+        per_run: Maximum URLs per run
+
+    Returns:
+        List of URL lists
+    """
+    return [urls[i:i + per_run] for i in range(0, len(urls), per_run)]
+
+
+def group_by_place(items, groups=None):
+    """
+    Fan Apify review items out by restaurant
+
+    Args:
+        items: Review items from one or more restaurants
+        groups: Existing {place_id: items} dictionary to add to
+
+    Returns:
+        Dictionary of place id -> list of items
+    """
+    groups = {} if groups is None else groups
+    for item in items:
+        groups.setdefault(item.get('placeId'), []).append(item)
+    return groups
+
+
+def run_urls(run_input):
+    """Return the restaurant URLs in a run input"""
+    return [start['url'] for start in run_input.get('startUrls', [])]
+
+
+class ApifyBatch:
+    """
+    Start, reuse and collect many actor runs concurrently
+
+    Usage:
+        batch = ApifyBatch(api_key, max_parallel_runs=5, cache=ResponseCache())
+        async for result in batch.run(run_inputs, on_page):
+            print(result.urls, result.fetched)
+    """
+
+    def __init__(self, api_key, max_parallel_runs=MAX_PARALLEL_RUNS, cache=None,
+                 reuse_ttl=RUN_REUSE_TTL, poll_interval=POLL_INTERVAL, page_size=PAGE_SIZE):
+        """
+        Args:
+            api_key: Apify API key
+            max_parallel_runs: Maximum actor runs in flight at once
+            cache: Optional ResponseCache used to remember started runs, so
+                   one still in progress is picked up (None = always start
+                   a new run)
+            reuse_ttl: Seconds a started run is remembered
+            poll_interval: Seconds between status checks of a running run
+            page_size: Dataset items fetched per request
+        """
+        self.client = make_client(api_key, asynchronous=True)
+        self.max_parallel_runs = max_parallel_runs
+        self.cache = cache
+        self.reuse_ttl = reuse_ttl
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.started = 0
+        self.reused = 0
+        self._semaphore = None
+        self._flights = AsyncSingleFlight('apifyRun')
+
+    async def _reusable_run(self, key):
+        """Return a remembered run for this input if it is still running"""
+        if self.cache is None:
+            return None
+        value, _ = self.cache.get(key)
+        if not value or time.time() - value['started_at'] > self.reuse_ttl:
+            return None
+
+        try:
+            run = await self.client.run(value['run_id']).get()
+        except Exception:
+            # Can't tell what became of it - a new run is the safe choice
+            return None
+        if run and run.get('status') in ACTIVE_RUN_STATES:
+            return run
+        return None
+
+    async def _start_or_reuse(self, run_input):
+        """
+        Return (run, reused) for a run input
+
+        Identical inputs that arrive while the first one is still being
+        started share its result, so they read one run instead of each
+        paying for their own.
+        """
+        key = make_key('apifyRun', ACTOR_ID, run_input)
+        return await self._flights.do(key, lambda: self._start_or_pick_up(key, run_input))
+
+    async def _start_or_pick_up(self, key, run_input):
+        """Pick up a remembered run still in progress, or start a new one"""
+        run = await self._reusable_run(key)
+        if run is not None:
+            self.reused += 1
+            return run, True
+
+        run = await self.client.actor(ACTOR_ID).start(run_input=run_input)
+        self.started += 1
+        if self.cache is not None:
+            self.cache.set(key, {'run_id': run['id'], 'started_at': time.time()},
+                           ttl=self.reuse_ttl, stale_ttl=0)
+        return run, False
+
+    async def _wait(self, run_id):
+        """Poll a run until it has finished; returns its final status"""
+        while True:
+            run = await self.client.run(run_id).get() or {}
+            if run.get('status') not in ACTIVE_RUN_STATES:
+                return run.get('status')
+            await asyncio.sleep(self.poll_interval)
+
+    async def _collect(self, run_input, on_page):
+        """Run (or reuse) one input and pass its dataset to on_page() page by page"""
+        urls = run_urls(run_input)
+        fetched = 0
+        async with self._semaphore:
+            try:
+                run, reused = await self._start_or_reuse(run_input)
+                status = run.get('status')
+                if status != 'SUCCEEDED':
+                    status = await self._wait(run['id'])
+                if status != 'SUCCEEDED':
+                    raise RuntimeError(f"Apify run {run['id']} ended with status {status}")
+
+                dataset = self.client.dataset(run['defaultDatasetId'])
+                while True:
+                    items = (await dataset.list_items(offset=fetched, limit=self.page_size)).items
+                    if not items:
+                        break
+                    fetched += len(items)
+                    archive_raw(APIFY_REVIEWS, items, source=run['defaultDatasetId'])
+                    on_page(urls, items)
+                return RunResult(urls, run['id'], reused, fetched, None)
+
+            except Exception as e:
+                return RunResult(urls, None, False, fetched, str(e))
+
+    async def run(self, run_inputs, on_page):
+        """
+        Run every input concurrently, yielding results as runs finish
+
+        Args:
+            run_inputs: Iterable of actor inputs (see build_run_input())
+            on_page: Function called with (run URLs, items) for every page
+                     of a run's dataset, as soon as it is read
+
+        Yields:
+            RunResult per input, in completion order. A failed run has
+            'error' set; pages read before it failed were already passed on.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_parallel_runs)
+        tasks = [asyncio.ensure_future(self._collect(run_input, on_page)) for run_input in run_inputs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def plan_sync_runs(urls, store, max_reviews=MAX_REVIEWS, per_run=URLS_PER_RUN):
+    """
+    Pack restaurants into run inputs for an incremental sync
+
+    Restaurants can only share a run when they need reviews from the same
+    start date (and the same review limit). A restaurant that has never been synced gets a run of its
+    own: its place id is not known yet, so that is the only way to tell
+    which URL its reviews belong to.
+
+    Args:
+        urls: Google Maps restaurant URLs
+        store: ReviewStore
+        max_reviews: Maximum reviews per restaurant, or a dictionary of
+                     URL -> maximum (e.g. from the refresh scheduler)
+        per_run: Maximum URLs per run
+
+    Returns:
+        List of run inputs
+    """
+    groups = {}
+    for url in dict.fromkeys(urls):     # drop duplicates, keep order
+        known = store.get_place_id(url) is not None
+        limit = max_reviews.get(url, MAX_REVIEWS) if isinstance(max_reviews, dict) else max_reviews
+        groups.setdefault((sync_start_date(store, url), limit, known), []).append(url)
+
+    run_inputs = []
+    for (start_date, limit, known), group in groups.items():
+        for pack in pack_urls(group, per_run if known else 1):
+            run_inputs.append(build_run_input(pack, start_date, limit))
+    return run_inputs
+
+
+async def sync_restaurants(urls, api_key, store, max_reviews=MAX_REVIEWS, per_run=URLS_PER_RUN,
+                           max_parallel_runs=MAX_PARALLEL_RUNS, cache=None):
+    """
+    Incrementally sync many restaurants with parallel, packed actor runs
+
+    The parallel version of sync_restaurant_reviews(): each restaurant only
+    gets reviews newer than its high-water mark, which only moves once its
+    run has succeeded.
+
+    Args:
+        urls: Google Maps restaurant URLs
+        api_key: Apify API key
+        store: ReviewStore
+        max_reviews: Maximum reviews per restaurant (or a dictionary of
+                     URL -> maximum, see plan_sync_runs())
+        per_run: Maximum URLs packed into one run
+        max_parallel_runs: Maximum runs in flight at once
+        cache: Optional ResponseCache, to pick up identical runs still in
+               progress (e.g. after an interrupted sync)
+
+    Yields:
+        One dictionary per restaurant, as its run finishes, with 'url',
+        'fetched', 'added', 'start_date', 'reused', 'estimated_cost' and
+        'error' (None on success)
+    """
+    run_inputs = plan_sync_runs(urls, store, max_reviews, per_run)
+    start_dates = {url: run_input['reviewsStartDate']
+                   for run_input in run_inputs for url in run_urls(run_input)}
+    batch = ApifyBatch(api_key, max_parallel_runs=max_parallel_runs, cache=cache)
+
+    # Reviews belong to a URL by place id (or directly, for a one-URL run)
+    owners = {}
+    for url in start_dates:
+        place_id = store.get_place_id(url)
+        if place_id is not None:
+            owners[place_id] = url
+    fetched = dict.fromkeys(start_dates, 0)
+    added = dict.fromkeys(start_dates, 0)
+
+    def store_page(page_urls, items):
+        for place_id, place_items in group_by_place(items).items():
+            url = page_urls[0] if len(page_urls) == 1 else owners.get(place_id)
+            if url is None:
+                continue    # a place we can't attribute to any input URL
+            fetched[url] += len(place_items)
+            added[url] += store.add_reviews(url, place_items, update_mark=False)
+
+    async for result in batch.run(run_inputs, store_page):
+        # The mark only moves once the whole run has been read
+        if result.error is None:
+            for url in result.urls:
+                store.update_high_water_mark(url)
+
+        for url in result.urls:
+            yield {
+                'url': url,
+                'fetched': fetched[url],
+                'added': added[url],
+                'start_date': start_dates[url],
+                'reused': result.reused,
+                'estimated_cost': fetched[url] / 1000 * COST_PER_1000_REVIEWS,
+                'error': result.error,
+            }
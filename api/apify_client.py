@@ -0,0 +1,250 @@
+"""
+Apify API client for Google Maps reviews
+
+Wraps the Google Maps Reviews Scraper actor
+(compass/google-maps-reviews-scraper).
+
+Scraping costs $0.35 per 1,000 reviews, so sync_restaurant_reviews()
+only asks for reviews newer than the last one already stored locally
+(see storage/review_store.py) instead of re-scraping six months every time.
+
+Set APIFY_API_URL to send requests somewhere else, e.g. the local stand-in
+server (api/standin.py).
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from api.singleflight import SingleFlight
+from storage.archive import APIFY_REVIEWS, archive_raw
+from utils import metrics
+
+ACTOR_ID = "compass/google-maps-reviews-scraper"
+
+# Scope from the PRD: last 6 months, at most 1000 reviews per restaurant
+MAX_REVIEWS = 1000
+HISTORY_DAYS = 180
+
+# Apify pricing for the reviews scraper
+COST_PER_1000_REVIEWS = 0.35
+
+# Dataset items fetched per request when streaming results
+PAGE_SIZE = 200
+
+# Seconds between dataset polls while a run is still in progress
+POLL_INTERVAL = 5
+
+# Run states in which the actor may still add items to its dataset
+ACTIVE_RUN_STATES = ('READY', 'RUNNING')
+
+# Collapses identical concurrent syncs (same restaurant, same store) into one run
+APIFY_FLIGHTS = SingleFlight('apify')
+
+# Fields Apify repeats on every review item that describe the restaurant
+RESTAURANT_FIELDS = (
+    'placeId', 'title', 'address', 'totalScore', 'reviewsCount', 'url',
+    'categoryName', 'categories', 'city', 'neighborhood', 'street', 'countryCode',
+    'location', 'cid', 'fid', 'imageUrl', 'permanentlyClosed', 'temporarilyClosed',
+    'searchString'
+)
+
+
+def make_client(api_key, asynchronous=False):
+    """
+    Create an Apify client, honouring APIFY_API_URL
+
+    Args:
+        api_key: Apify API key
+        asynchronous: Return an ApifyClientAsync instead of an ApifyClient
+    """
+    # The SDK is imported here, not at the top: it is slow to import and
+    # most callers of this module (e.g. split_item) never make a client
+    from apify_client import ApifyClient, ApifyClientAsync
+
+    client_class = ApifyClientAsync if asynchronous else ApifyClient
+    return client_class(api_key, api_url=os.getenv('APIFY_API_URL') or None)
+
+
+def split_item(item):
+    """
+    Split one Apify item into restaurant-level and review-level fields
+
+    The review keeps 'placeId' so it can still be linked to its restaurant.
+
+    Args:
+        item: Apify review item
+
+    Returns:
+        Tuple of (restaurant dict, review dict)
+    """
+    restaurant = {}
+    review = {}
+    for key, value in item.items():
+        if key in RESTAURANT_FIELDS:
+            restaurant[key] = value
+        else:
+            review[key] = value
+    review['placeId'] = item.get('placeId')
+    return restaurant, review
+
+
+def iter_dataset_pages(client, dataset_id, page_size=PAGE_SIZE, run_id=None,
+                       poll_interval=POLL_INTERVAL):
+    """
+    Yield a dataset's items one page at a time
+
+    Only one page is held in memory at once. If run_id is given, items are
+    streamed while the run is still scraping: the dataset is polled until
+    the run has finished and every item has been read. A run that ends in
+    any state other than SUCCEEDED raises RuntimeError after its last page.
+    Every page is also kept in the raw archive (storage/archive.py).
+
+    Args:
+        client: ApifyClient
+        dataset_id: Dataset to read
+        page_size: Items per request
+        run_id: Run that is filling the dataset (None if it has finished)
+        poll_interval: Seconds to wait between polls of a running run
+
+    Yields:
+        Lists of items
+    """
+    dataset = client.dataset(dataset_id)
+    offset = 0
+    run_finished = run_id is None
+    final_status = None
+
+    while True:
+        with metrics.timer('apify_page_seconds'):
+            items = dataset.list_items(offset=offset, limit=page_size).items
+        if items:
+            metrics.count('apify_items_total', len(items))
+            archive_raw(APIFY_REVIEWS, items, source=dataset_id)
+            offset += len(items)
+            yield items
+            continue
+
+        if run_finished:
+            if final_status not in (None, 'SUCCEEDED'):
+                raise RuntimeError(f"Apify run {run_id} ended with status {final_status}")
+            return
+
+        # No new items yet - check whether the run is done; if it is, read
+        # once more to pick up anything written since the last request
+        run = client.run(run_id).get() or {}
+        if run.get('status') not in ACTIVE_RUN_STATES:
+            run_finished = True
+            final_status = run.get('status')
+        else:
+            metrics.count('apify_polls_total')
+            time.sleep(poll_interval)
+
+
+def build_run_input(urls, start_date, max_reviews=MAX_REVIEWS):
+    """
+    Build the actor input for one or more restaurant URLs
+
+    Args:
+        urls: List of Google Maps URLs
+        start_date: Only fetch reviews on or after this date ('YYYY-MM-DD')
+        max_reviews: Maximum reviews per restaurant
+
+    Returns:
+        Dictionary to pass as run_input
+    """
+    return {
+        "startUrls": [{"url": url} for url in urls],   # Apify expects {'url': ...} objects
+        "maxReviews": max_reviews,
+        "reviewsSort": "newest",
+        "reviewsStartDate": start_date
+    }
+
+
+def stream_restaurant_review_pages(url, api_key, start_date=None, max_reviews=MAX_REVIEWS,
+                                   page_size=PAGE_SIZE):
+    """
+    Start the scraper for one restaurant and stream its reviews page by page
+
+    Pages are yielded while the actor is still running, so the first
+    reviews can be analyzed long before the run has finished.
+
+    Args:
+        url: Full Google Maps restaurant URL
+        api_key: Apify API key
+        start_date: Only fetch reviews on or after this date ('YYYY-MM-DD');
+                    defaults to 6 months ago
+        max_reviews: Maximum reviews to fetch
+        page_size: Items per page
+
+    Yields:
+        Lists of review items
+    """
+    if start_date is None:
+        start_date = (datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+
+    client = make_client(api_key)
+    run_input = build_run_input([url], start_date, max_reviews)
+    run = client.actor(ACTOR_ID).start(run_input=run_input)
+
+    yield from iter_dataset_pages(client, run["defaultDatasetId"], page_size=page_size,
+                                  run_id=run["id"])
+
+
+def sync_start_date(store, url):
+    """
+    Return the date to scrape a restaurant's reviews from ('YYYY-MM-DD')
+
+    The first sync pulls the last 6 months; later syncs start from the day
+    of the newest stored review.
+    """
+    mark = store.get_high_water_mark(url)
+    if mark:
+        return datetime.fromtimestamp(mark[0], tz=timezone.utc).strftime('%Y-%m-%d')
+    return (datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+
+
+def sync_restaurant_reviews(url, api_key, store, max_reviews=MAX_REVIEWS):
+    """
+    Fetch only the reviews added since the last sync and merge them into the store
+
+    The first sync pulls the last 6 months. Later syncs start from the day
+    of the newest stored review; reviews from that day that are already
+    stored are de-duplicated by review id.
+
+    Args:
+        url: Full Google Maps restaurant URL
+        api_key: Apify API key
+        store: ReviewStore
+        max_reviews: Maximum reviews to fetch in this sync
+
+    Returns:
+        Dictionary with 'fetched', 'added', 'start_date' and 'estimated_cost'
+        (a caller that joined a sync already running for the same restaurant
+        and store gets that sync's result)
+    """
+    return dict(APIFY_FLIGHTS.do(('sync', url, store.path, max_reviews),
+                                 lambda: _sync_restaurant_reviews(url, api_key, store, max_reviews)))
+
+
+def _sync_restaurant_reviews(url, api_key, store, max_reviews):
+    start_date = sync_start_date(store, url)
+
+    # Merge page by page so memory stays flat however many reviews arrive.
+    # The high-water mark only moves once the whole run has succeeded, so a
+    # failed run (which may have delivered just the newest reviews) is retried
+    # from the old mark next time.
+    fetched = 0
+    added = 0
+    for page in stream_restaurant_review_pages(url, api_key, start_date=start_date,
+                                               max_reviews=max_reviews):
+        fetched += len(page)
+        added += store.add_reviews(url, page, update_mark=False)
+    store.update_high_water_mark(url)
+
+    return {
+        'fetched': fetched,
+        'added': added,
+        'start_date': start_date,
+        'estimated_cost': fetched / 1000 * COST_PER_1000_REVIEWS
+    }
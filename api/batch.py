@@ -0,0 +1,155 @@
+"""
+Concurrent batch lookups against the Places API
+
+Runs text search + place details for many restaurants at once with asyncio.
+The blocking HTTP calls run in a thread pool (sharing one pooled session),
+while a semaphore caps how many requests are in flight and a token bucket
+keeps the request rate under the API quota. Both only apply to requests
+that are really sent: lookups answered from the response cache never wait
+for them (see LimitedClient in api/rate_limit.py).
+
+Results are yielded as soon as each place finishes, in completion order.
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from api.field_masks import ID_ONLY, FULL_REVIEWS
+from api.google_maps_client import search_places, get_place_details
+from api.url_resolver import UrlResolver
+from utils.url_parser import is_google_maps_url, is_short_link
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_RATE = 10.0     # API requests per second
+
+
+def read_lookup_file(path):
+    """
+    Read restaurant names / Google Maps URLs, one per line
+
+    Blank lines and lines starting with # are skipped.
+
+    Args:
+        path: Path to the input file
+
+    Returns:
+        List of lookup strings
+    """
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+class BatchLookup:
+    """
+    Look up many restaurants concurrently
+
+    Usage:
+        batch = BatchLookup(api_key, concurrency=20, rate=10)
+        async for result in batch.run(["Locavore Ubud", "https://maps.app.goo.gl/..."]):
+            print(result)
+    """
+
+    def __init__(self, api_key, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 cache=None, offline=False, profile=FULL_REVIEWS):
+        """
+        Args:
+            api_key: Google Maps API key
+            concurrency: Maximum API requests in flight at once
+            rate: Maximum API requests per second
+            cache: Optional ResponseCache
+            offline: Only use cached responses
+            profile: Field-mask profile for the details call (see api/field_masks.py),
+                     e.g. 'rating-refresh' for bulk rating updates
+        """
+        self.api_key = api_key
+        self.profile = profile
+        self.concurrency = concurrency
+        self.cache = cache
+        self.offline = offline
+        # Imported here, so scripts can show the defaults above in --help
+        # without loading requests and asyncio
+        from api.http_client import HttpClient
+        from api.rate_limit import TokenBucket
+        self.limiter = TokenBucket(rate)
+        # One connection per worker so no lookup waits for a free socket
+        self.client = HttpClient(pool_size=concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='lookup')
+        self._limited = None
+        self._loop = None
+        # Short links are followed once and cached alongside the API responses
+        self.resolver = UrlResolver(cache=cache, client=self.client, offline=offline)
+
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking API call in the worker pool (requests it sends are rate-limited)"""
+        return await self._loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _resolve(self, text):
+        """Turn one input line into ('place_id', id) or ('query', text)"""
+        if not is_google_maps_url(text):
+            return 'query', text
+
+        resolved = None
+        if is_short_link(text):
+            resolved = await self._call(self.resolver.resolve, text)
+
+        canonical = self.resolver.canonicalize(text, resolved)
+        if canonical.place_id:
+            return 'place_id', canonical.place_id
+        return 'query', canonical.name or canonical.url
+
+    async def lookup(self, text):
+        """
+        Look up one restaurant
+
+        Args:
+            text: Restaurant name or Google Maps URL
+
+        Returns:
+            Result dictionary: {'input', 'status', 'place'} on success,
+            {'input', 'status', 'error'} otherwise
+        """
+        try:
+            kind, value = await self._resolve(text)
+
+            if kind == 'query':
+                # Only the id is needed here - the details call fetches the rest
+                places = await self._call(search_places, self.api_key, value, cache=self.cache,
+                                          offline=self.offline, client=self._limited,
+                                          profile=ID_ONLY)
+                if not places:
+                    return {'input': text, 'status': 'not_found'}
+                value = places[0]['id']
+
+            details = await self._call(get_place_details, self.api_key, value, cache=self.cache,
+                                       offline=self.offline, client=self._limited,
+                                       profile=self.profile)
+            return {'input': text, 'status': 'ok', 'place': details}
+
+        except Exception as e:
+            return {'input': text, 'status': 'error', 'error': str(e)}
+
+    async def run(self, lookups):
+        """
+        Look up every restaurant, yielding results as they complete
+
+        Args:
+            lookups: Iterable of restaurant names / Google Maps URLs
+
+        Yields:
+            Result dictionaries (see lookup())
+        """
+        import asyncio
+        from api.rate_limit import LimitedClient
+
+        self._loop = asyncio.get_running_loop()
+        self._limited = LimitedClient(self.client, self.limiter, asyncio.Semaphore(self.concurrency),
+                                      self._loop)
+        self.resolver.client = self._limited
+        tasks = [asyncio.ensure_future(self.lookup(text)) for text in lookups]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._executor.shutdown(wait=False)
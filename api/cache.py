@@ -0,0 +1,226 @@
+"""
+On-disk cache for Google Places API responses
+
+Stores raw JSON responses in a small SQLite database so repeat lookups of the
+same restaurant return in milliseconds (and work without a network).
+
+Each entry has:
+- a TTL: how long the entry is "fresh" and served without any API call
+- a stale window: how long after expiry the entry may still be served
+  while a background refresh fetches a new copy (stale-while-revalidate)
+
+The database is capped at a maximum number of entries; the least recently
+used entries are evicted first.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+# Default location of the cache database (override with PLACES_CACHE_PATH)
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'places_cache.sqlite3')
+
+# Maximum number of responses kept on disk before LRU eviction kicks in
+DEFAULT_MAX_ENTRIES = 5000
+
+# Freshness windows (seconds)
+SEARCH_TTL = 24 * 60 * 60        # search results rarely change within a day
+DETAILS_TTL = 6 * 60 * 60        # ratings/reviews move a bit faster
+STALE_TTL = 7 * 24 * 60 * 60     # serve stale for up to a week while refreshing
+
+# Entry states returned by ResponseCache.get()
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+
+def make_key(*parts):
+    """
+    Build a stable cache key from any JSON-serializable parts
+
+    Args:
+        *parts: Values identifying the request (endpoint, ids, field mask...)
+
+    Returns:
+        String key
+    """
+    return json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so trivially different queries share an entry"""
+    return ' '.join(text.lower().split())
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with TTLs, LRU eviction and
+    stale-while-revalidate
+
+    A new SQLite connection is opened for every operation, which keeps the
+    cache safe to use from background refresh threads.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.getenv('PLACES_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses (last_access)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key (see make_key)
+
+        Returns:
+            Tuple of (value, state) where state is FRESH, STALE or EXPIRED,
+            or (None, None) if the key is not cached
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at, stale_until FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                metrics.count('cache_lookups_total', state='miss')
+                return None, None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+        value, expires_at, stale_until = row
+        if now < expires_at:
+            state = FRESH
+        elif now < stale_until:
+            state = STALE
+        else:
+            state = EXPIRED
+        metrics.count('cache_lookups_total', state=state)
+        return json.loads(value), state
+
+    def set(self, key, value, ttl, stale_ttl=STALE_TTL):
+        """
+        Store a response
+
+        Args:
+            key: Cache key (see make_key)
+            value: JSON-serializable response
+            ttl: Seconds the entry stays fresh
+            stale_ttl: Extra seconds the entry may be served stale
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, expires_at, stale_until, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now + ttl + stale_ttl, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used entries once the cache is over its size limit"""
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def get_or_fetch(self, key, fetch, ttl, stale_ttl=STALE_TTL, offline=False):
+        """
+        Return a cached response, fetching it only when needed
+
+        - Fresh entry: returned immediately, no API call
+        - Stale entry: returned immediately, refreshed in a background thread
+        - Missing/expired entry: fetched now and stored
+
+        Args:
+            key: Cache key (see make_key)
+            fetch: Function with no arguments that calls the API and returns
+                   the response (it may raise or return None on failure)
+            ttl: Seconds a new entry stays fresh
+            stale_ttl: Extra seconds a new entry may be served stale
+            offline: Never call the API; return whatever is cached (or None)
+
+        Returns:
+            The response, or None if it could not be fetched
+        """
+        value, state = self.get(key)
+
+        if offline or state == FRESH:
+            return value
+
+        if state == STALE:
+            self._refresh_in_background(key, fetch, ttl, stale_ttl)
+            return value
+
+        try:
+            fresh_value = fetch()
+        except Exception:
+            # The API call failed - an expired copy is better than nothing
+            if value is not None:
+                return value
+            raise
+
+        if fresh_value is not None:
+            self.set(key, fresh_value, ttl, stale_ttl)
+            return fresh_value
+
+        return value
+
+    def _refresh_in_background(self, key, fetch, ttl, stale_ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                fresh_value = fetch()
+                if fresh_value is not None:
+                    self.set(key, fresh_value, ttl, stale_ttl)
+            except Exception:
+                # Keep serving the stale copy; the next lookup will try again
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # Not a daemon thread: the refresh should finish and be saved
+        # even if the script has already printed its results
+        threading.Thread(target=refresh, name='cache-refresh').start()
@@ -0,0 +1,67 @@
+"""
+Field-mask profiles for the Places API (New)
+
+The Places API only returns (and bills for) the fields named in the
+X-Goog-FieldMask header, so each kind of job asks for exactly what it uses:
+
+    id-only          just the place id, to resolve a name before a details call
+    listing          name, address, rating and coordinates for search
+                     result lists (coordinates feed the geo index)
+    rating-refresh   just the rating and review count, for bulk refreshes
+    full-reviews     everything shown on a restaurant page, with reviews
+
+'location' is billed in the same tier as the name and address, so asking
+for it costs nothing extra.
+
+Reviews are the expensive part: they put a request in the top billing tier
+and make up most of the response body.
+
+Usage:
+    mask = details_mask('rating-refresh')   # "id,rating,userRatingCount"
+    mask = search_mask('listing')           # "places.id,places.displayName,..."
+"""
+
+ID_ONLY = 'id-only'
+LISTING = 'listing'
+RATING_REFRESH = 'rating-refresh'
+FULL_REVIEWS = 'full-reviews'
+
+# Place fields per profile (Place Details names; Text Search adds "places.")
+PROFILES = {
+    ID_ONLY: ('id',),
+    LISTING: ('id', 'displayName', 'formattedAddress', 'location', 'rating', 'userRatingCount'),
+    RATING_REFRESH: ('id', 'rating', 'userRatingCount'),
+    FULL_REVIEWS: ('id', 'displayName', 'formattedAddress', 'location', 'rating', 'userRatingCount',
+                   'reviews'),
+}
+
+
+def profile_fields(profile):
+    """
+    Return the place fields of a profile
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown field profile: {profile} (choose from {', '.join(PROFILES)})")
+
+
+def details_mask(profile):
+    """Build the Place Details field mask for a profile"""
+    return ','.join(profile_fields(profile))
+
+
+def search_mask(profile, paginated=False):
+    """
+    Build the Text Search field mask for a profile
+
+    Args:
+        profile: Profile name
+        paginated: Also ask for nextPageToken (needed to fetch later pages)
+    """
+    mask = ','.join('places.' + field for field in profile_fields(profile))
+    return mask + ',nextPageToken' if paginated else mask
+
@@ -0,0 +1,232 @@
+"""
+Google Maps Places API (New) client
+
+Plain fetch functions that return data (or raise PlacesApiError) without
+printing anything, so they can be shared by the interactive scripts and
+by batch jobs.
+
+All calls go through the pooled HTTP client (api/http_client.py) and can
+optionally use the on-disk response cache (api/cache.py). The HTTP client
+(and with it `requests`) is only imported once a request is actually sent,
+so lookups answered from the cache start fast. Every response that comes
+from the network is also kept in the raw archive (storage/archive.py).
+
+Set PLACES_API_URL to send requests somewhere else, e.g. the local
+stand-in server (api/standin.py).
+"""
+
+import os
+
+from api.cache import make_key, normalize_query, SEARCH_TTL, DETAILS_TTL
+from api.field_masks import LISTING, FULL_REVIEWS, details_mask, search_mask
+from api.singleflight import SingleFlight
+from storage.archive import PLACES_DETAILS, PLACES_SEARCH, archive_raw
+from utils import metrics
+
+# New Places API endpoints
+PLACES_API_URL = "https://places.googleapis.com/v1"
+TEXT_SEARCH_URL = PLACES_API_URL + "/places:searchText"
+PLACE_DETAILS_URL = PLACES_API_URL + "/places/{place_id}"
+
+# Default search area: 50km circle around the centre of Bali
+BALI_LOCATION_BIAS = {
+    "circle": {
+        "center": {
+            "latitude": -8.6705,
+            "longitude": 115.2126
+        },
+        "radius": 50000.0
+    }
+}
+
+# Default fields requested from each endpoint (see api/field_masks.py for
+# the other profiles). Text Search only returns a next page token when it
+# is in the field mask
+SEARCH_FIELD_MASK = search_mask(LISTING)
+SEARCH_PAGE_FIELD_MASK = search_mask(LISTING, paginated=True)
+DETAILS_FIELD_MASK = details_mask(FULL_REVIEWS)
+
+
+# Collapses identical concurrent requests (keyed like the cache) into one call
+PLACES_FLIGHTS = SingleFlight('places')
+
+
+class PlacesApiError(Exception):
+    """Raised when a Places API call fails (bad status, network error or offline cache miss)"""
+
+    def __init__(self, message, status_code=None, response_text=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+
+
+def api_url(url):
+    """Point an endpoint URL at PLACES_API_URL when that is set"""
+    base = os.getenv('PLACES_API_URL')
+    if base and url.startswith(PLACES_API_URL):
+        return base.rstrip('/') + url[len(PLACES_API_URL):]
+    return url
+
+
+def _headers(api_key, field_mask):
+    return {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": api_key,
+        "X-Goog-FieldMask": field_mask
+    }
+
+
+def _cached(cache, key, fetch, ttl, offline):
+    """
+    Run fetch() through the cache when one is given
+
+    Identical requests already in flight in another thread are not sent
+    again: they wait for that request and share its response.
+    """
+    def shared_fetch():
+        return PLACES_FLIGHTS.do(key, fetch)
+
+    if cache is None:
+        if offline:
+            raise PlacesApiError("Offline mode needs a response cache")
+        return shared_fetch()
+
+    data = cache.get_or_fetch(key, shared_fetch, ttl=ttl, offline=offline)
+    if data is None and offline:
+        raise PlacesApiError("Not in cache (offline mode)")
+    return data
+
+
+def search_places(api_key, query, location_bias=None, field_mask=SEARCH_FIELD_MASK,
+                  cache=None, offline=False, client=None, profile=None):
+    """
+    Search for places with Text Search (New)
+
+    Args:
+        api_key: Google Maps API key
+        query: Free-text query, e.g. "Locavore Ubud"
+        location_bias: locationBias object (defaults to all of Bali)
+        field_mask: X-Goog-FieldMask for the response
+        cache: Optional ResponseCache
+        offline: Only use cached responses
+        client: HttpClient to use (defaults to the shared client)
+        profile: Field-mask profile name (e.g. 'rating-refresh'); overrides field_mask
+
+    Returns:
+        List of place dictionaries (empty if nothing matched)
+
+    Raises:
+        PlacesApiError: If the search failed
+    """
+    if profile:
+        field_mask = search_mask(profile)
+    data = search_places_page(api_key, query, location_bias=location_bias, field_mask=field_mask,
+                              cache=cache, offline=offline, client=client)
+    return data.get('places', [])
+
+
+def search_places_page(api_key, query, location_bias=None, page_token=None, page_size=None,
+                       included_type=None, field_mask=SEARCH_PAGE_FIELD_MASK,
+                       cache=None, offline=False, client=None, profile=None):
+    """
+    Fetch one page of Text Search (New) results
+
+    Text Search returns at most 20 places per page and up to 3 pages per
+    query. Pass the previous page's 'nextPageToken' as page_token to get the
+    next one; every other argument must stay the same between pages.
+
+    Args:
+        api_key: Google Maps API key
+        query: Free-text query, e.g. "restaurants"
+        location_bias: locationBias object (defaults to all of Bali)
+        page_token: nextPageToken from the previous page (None for the first page)
+        page_size: Places per page (1-20, default 20)
+        included_type: Only return places of this type (e.g. "restaurant")
+        field_mask: X-Goog-FieldMask for the response (include nextPageToken)
+        cache: Optional ResponseCache
+        offline: Only use cached responses
+        client: HttpClient to use (defaults to the shared client)
+        profile: Field-mask profile name; overrides field_mask
+
+    Returns:
+        Response dictionary with 'places' and, if there are more results,
+        'nextPageToken'
+
+    Raises:
+        PlacesApiError: If the search failed
+    """
+    if profile:
+        field_mask = search_mask(profile, paginated=True)
+    request_body = {
+        "textQuery": query,
+        "locationBias": location_bias or BALI_LOCATION_BIAS
+    }
+    if page_size:
+        request_body["pageSize"] = page_size
+    if included_type:
+        request_body["includedType"] = included_type
+    if page_token:
+        request_body["pageToken"] = page_token
+    headers = _headers(api_key, field_mask)
+
+    def fetch():
+        from api.http_client import get_client
+        response = (client or get_client()).post(
+            api_url(TEXT_SEARCH_URL), endpoint='places:searchText', headers=headers, json=request_body)
+        if response.status_code != 200:
+            raise PlacesApiError(f"Search failed with status code: {response.status_code}",
+                                 response.status_code, response.text)
+        with metrics.timer('json_decode_seconds', endpoint='places:searchText'):
+            data = response.json()
+        archive_raw(PLACES_SEARCH, [data], source=query)
+        return data
+
+    # Same query + same search area + same fields = same cache entry.
+    # A later page is keyed by its page token, which comes from the (cached)
+    # previous page, so a cached first page leads to cached later pages
+    parts = ['searchText', normalize_query(query), request_body['locationBias'], field_mask]
+    extras = {k: v for k, v in request_body.items() if k in ('pageSize', 'includedType', 'pageToken')}
+    if extras:
+        parts.append(extras)
+    key = make_key(*parts)
+    return _cached(cache, key, fetch, SEARCH_TTL, offline)
+
+
+def get_place_details(api_key, place_id, field_mask=DETAILS_FIELD_MASK,
+                      cache=None, offline=False, client=None, profile=None):
+    """
+    Fetch one place with Place Details (New)
+
+    Args:
+        api_key: Google Maps API key
+        place_id: Place ID (e.g. "ChIJXxe2rXNH0i0Rnt_qeoqnQcc")
+        field_mask: X-Goog-FieldMask for the response
+        cache: Optional ResponseCache
+        offline: Only use cached responses
+        client: HttpClient to use (defaults to the shared client)
+        profile: Field-mask profile name (e.g. 'rating-refresh'); overrides field_mask
+
+    Returns:
+        Place details dictionary
+
+    Raises:
+        PlacesApiError: If the request failed
+    """
+    if profile:
+        field_mask = details_mask(profile)
+    url = api_url(PLACE_DETAILS_URL.format(place_id=place_id))
+    headers = _headers(api_key, field_mask)
+
+    def fetch():
+        from api.http_client import get_client
+        response = (client or get_client()).get(url, endpoint='places/{id}', headers=headers)
+        if response.status_code != 200:
+            raise PlacesApiError(f"Failed to fetch details: {response.status_code}",
+                                 response.status_code, response.text)
+        with metrics.timer('json_decode_seconds', endpoint='places/{id}'):
+            data = response.json()
+        archive_raw(PLACES_DETAILS, [data], source=place_id)
+        return data
+
+    key = make_key('placeDetails', place_id, field_mask)
+    return _cached(cache, key, fetch, DETAILS_TTL, offline)
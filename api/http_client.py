@@ -0,0 +1,217 @@
+"""
+Shared HTTP client for all Google Places API calls
+
+Every script used to call bare requests.get/requests.post, which opens a new
+TCP+TLS connection each time, never times out and never retries. This module
+provides one pooled requests.Session that:
+- keeps connections alive between calls (no repeated TLS handshakes)
+- uses connect/read timeouts (configurable via .env)
+- retries 429 and 5xx responses with jittered exponential backoff,
+  honouring the Retry-After header when the server sends one
+- records latency per endpoint so slow calls are easy to spot
+
+Usage:
+    from api.http_client import get_client
+
+    client = get_client()
+    response = client.post(url, endpoint='places:searchText', headers=..., json=...)
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.limits import DEFAULT_POOL_SIZE
+from utils import metrics
+
+# Timeouts in seconds (override with HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT)
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Retry policy (override the retry count with HTTP_MAX_RETRIES)
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5               # first retry waits ~0.5s, then ~1s, ~2s...
+BACKOFF_MAX = 30.0               # never wait longer than this between attempts
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Work out how long to wait before the next attempt
+
+    Args:
+        attempt: Number of attempts already made (1 for the first retry)
+        retry_after: Value of the Retry-After header, if any
+
+    Returns:
+        Seconds to sleep
+    """
+    if retry_after:
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            try:
+                # Retry-After can also be an HTTP date
+                wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                wait = None
+        # 'nan' or 'inf' falls back to the normal backoff; a negative wait becomes 0
+        if wait is not None and math.isfinite(wait):
+            return min(max(wait, 0.0), BACKOFF_MAX)
+
+    # "Full jitter": random wait between 0 and the exponential cap, so many
+    # workers hitting a 429 at once don't all retry at the same moment
+    cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+def _nearest_rank(ordered, fraction):
+    """Percentile of sorted samples by nearest rank (always an observed value, p95 of 2 is the max)"""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class HttpClient:
+    """
+    Pooled HTTP session with timeouts, retries and latency tracking
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None,
+                 max_retries=None, pool_size=DEFAULT_POOL_SIZE):
+        # Settings are read here (not at import) so values from .env are
+        # picked up even though load_dotenv() runs after the imports
+        if connect_timeout is None:
+            connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT))
+        if read_timeout is None:
+            read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))
+        if max_retries is None:
+            max_retries = int(os.getenv('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+
+        # Retries are handled here (to honour Retry-After and record
+        # latency), so the adapter itself never retries
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._latencies = defaultdict(list)
+        self._retries = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        """
+        Send a request, retrying on 429/5xx and connection errors
+
+        Args:
+            method: HTTP method ('GET', 'POST', ...)
+            url: Full request URL
+            endpoint: Label used for latency stats (defaults to the URL path)
+            **kwargs: Passed through to requests (headers, json, params...)
+
+        Returns:
+            requests.Response of the last attempt
+
+        Raises:
+            requests.RequestException: If every attempt failed to connect
+        """
+        endpoint = endpoint or urlparse(url).path
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, time.perf_counter() - start, type(e).__name__)
+                if attempt > self.max_retries:
+                    raise
+                self._record_retry(endpoint, type(e).__name__)
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            self._record(endpoint, time.perf_counter() - start, response.status_code)
+
+            if response.status_code in RETRY_STATUS_CODES and attempt <= self.max_retries:
+                self._record_retry(endpoint, response.status_code)
+                time.sleep(backoff_delay(attempt, response.headers.get('Retry-After')))
+                continue
+
+            return response
+
+    def get(self, url, endpoint=None, **kwargs):
+        """Send a GET request (see request())"""
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        """Send a POST request (see request())"""
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def _record(self, endpoint, seconds, status):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+        metrics.observe('http_request_seconds', seconds, endpoint=endpoint, status=status)
+
+    def _record_retry(self, endpoint, reason):
+        with self._lock:
+            self._retries[endpoint] += 1
+        metrics.count('http_retries_total', endpoint=endpoint, reason=reason)
+
+    def latency_report(self):
+        """
+        Summarize latency per endpoint
+
+        Returns:
+            Dictionary of endpoint -> {'calls', 'retries', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms'}
+        """
+        report = {}
+        with self._lock:
+            for endpoint, samples in self._latencies.items():
+                ordered = sorted(samples)
+                count = len(ordered)
+                report[endpoint] = {
+                    'calls': count,
+                    'retries': self._retries[endpoint],
+                    'avg_ms': round(1000 * sum(ordered) / count, 1),
+                    'p50_ms': round(1000 * _nearest_rank(ordered, 0.50), 1),
+                    'p95_ms': round(1000 * _nearest_rank(ordered, 0.95), 1),
+                    'max_ms': round(1000 * ordered[-1], 1),
+                }
+        return report
+
+    def print_latency_report(self, file=None):
+        """Print the latency summary in the same style as the scripts (to stdout by default)"""
+        report = self.latency_report()
+        if not report:
+            return
+
+        print("\n⏱️  API latency by endpoint:", file=file)
+        for endpoint, stats in report.items():
+            print(f"   {endpoint}: {stats['calls']} call(s), {stats['retries']} retried, "
+                  f"avg {stats['avg_ms']}ms, p95 {stats['p95_ms']}ms, max {stats['max_ms']}ms", file=file)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared HttpClient (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,26 @@
+"""
+Limits and defaults shared by the API modules and the command-line scripts
+
+Kept in a module of plain constants so scripts can show them as defaults in
+--help without loading requests, the Apify client, the review store or
+asyncio.
+"""
+
+# Connections kept open per host (raise this for large batch runs)
+DEFAULT_POOL_SIZE = 20
+
+# Where the lookup service (serve.py) listens
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8080
+
+# Restaurant URLs packed into one actor run
+URLS_PER_RUN = 20
+
+# Runs in flight at once (Apify plans limit concurrent actor runs)
+MAX_PARALLEL_RUNS = 5
+
+# Scraping budget in dollars per rolling 24 hours
+DEFAULT_DAILY_BUDGET = 5.00
+
+# Seconds between refresh rounds when running continuously
+REFRESH_POLL_INTERVAL = 15 * 60
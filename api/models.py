@@ -0,0 +1,186 @@
+"""
+Compact Place and Review records
+
+The Places API (New) and Apify return deeply nested JSON, and reading it
+means chains like review.get('originalText', {}).get('text', ...) in every
+loop. These records parse each shape ONCE into flat objects:
+- __slots__ means no per-object __dict__, so 100k+ reviews take a fraction
+  of the memory of the raw JSON
+- strings repeated across many reviews (author names, place names and
+  addresses, relative times) are interned so each is stored once
+
+Usage:
+    place = Place.from_places_api(response.json())
+    for review in place.reviews:
+        print(review.author, review.rating, review.text)
+
+    place, review = Place.from_apify(item), Review.from_apify(item)
+"""
+
+import sys
+
+from utils.dates import to_epoch
+
+
+def _intern(value):
+    """Intern a string so identical values share one object (None passes through)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _text(value):
+    """Read the text out of a Places API localized text object ({'text': ...})"""
+    if isinstance(value, dict):
+        return value.get('text')
+    return value
+
+
+class Review:
+    """One review, from either the Places API or Apify"""
+
+    __slots__ = ('review_id', 'place_id', 'author', 'rating', 'text',
+                 'published_at', 'relative_time', 'language')
+
+    def __init__(self, review_id=None, place_id=None, author=None, rating=None, text=None,
+                 published_at=None, relative_time=None, language=None):
+        self.review_id = review_id
+        self.place_id = _intern(place_id)
+        self.author = _intern(author)
+        self.rating = rating
+        self.text = text
+        self.published_at = published_at        # epoch seconds (None if unknown)
+        self.relative_time = _intern(relative_time)
+        self.language = _intern(language)
+
+    @classmethod
+    def from_places_api(cls, review, place_id=None):
+        """
+        Parse a review from a Place Details (New) response
+
+        The original-language text is preferred over Google's translation.
+        """
+        original = review.get('originalText') or {}
+        translated = review.get('text') or {}
+        return cls(
+            review_id=review.get('name'),
+            place_id=place_id,
+            author=(review.get('authorAttribution') or {}).get('displayName'),
+            rating=review.get('rating'),
+            text=original.get('text') or translated.get('text'),
+            published_at=to_epoch(review.get('publishTime')),
+            relative_time=review.get('relativePublishTimeDescription'),
+            language=original.get('languageCode') or translated.get('languageCode'),
+        )
+
+    @classmethod
+    def from_apify(cls, item):
+        """Parse one Google Maps Reviews Scraper item"""
+        return cls(
+            review_id=item.get('reviewId'),
+            place_id=item.get('placeId'),
+            author=item.get('name'),
+            rating=item.get('stars'),
+            text=item.get('text'),
+            published_at=to_epoch(item.get('publishedAtDate')),
+            relative_time=item.get('publishAt'),
+            language=item.get('originalLanguage'),
+        )
+
+    def to_dict(self):
+        """Return the record as a plain dictionary (e.g. for JSON output)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Review(author={self.author!r}, rating={self.rating!r}, published_at={self.published_at!r})"
+
+
+class Place:
+    """One restaurant, from either the Places API or Apify"""
+
+    __slots__ = ('place_id', 'name', 'address', 'rating', 'total_reviews',
+                 'latitude', 'longitude', 'reviews')
+
+    def __init__(self, place_id=None, name=None, address=None, rating=None, total_reviews=None,
+                 latitude=None, longitude=None, reviews=None):
+        self.place_id = _intern(place_id)
+        self.name = _intern(name)
+        self.address = _intern(address)
+        self.rating = rating
+        self.total_reviews = total_reviews
+        self.latitude = latitude
+        self.longitude = longitude
+        self.reviews = reviews if reviews is not None else []
+
+    @classmethod
+    def from_places_api(cls, data, fields=None):
+        """
+        Parse a Text Search (New) place or a Place Details (New) response
+
+        Args:
+            data: Place dictionary
+            fields: Place fields that were requested (e.g. from
+                    api.field_masks.profile_fields()); the others are not
+                    parsed and stay None. None parses everything.
+        """
+        def wanted(field):
+            return fields is None or field in fields
+
+        place = cls(place_id=data.get('id'))
+        if wanted('displayName'):
+            place.name = _intern(_text(data.get('displayName')))
+        if wanted('formattedAddress'):
+            place.address = _intern(data.get('formattedAddress'))
+        if wanted('rating'):
+            place.rating = data.get('rating')
+        if wanted('userRatingCount'):
+            place.total_reviews = data.get('userRatingCount')
+        if wanted('location'):
+            location = data.get('location') or {}
+            place.latitude = location.get('latitude')
+            place.longitude = location.get('longitude')
+        if wanted('reviews'):
+            place.reviews = [Review.from_places_api(review, place.place_id)
+                             for review in data.get('reviews', [])]
+        return place
+
+    @classmethod
+    def from_apify(cls, item):
+        """Parse the restaurant fields Apify repeats on every review item"""
+        location = item.get('location') or {}
+        return cls(
+            place_id=item.get('placeId'),
+            name=item.get('title'),
+            address=item.get('address'),
+            rating=item.get('totalScore'),
+            total_reviews=item.get('reviewsCount'),
+            latitude=location.get('lat'),
+            longitude=location.get('lng'),
+        )
+
+    @classmethod
+    def list_from_apify(cls, items):
+        """
+        Group Apify review items into Place records with their reviews
+
+        Args:
+            items: Iterable of Apify review items (any number of restaurants)
+
+        Returns:
+            List of Place, in the order each restaurant was first seen
+        """
+        places = {}
+        for item in items:
+            place_id = item.get('placeId')
+            place = places.get(place_id)
+            if place is None:
+                place = places[place_id] = cls.from_apify(item)
+            place.reviews.append(Review.from_apify(item))
+        return list(places.values())
+
+    def to_dict(self):
+        """Return the record as a plain dictionary (e.g. for JSON output)"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['reviews'] = [review.to_dict() for review in self.reviews]
+        return data
+
+    def __repr__(self):
+        return f"Place(name={self.name!r}, rating={self.rating!r}, reviews={len(self.reviews)})"
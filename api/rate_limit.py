@@ -0,0 +1,105 @@
+"""
+Token-bucket rate limiter for asyncio jobs
+
+Keeps batch jobs under the Places API quota: tokens refill at a steady
+rate and every API call takes one token, waiting if the bucket is empty.
+Short bursts up to the bucket capacity are allowed.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket
+
+    Usage:
+        limiter = TokenBucket(rate=10)   # 10 calls per second
+        await limiter.acquire()          # before every API call
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second's worth)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        """Wait until enough tokens are available, then take them"""
+        # The lock makes waiters queue up in order instead of all waking
+        # at once and racing for the same token
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class LimitedClient:
+    """
+    HttpClient wrapper that paces only the requests actually sent
+
+    Batch jobs make their API calls in worker threads, and most calls may be
+    answered by the response cache. Wrapping the client moves the
+    concurrency slot and the rate-limit token to the moment a request really
+    goes out, so cached answers never wait for either.
+
+    Usage (inside a running event loop):
+        client = LimitedClient(HttpClient(), TokenBucket(10), asyncio.Semaphore(20),
+                               asyncio.get_running_loop())
+        # then pass `client` to the fetch functions run in worker threads
+    """
+
+    def __init__(self, client, limiter, semaphore, loop):
+        """
+        Args:
+            client: HttpClient that sends the requests
+            limiter: TokenBucket to take a token from per request
+            semaphore: asyncio.Semaphore capping requests in flight
+            loop: Event loop the limiter and semaphore belong to
+        """
+        self.client = client
+        self.limiter = limiter
+        self.semaphore = semaphore
+        self.loop = loop
+        self.requests = 0
+
+    async def _acquire(self):
+        await self.semaphore.acquire()
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        """Send a request (see HttpClient.request()) once a slot and a token are free"""
+        # Called from a worker thread: wait for the event loop to hand out both
+        asyncio.run_coroutine_threadsafe(self._acquire(), self.loop).result()
+        self.requests += 1
+        try:
+            return self.client.request(method, url, endpoint=endpoint, **kwargs)
+        finally:
+            self.loop.call_soon_threadsafe(self.semaphore.release)
+
+    def get(self, url, endpoint=None, **kwargs):
+        """Send a GET request (see request())"""
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        """Send a POST request (see request())"""
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
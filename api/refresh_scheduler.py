@@ -0,0 +1,233 @@
+"""
+Adaptive refresh scheduler
+
+Re-scraping every restaurant on a fixed timetable wastes the Apify budget
+on quiet places and leaves busy, risky ones stale. Instead, each synced
+restaurant gets its own refresh interval:
+
+- busy restaurants (many recent reviews, or a userRatingCount that has
+  grown since the last sync) are refreshed more often
+- restaurants with a high share of flagged reviews are refreshed more often
+- a quiet restaurant with no mentions waits up to MAX_INTERVAL
+
+A restaurant's priority is how overdue it is (time since its last sync
+divided by its interval). Every round, due restaurants are taken in
+priority order, most overdue first, until the round is full or the daily
+budget is used up. Each refresh is capped with the scraper's maxReviews,
+so a round can never spend more than it reserved. The actual spend is
+logged in the review store and counts against a rolling 24-hour budget.
+
+Only restaurants that were synced once already are scheduled; add new
+ones with sync_reviews.py.
+
+Refreshes never reuse an earlier scraper run (see api/apify_batch.py): a
+busy restaurant is refreshed again well within the reuse window, with the
+same input, and reusing that run would return no new reviews while still
+marking the restaurant as synced.
+
+Usage:
+    scheduler = RefreshScheduler(store, api_key, daily_budget=5.0)
+    for candidate in scheduler.candidates()[:10]:
+        print(candidate.url, candidate.priority)
+    results = asyncio.run(scheduler.run_once())
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+
+from api.apify_batch import MAX_PARALLEL_RUNS, URLS_PER_RUN, sync_restaurants
+from api.apify_client import COST_PER_1000_REVIEWS, MAX_REVIEWS
+from api.limits import DEFAULT_DAILY_BUDGET, REFRESH_POLL_INTERVAL
+
+# Budgets are spent per rolling 24 hours
+BUDGET_WINDOW = 24 * 60 * 60
+
+# Refresh intervals: a restaurant with no recent reviews or mentions waits
+# BASE_INTERVAL; busy and risky ones are refreshed sooner
+MIN_INTERVAL = 2 * 60 * 60
+BASE_INTERVAL = 7 * 24 * 60 * 60
+MAX_INTERVAL = 30 * 24 * 60 * 60
+
+# Reviews per day at which a restaurant refreshes twice as often
+BUSY_REVIEWS_PER_DAY = 1.0
+
+# A 5% flagged-review rate refreshes twice as often, 10% three times
+RISK_WEIGHT = 20.0
+
+# Window for "recent" review and mention counts
+RECENT_DAYS = 90
+
+# maxReviews tiers: limits are rounded up to one of these, so restaurants
+# with similar limits can share a scraper run
+REVIEW_LIMITS = (50, 100, 200, 500, 1000)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# One scored restaurant. 'priority' >= 1 means it is due; 'max_cost' is the
+# most its refresh can cost (max_reviews at the scraper price).
+RefreshCandidate = namedtuple('RefreshCandidate', [
+    'url', 'place_id', 'priority', 'interval', 'age', 'velocity', 'flag_rate',
+    'expected_reviews', 'max_reviews', 'max_cost'
+])
+
+
+def refresh_interval(velocity, flag_rate):
+    """
+    Return how often a restaurant should be refreshed
+
+    Args:
+        velocity: New reviews per day
+        flag_rate: Share of recent reviews with food poisoning mentions (0-1)
+
+    Returns:
+        Interval in seconds, between MIN_INTERVAL and MAX_INTERVAL
+    """
+    speedup = (1 + velocity / BUSY_REVIEWS_PER_DAY) * (1 + RISK_WEIGHT * flag_rate)
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, BASE_INTERVAL / speedup))
+
+
+def review_limit(expected_reviews):
+    """Return the maxReviews for a refresh expecting this many new reviews"""
+    wanted = 2 * expected_reviews
+    for limit in REVIEW_LIMITS:
+        if limit >= wanted:
+            return min(limit, MAX_REVIEWS)
+    return MAX_REVIEWS
+
+
+class RefreshScheduler:
+    """
+    Decides which restaurants to refresh next and runs the refreshes
+
+    Uses the store's connection, so run it on the thread that created the
+    store (asyncio.run() from that thread is fine).
+    """
+
+    def __init__(self, store, api_key, daily_budget=DEFAULT_DAILY_BUDGET,
+                 max_parallel_runs=MAX_PARALLEL_RUNS, per_run=URLS_PER_RUN):
+        """
+        Args:
+            store: ReviewStore with the restaurants to keep fresh
+            api_key: Apify API key
+            daily_budget: Dollars to spend per rolling 24 hours
+            max_parallel_runs: Scraper runs in flight at once
+            per_run: Restaurants packed into one scraper run
+        """
+        self.store = store
+        self.api_key = api_key
+        self.daily_budget = daily_budget
+        self.max_parallel_runs = max_parallel_runs
+        self.per_run = per_run
+
+    def candidates(self, now=None):
+        """
+        Score every synced restaurant
+
+        Args:
+            now: Reference epoch seconds (defaults to now)
+
+        Returns:
+            List of RefreshCandidate, highest priority first
+        """
+        now = time.time() if now is None else now
+        since = now - RECENT_DAYS * SECONDS_PER_DAY
+        scored = []
+        for (url, place_id, synced_at, total_reviews, reviews_at_sync,
+             recent_reviews, recent_mentions) in self.store.refresh_signals(since):
+            age = max(0.0, now - (synced_at or 0))
+            days = max(age / SECONDS_PER_DAY, 1 / 24)
+
+            # Reviews Google has counted since the last sync (when a later
+            # scrape or sweep told us the current userRatingCount)
+            growth = 0
+            if total_reviews is not None and reviews_at_sync is not None:
+                growth = max(0, total_reviews - reviews_at_sync)
+
+            velocity = max(recent_reviews / RECENT_DAYS, growth / days)
+            flag_rate = recent_mentions / recent_reviews if recent_reviews else 0.0
+            interval = refresh_interval(velocity, flag_rate)
+            expected = max(growth, velocity * age / SECONDS_PER_DAY)
+            limit = review_limit(expected)
+
+            scored.append(RefreshCandidate(
+                url, place_id, age / interval, interval, age, velocity, flag_rate,
+                expected, limit, limit / 1000 * COST_PER_1000_REVIEWS
+            ))
+
+        scored.sort(key=lambda candidate: candidate.priority, reverse=True)
+        return scored
+
+    def remaining_budget(self, now=None):
+        """Return the dollars left in the current 24-hour window"""
+        now = time.time() if now is None else now
+        return max(0.0, self.daily_budget - self.store.spent_since(now - BUDGET_WINDOW))
+
+    def pick(self, now=None):
+        """
+        Choose the restaurants to refresh in the next round
+
+        Due restaurants are taken most overdue first. One that does not fit
+        the remaining budget is skipped, so a cheaper one further down can
+        still go.
+
+        Returns:
+            List of RefreshCandidate
+        """
+        budget = self.remaining_budget(now)
+        capacity = self.max_parallel_runs * self.per_run
+
+        picked = []
+        for candidate in self.candidates(now):
+            if candidate.priority < 1 or len(picked) == capacity:
+                break
+            if candidate.max_cost <= budget:
+                budget -= candidate.max_cost
+                picked.append(candidate)
+        return picked
+
+    async def refresh(self, candidates):
+        """
+        Refresh restaurants with packed, parallel scraper runs and log the spend
+
+        Args:
+            candidates: RefreshCandidate list (e.g. from pick())
+
+        Yields:
+            sync_restaurants() results, one per restaurant
+        """
+        limits = {candidate.url: candidate.max_reviews for candidate in candidates}
+        async for result in sync_restaurants(list(limits), self.api_key, self.store,
+                                             max_reviews=limits, per_run=self.per_run,
+                                             max_parallel_runs=self.max_parallel_runs):
+            self.store.record_spend(result['url'], result['fetched'], result['estimated_cost'])
+            yield result
+
+    async def run_once(self, now=None):
+        """
+        Run one round: pick the due restaurants and refresh them
+
+        Returns:
+            List of sync_restaurants() results (empty if nothing was due or affordable)
+        """
+        return [result async for result in self.refresh(self.pick(now))]
+
+    async def run_forever(self, poll_interval=REFRESH_POLL_INTERVAL, on_result=None):
+        """
+        Keep refreshing: one round, then wait, until cancelled
+
+        Args:
+            poll_interval: Seconds to wait after a round that had nothing to do
+            on_result: Optional function called with each refresh result
+        """
+        while True:
+            candidates = self.pick()
+            failed = False
+            async for result in self.refresh(candidates):
+                failed = failed or result['error'] is not None
+                if on_result is not None:
+                    on_result(result)
+            # A full round may have left more due restaurants: go again at
+            # once, unless runs are failing (they would be picked again)
+            if failed or len(candidates) < self.max_parallel_runs * self.per_run:
+                await asyncio.sleep(poll_interval)
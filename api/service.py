@@ -0,0 +1,379 @@
+"""
+Long-running food safety HTTP service
+
+Every one-shot script pays interpreter start, imports, load_dotenv() and a
+cold TCP/TLS connection before its first API call. This service starts
+once and keeps all of that warm across requests:
+- the pooled HTTP client (api/http_client.py), so Google connections stay open
+- the response cache (api/cache.py)
+- the compiled keyword detector (engine/detector.py)
+- the local review store (storage/review_store.py), if one exists
+
+Endpoints (all JSON):
+
+    GET  /restaurants/{place_id}/safety   Place Details + keyword scan + KPIs
+    POST /batch                           {"place_ids": [...]} -> one report each
+    GET  /health                          liveness and request counts
+    GET  /metrics                         Prometheus text (utils/metrics.py)
+
+Concurrent requests for the same place share ONE upstream fetch: the first
+request starts it and every other request for that place waits for the
+same result.
+
+The server runs on asyncio; the blocking Places calls run in a thread pool
+and the SQLite store on one dedicated thread (SQLite connections belong to
+the thread that opened them).
+
+Usage:
+    service = SafetyService(api_key)
+    asyncio.run(service.serve_forever(port=8080))
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from api.cache import ResponseCache
+from api.field_masks import FULL_REVIEWS, profile_fields
+from api.google_maps_client import PlacesApiError, get_place_details
+from api.limits import DEFAULT_POOL_SIZE, SERVICE_HOST, SERVICE_PORT
+from api.models import Place
+from api.singleflight import AsyncSingleFlight
+from engine.detector import DEFAULT_DETECTOR, highest_confidence
+from engine.processor import MentionStats
+from storage.review_store import DEFAULT_STORE_PATH, ReviewStore
+from utils import metrics
+from utils.dates import month_bucket, month_key
+
+
+# Places fetched at once across all requests (matches the HTTP pool size)
+DEFAULT_MAX_CONCURRENCY = DEFAULT_POOL_SIZE
+
+# Limits on what a client may send
+MAX_BATCH = 100
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 30
+
+SAFETY_PATH = re.compile(r'^/restaurants/(?P<place_id>[A-Za-z0-9_-]+)/safety$')
+
+
+class HttpError(Exception):
+    """Error answered to the client with a status code and a JSON body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def safety_report(place, detector=None, now=None):
+    """
+    Scan a place's reviews and summarize them
+
+    Args:
+        place: Place record with reviews
+        detector: Detector to use (defaults to the built-in keyword list)
+        now: Reference epoch seconds (defaults to the current time)
+
+    Returns:
+        Dictionary with 'restaurant', 'kpis', 'timeline' and 'flagged_reviews'
+    """
+    detector = detector or DEFAULT_DETECTOR
+    now = time.time() if now is None else now
+    stats = MentionStats()
+    flagged = []
+
+    for review in place.reviews:
+        matches = detector.scan(review.text or '')
+        stats.add(review, flagged=bool(matches), now=now)
+        if matches:
+            flagged.append({
+                **review.to_dict(),
+                'matched_keywords': [m.keyword for m in matches],
+                'matched_categories': sorted({m.category for m in matches}),
+                'confidence': highest_confidence(matches),
+            })
+
+    return {
+        'restaurant': {key: value for key, value in place.to_dict().items() if key != 'reviews'},
+        'analyzed_reviews_count': stats.total_reviews,
+        'kpis': stats.kpis(now),
+        'timeline': stats.timeline(label=month_key),
+        'flagged_reviews': flagged,
+    }
+
+
+class SafetyService:
+    """
+    Async HTTP service answering food safety lookups with warm caches
+
+    One instance serves every connection; start it with serve_forever()
+    or start() (which returns the asyncio server).
+    """
+
+    def __init__(self, api_key, cache=None, store_path=None, detector=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Args:
+            api_key: Google Maps API key
+            cache: ResponseCache (defaults to the on-disk cache; pass False for none)
+            store_path: Review store to add stored mention counts from
+                        (defaults to REVIEW_STORE_PATH, used only if it exists)
+            detector: Detector to use (defaults to the built-in keyword list)
+            max_concurrency: Upstream fetches in flight at once
+        """
+        self.api_key = api_key
+        self.cache = ResponseCache() if cache is None else (cache or None)
+        self.detector = detector or DEFAULT_DETECTOR
+        self.max_concurrency = max_concurrency
+
+        if store_path is None:
+            store_path = os.getenv('REVIEW_STORE_PATH', DEFAULT_STORE_PATH)
+        self.store_path = store_path if store_path and os.path.exists(store_path) else None
+        self._store = None
+
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max_concurrency,
+                                              thread_name_prefix='places-fetch')
+        self._store_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='review-store')
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._flights = AsyncSingleFlight('service')
+        self.started_at = time.time()
+        self.counts = {'requests': 0, 'fetches': 0, 'errors': 0}
+
+        # The service always records metrics; /metrics exports them
+        metrics.enable()
+
+    # ----- lookups -----
+
+    def _fetch_place(self, place_id):
+        """Fetch and parse one place (runs in the fetch thread pool)"""
+        data = get_place_details(self.api_key, place_id, cache=self.cache, profile=FULL_REVIEWS)
+        return Place.from_places_api(data, profile_fields(FULL_REVIEWS))
+
+    def _stored_mentions(self, place_id):
+        """Read mention counts from the review store (runs on the store thread)"""
+        if self._store is None:
+            self._store = ReviewStore(self.store_path)
+
+        now = datetime.now(timezone.utc)
+        month_start = int(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp())
+        six_months_ago = int((now - timedelta(days=180)).timestamp())
+        return {
+            'mentions_last_6_months': self._store.count_mentions(place_id, since=six_months_ago),
+            'mentions_this_month': self._store.count_mentions(place_id, since=month_start),
+            'timeline': {month_key(month): count for month, count in
+                         self._store.monthly_mentions(place_id, month_bucket(six_months_ago)).items()},
+        }
+
+    async def _place(self, place_id):
+        """Fetch a place, sharing one upstream call between concurrent requests"""
+        async def fetch():
+            async with self._semaphore:
+                self.counts['fetches'] += 1
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._fetch_pool, self._fetch_place, place_id)
+
+        return await self._flights.do(place_id, fetch)
+
+    async def safety(self, place_id):
+        """
+        Build the safety report for one place
+
+        Raises:
+            HttpError: If the place could not be fetched
+        """
+        try:
+            place = await self._place(place_id)
+        except PlacesApiError as e:
+            status = e.status_code if e.status_code in (400, 404) else HTTPStatus.BAD_GATEWAY
+            raise HttpError(status, str(e))
+        except Exception as e:
+            raise HttpError(HTTPStatus.BAD_GATEWAY, f"Upstream error: {e}")
+
+        with metrics.timer('stage_seconds', stage='detect'):
+            report = safety_report(place, self.detector)
+
+        if self.store_path:
+            loop = asyncio.get_running_loop()
+            report['stored'] = await loop.run_in_executor(self._store_thread,
+                                                          self._stored_mentions, place_id)
+        return report
+
+    async def batch(self, body):
+        """
+        Build safety reports for several places at once
+
+        Args:
+            body: Parsed request body {"place_ids": [...]}
+
+        Returns:
+            {'results': [...]} in request order; failed places carry 'error'
+        """
+        place_ids = body.get('place_ids') if isinstance(body, dict) else None
+        if not isinstance(place_ids, list) or not all(isinstance(p, str) for p in place_ids):
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Body must be {"place_ids": ["...", ...]}')
+        if len(place_ids) > MAX_BATCH:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"At most {MAX_BATCH} place ids per batch")
+
+        async def one(place_id):
+            try:
+                return {'place_id': place_id, **await self.safety(place_id)}
+            except HttpError as e:
+                return {'place_id': place_id, 'error': str(e), 'status': int(e.status)}
+
+        return {'results': await asyncio.gather(*(one(place_id) for place_id in place_ids))}
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'inflight': self._flights.inflight(),
+            'coalesced': self._flights.shared,
+            **self.counts,
+        }
+
+    # ----- HTTP -----
+
+    async def route(self, method, path, body):
+        """
+        Dispatch one request
+
+        Returns:
+            Tuple of (status, content type, response bytes)
+        """
+        path = path.split('?', 1)[0]
+        match = SAFETY_PATH.match(path)
+
+        if match and method == 'GET':
+            result = await self.safety(match.group('place_id'))
+        elif path == '/batch' and method == 'POST':
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Body is not valid JSON')
+            result = await self.batch(payload)
+        elif path == '/health' and method == 'GET':
+            result = self.health()
+        elif path == '/metrics' and method == 'GET':
+            return HTTPStatus.OK, 'text/plain; version=0.0.4', metrics.METRICS.to_prometheus().encode()
+        elif match or path in ('/batch', '/health', '/metrics'):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        else:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+        return HTTPStatus.OK, 'application/json', json.dumps(result, ensure_ascii=False).encode()
+
+    async def _read_request(self, reader):
+        """
+        Read one HTTP/1.1 request
+
+        Returns:
+            Tuple of (method, path, headers, body), or None when the client closed
+        """
+        request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+        if not request_line:
+            return None
+        try:
+            method, path, _version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Malformed request line')
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'Too many headers')
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, 'Invalid Content-Length')
+        if length > MAX_BODY_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path, headers, body
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except HttpError as e:
+                    await self._respond(writer, e.status, 'application/json',
+                                        json.dumps({'error': str(e)}).encode(), keep_alive=False)
+                    return
+                if request is None:
+                    return
+
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.counts['requests'] += 1
+                start = time.perf_counter()
+                try:
+                    status, content_type, payload = await self.route(method, path, body)
+                except HttpError as e:
+                    self.counts['errors'] += 1
+                    status, content_type = e.status, 'application/json'
+                    payload = json.dumps({'error': str(e)}).encode()
+                except Exception as e:
+                    self.counts['errors'] += 1
+                    status, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, 'application/json'
+                    payload = json.dumps({'error': f"Internal error: {e}"}).encode()
+
+                route = 'safety' if SAFETY_PATH.match(path.split('?', 1)[0]) else path.split('?', 1)[0]
+                metrics.observe('service_request_seconds', time.perf_counter() - start,
+                                route=route, status=int(status))
+                await self._respond(writer, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, content_type, payload, keep_alive=True):
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def start(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Start listening; returns the asyncio server"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve_forever(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Listen and serve until cancelled"""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        """Shut down the worker threads and the review store"""
+        self._fetch_pool.shutdown(wait=False)
+        if self._store is not None:
+            self._store_thread.submit(self._store.close).result()
+        self._store_thread.shutdown(wait=False)
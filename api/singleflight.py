@@ -0,0 +1,143 @@
+"""
+Single-flight: collapse identical in-flight calls into one
+
+When several threads ask for the same thing at the same moment (the same
+restaurant's details, the same Apify scrape), only the first one calls the
+API. The others wait for that call and get the same result - or the same
+exception. Once the call finishes the key is forgotten, so the next
+request after that makes a fresh call (or hits the cache).
+
+Results are shared between every caller that waited, so treat them as
+read-only.
+
+Usage:
+    flights = SingleFlight()
+    data = flights.do(('placeDetails', place_id), lambda: fetch(place_id))
+
+AsyncSingleFlight does the same for coroutines on one event loop.
+"""
+
+import threading
+
+from utils import metrics
+
+
+class _Call:
+    """One in-flight call and the callers waiting for it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group
+
+    Args:
+        name: Label for the metrics this group records
+    """
+
+    def __init__(self, name='default'):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0        # calls actually made
+        self.shared = 0       # callers that reused another caller's call
+
+    def do(self, key, func):
+        """
+        Run func() unless an identical call is already running
+
+        Args:
+            key: Hashable identity of the call (same key = same request)
+            func: Function with no arguments making the call
+
+        Returns:
+            func()'s result, possibly from another thread's call
+
+        Raises:
+            Whatever func() raised, in every caller that waited for it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.calls += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.shared += 1
+
+        if not leader:
+            metrics.count('singleflight_shared_total', group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def inflight(self):
+        """Return the number of calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for coroutines running on one event loop
+
+    Args:
+        name: Label for the metrics this group records
+    """
+
+    def __init__(self, name='default'):
+        self.name = name
+        self._tasks = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, func):
+        """
+        Await func() unless an identical call is already running
+
+        A caller that is cancelled (e.g. its client disconnected) stops
+        waiting, but the shared call keeps running for the others.
+
+        Args:
+            key: Hashable identity of the call
+            func: Function with no arguments returning a coroutine
+
+        Returns:
+            The coroutine's result, possibly from another caller's call
+        """
+        import asyncio     # only the async group needs it; it is slow to import
+
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+            metrics.count('singleflight_shared_total', group=self.name)
+        return await asyncio.shield(task)
+
+    def inflight(self):
+        """Return the number of calls currently running"""
+        return len(self._tasks)
@@ -0,0 +1,468 @@
+"""
+Local stand-in for the Places API and Apify
+
+A small HTTP server that answers the same endpoints this project calls:
+
+    POST /v1/places:searchText              Text Search (New)
+    GET  /v1/places/{id}                    Place Details (New)
+    POST /v2/acts/{actor}/runs              start an Apify actor run
+    GET  /v2/actor-runs/{id}                Apify run status
+    GET  /v2/datasets/{id}/items            Apify dataset items
+
+Point the clients at it with PLACES_API_URL and APIFY_API_URL (see
+.env.example) and every script runs without network access or API costs.
+
+Each request is answered, in order of preference, by:
+1. replay   - a fixture recorded from the real API (see record mode below)
+2. synthetic - generated places, reviews and actor runs, the same for the
+               same request every time
+
+In record mode the server forwards every request to the real API instead
+and saves the response as a fixture, so a real session can be replayed
+later. Latency, server errors and 429 rate limiting can be injected to
+exercise the retry and backoff code.
+
+Usage:
+    server = StandInServer(fixtures_dir='.cache/fixtures', latency=0.05, error_rate=0.05)
+    server.start()
+    os.environ['PLACES_API_URL'] = server.places_url
+    ...
+    server.stop()
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from utils.url_parser import parse_maps_url
+
+# Real endpoints the record mode forwards to
+PLACES_UPSTREAM = "https://places.googleapis.com"
+APIFY_UPSTREAM = "https://api.apify.com"
+
+DEFAULT_FIXTURES_DIR = os.path.join('.cache', 'fixtures')
+
+# Synthetic data sizes
+SYNTHETIC_PLACES_PER_QUERY = 60     # 3 pages of 20, like the real Text Search limit
+SYNTHETIC_REVIEWS_PER_PLACE = 5     # Place Details returns at most 5 reviews
+SYNTHETIC_APIFY_REVIEWS = 50        # reviews per restaurant in an actor run
+SYNTHETIC_RUN_SECONDS = 2.0         # how long a synthetic actor run "scrapes"
+FLAGGED_SHARE = 0.1                 # share of synthetic reviews with a mention
+
+# Query parameters that identify the caller rather than the request
+_IGNORED_PARAMS = {'token', 'key'}
+
+# Error names per status, as each API reports them (the Apify client reads
+# 'type', e.g. to turn record-not-found into None)
+_APIFY_ERROR_TYPES = {404: 'record-not-found', 429: 'rate-limit-exceeded'}
+_PLACES_ERROR_STATUSES = {404: 'NOT_FOUND', 429: 'RESOURCE_EXHAUSTED', 503: 'UNAVAILABLE'}
+
+_PLAIN_REVIEWS = [
+    "Great food and friendly staff, will come back.",
+    "Lovely view of the rice fields, the nasi goreng was excellent.",
+    "A bit pricey but the cocktails were worth it.",
+    "Service was slow tonight but the food made up for it.",
+    "Best smoothie bowl in Canggu!",
+]
+
+# One readable phrase per keyword category for flagged synthetic reviews
+_FLAGGED_PHRASES = {
+    'direct_mention': "I got food poisoning after eating here.",
+    'getting_sick': "My partner got sick the same night.",
+    'stomach': "Had a terrible stomach ache afterwards.",
+    'nausea': "Felt nauseous all evening after dinner.",
+    'vomiting': "I was vomiting all night.",
+    'diarrhea': "Classic Bali belly the next day.",
+    'severity': "Ended up in hospital on a drip.",
+    'hygiene': "Saw a cockroach in the kitchen.",
+}
+
+
+def error_body(path, status, message):
+    """Error response body shaped like the real API's for this path"""
+    if path.startswith('/v2/'):
+        return {'error': {'type': _APIFY_ERROR_TYPES.get(status, 'internal-server-error'),
+                          'message': message}}
+    return {'error': {'code': status, 'message': message,
+                      'status': _PLACES_ERROR_STATUSES.get(status, 'INTERNAL')}}
+
+
+def fixture_key(method, path, query, body):
+    """
+    Identify a request independently of API keys and JSON formatting
+
+    Args:
+        method: HTTP method
+        path: URL path
+        query: Query string
+        body: Request body bytes (may be empty)
+
+    Returns:
+        Hex digest used as the fixture file name
+    """
+    params = sorted((k, v) for k, v in parse_qsl(query) if k not in _IGNORED_PARAMS)
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True) if body else ''
+    except ValueError:
+        body = body.decode('utf-8', 'replace')
+    text = '\n'.join([method, path, urlencode(params), body])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class FixtureStore:
+    """Recorded responses, one JSON file per request"""
+
+    def __init__(self, directory=DEFAULT_FIXTURES_DIR):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key):
+        """Return the recorded response for a request key (or None)"""
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, request, status, headers, body):
+        """Record one response"""
+        os.makedirs(self.directory, exist_ok=True)
+        fixture = {'request': request, 'status': status, 'headers': headers, 'body': body}
+        temporary = self._path(key) + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, ensure_ascii=False)
+        os.replace(temporary, self._path(key))
+
+
+class SyntheticApi:
+    """
+    Generated responses for requests that have no fixture
+
+    Everything is derived from a hash of the request, so the same request
+    always gets the same places and reviews.
+    """
+
+    def __init__(self, run_seconds=SYNTHETIC_RUN_SECONDS, apify_reviews=SYNTHETIC_APIFY_REVIEWS):
+        self.run_seconds = run_seconds
+        self.apify_reviews = apify_reviews
+        self.runs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rng(*parts):
+        seed = hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        return random.Random(int(seed[:16], 16))
+
+    def _review_text(self, rng):
+        if rng.random() < FLAGGED_SHARE:
+            return rng.choice(_PLAIN_REVIEWS) + ' ' + rng.choice(list(_FLAGGED_PHRASES.values()))
+        return rng.choice(_PLAIN_REVIEWS)
+
+    def _place(self, place_id):
+        rng = self._rng('place', place_id)
+        return {
+            'id': place_id,
+            'displayName': {'text': f"Warung {place_id[-6:]}", 'languageCode': 'en'},
+            'formattedAddress': f"Jl. Raya {rng.randint(1, 200)}, Bali, Indonesia",
+            'rating': round(rng.uniform(3.5, 5.0), 1),
+            'userRatingCount': rng.randint(10, 5000),
+            'location': {'latitude': rng.uniform(-8.85, -8.06), 'longitude': rng.uniform(114.43, 115.71)},
+        }
+
+    def search_text(self, body, field_mask):
+        """Text Search (New): pages of 20 places, with nextPageToken"""
+        query = body.get('textQuery', '')
+        area = json.dumps(body.get('locationBias'), sort_keys=True)
+        page = int(body.get('pageToken') or 0)
+        page_size = int(body.get('pageSize') or 20)
+        start = page * page_size
+        count = max(0, min(page_size, SYNTHETIC_PLACES_PER_QUERY - start))
+
+        base = hashlib.sha256(f"{query}|{area}".encode('utf-8')).hexdigest()[:12]
+        places = [self._place(f"ChIJ{base}{i:06d}") for i in range(start, start + count)]
+        response = {'places': places}
+        if start + count < SYNTHETIC_PLACES_PER_QUERY and 'nextPageToken' in field_mask:
+            response['nextPageToken'] = str(page + 1)
+        return response
+
+    def place_details(self, place_id, field_mask):
+        """Place Details (New): the place plus up to 5 reviews"""
+        place = self._place(place_id)
+        if 'reviews' in field_mask:
+            rng = self._rng('reviews', place_id)
+            place['reviews'] = [{
+                'name': f"places/{place_id}/reviews/{i}",
+                'rating': rng.randint(1, 5),
+                'text': {'text': self._review_text(rng), 'languageCode': 'en'},
+                'publishTime': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                             time.gmtime(time.time() - rng.randint(0, 180) * 86400)),
+                'relativePublishTimeDescription': 'a month ago',
+                'authorAttribution': {'displayName': f"Reviewer {rng.randint(1, 9999)}"},
+            } for i in range(SYNTHETIC_REVIEWS_PER_PLACE)]
+        return place
+
+    @staticmethod
+    def _place_id_for_url(url):
+        """The place a start URL points at: its place id, else one derived from its CID or the URL"""
+        parsed = parse_maps_url(url)
+        if parsed.place_id:
+            return parsed.place_id
+        # A ?cid= URL and the place_id URL canonicalization later turns it
+        # into must give the same place
+        source = f"cid:{parsed.cid}" if parsed.cid else url
+        return 'ChIJ' + hashlib.sha256(source.encode('utf-8')).hexdigest()[:18]
+
+    def start_run(self, run_input):
+        """Start a synthetic actor run that finishes after run_seconds"""
+        with self._lock:
+            run_id = f"run{len(self.runs) + 1:06d}"
+            items = []
+            for start in run_input.get('startUrls', []):
+                place_id = self._place_id_for_url(start['url'])
+                place = self._place(place_id)
+                rng = self._rng('apify', start['url'])
+                limit = min(self.apify_reviews, run_input.get('maxReviews') or self.apify_reviews)
+                for i in range(limit):
+                    items.append({
+                        'placeId': place_id,
+                        'title': place['displayName']['text'],
+                        'address': place['formattedAddress'],
+                        'totalScore': place['rating'],
+                        'reviewsCount': place['userRatingCount'],
+                        'url': start['url'],
+                        'reviewId': f"{place_id}-{i}",
+                        'name': f"Reviewer {rng.randint(1, 9999)}",
+                        'stars': rng.randint(1, 5),
+                        'text': self._review_text(rng),
+                        'publishedAtDate': time.strftime('%Y-%m-%dT%H:%M:%S.000Z',
+                                                         time.gmtime(time.time() - i * 86400)),
+                    })
+            self.runs[run_id] = {'started': time.monotonic(), 'items': items}
+            return self.run_status(run_id)
+
+    def run_status(self, run_id):
+        """Run object, SUCCEEDED once run_seconds have passed"""
+        run = self.runs.get(run_id)
+        if run is None:
+            return None
+        finished = time.monotonic() - run['started'] >= self.run_seconds
+        return {
+            'id': run_id,
+            'status': 'SUCCEEDED' if finished else 'RUNNING',
+            'defaultDatasetId': run_id,
+        }
+
+    def dataset_items(self, dataset_id, offset, limit):
+        """Items visible so far: they appear gradually while the run is going"""
+        run = self.runs.get(dataset_id)
+        if run is None:
+            return None
+        progress = min(1.0, (time.monotonic() - run['started']) / self.run_seconds) if self.run_seconds else 1.0
+        visible = run['items'][:int(len(run['items']) * progress)]
+        return visible[offset:offset + limit]
+
+
+class StandInServer:
+    """
+    Threaded local server for the Places API and Apify endpoints
+
+    Args:
+        port: Port to listen on (0 = any free port)
+        fixtures_dir: Directory of recorded fixtures (None = synthetic only)
+        record: Forward requests to the real APIs and save the responses
+        latency: Mean added delay per request, in seconds
+        error_rate: Share of requests answered with a 503
+        rate_limit_rate: Share of requests answered with a 429 + Retry-After
+        seed: Random seed for the injected faults
+    """
+
+    def __init__(self, port=0, fixtures_dir=None, record=False, latency=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=None, run_seconds=SYNTHETIC_RUN_SECONDS,
+                 apify_reviews=SYNTHETIC_APIFY_REVIEWS):
+        self.fixtures = FixtureStore(fixtures_dir) if fixtures_dir else None
+        self.record = record
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.synthetic = SyntheticApi(run_seconds=run_seconds, apify_reviews=apify_reviews)
+        self.counts = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        if record and not self.fixtures:
+            raise ValueError("Record mode needs a fixtures directory")
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    @property
+    def places_url(self):
+        """Value for PLACES_API_URL"""
+        return self.url + "/v1"
+
+    @property
+    def apify_url(self):
+        """Value for APIFY_API_URL"""
+        return self.url
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the current thread (until interrupted)"""
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _fault(self):
+        """Pick an injected fault for one request: None, 429 or 503"""
+        with self._lock:
+            roll = self._random.random()
+            delay = self._random.expovariate(1 / self.latency) if self.latency else 0.0
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503
+        return None
+
+    def _forward(self, method, path, query, headers, body):
+        """Send a request to the real API (record mode)"""
+        import requests     # only record mode needs it
+
+        upstream = APIFY_UPSTREAM if path.startswith('/v2/') else PLACES_UPSTREAM
+        url = upstream + path + ('?' + query if query else '')
+        forwarded = {k: v for k, v in headers.items()
+                     if k.lower() in ('content-type', 'x-goog-api-key', 'x-goog-fieldmask', 'authorization')}
+        response = requests.request(method, url, headers=forwarded, data=body or None, timeout=60)
+        kept = {k: v for k, v in response.headers.items()
+                if k.lower().startswith('x-apify-pagination') or k.lower() == 'retry-after'}
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.text
+        return response.status_code, kept, payload
+
+    def _synthesize(self, method, path, query, headers, body):
+        """Answer from the synthetic API; returns (status, headers, body)"""
+        field_mask = headers.get('X-Goog-FieldMask', '*')
+        params = dict(parse_qsl(query))
+
+        if method == 'POST' and path.endswith('/places:searchText'):
+            return 200, {}, self.synthetic.search_text(json.loads(body or b'{}'), field_mask)
+        if method == 'GET' and path.startswith('/v1/places/'):
+            return 200, {}, self.synthetic.place_details(path.rsplit('/', 1)[-1], field_mask)
+        if method == 'POST' and path.startswith('/v2/acts/') and path.endswith('/runs'):
+            return 201, {}, {'data': self.synthetic.start_run(json.loads(body or b'{}'))}
+        if method == 'GET' and path.startswith('/v2/actor-runs/'):
+            run = self.synthetic.run_status(path.rsplit('/', 1)[-1])
+            if run is not None:
+                return 200, {}, {'data': run}
+        if method == 'GET' and path.startswith('/v2/datasets/') and path.endswith('/items'):
+            offset = int(params.get('offset', 0))
+            limit = int(params.get('limit', 1000))
+            items = self.synthetic.dataset_items(path.split('/')[3], offset, limit)
+            if items is not None:
+                return 200, {
+                    'X-Apify-Pagination-Total': str(offset + len(items)),
+                    'X-Apify-Pagination-Offset': str(offset),
+                    'X-Apify-Pagination-Count': str(len(items)),
+                    'X-Apify-Pagination-Limit': str(limit),
+                    'X-Apify-Pagination-Desc': '',
+                }, items
+
+        return 404, {}, error_body(path, 404, f"Stand-in has no answer for {method} {path}")
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Answer one request
+
+        Returns:
+            Tuple of (status, headers, JSON-serializable body, source) where
+            source is 'fault', 'record', 'replay' or 'synthetic'
+        """
+        fault = self._fault()
+        if fault == 429:
+            return 429, {'Retry-After': '1'}, error_body(path, 429, "Injected rate limit"), 'fault'
+        if fault == 503:
+            return 503, {}, error_body(path, 503, "Injected server error"), 'fault'
+
+        key = fixture_key(method, path, query, body)
+        if self.record:
+            status, kept, payload = self._forward(method, path, query, headers, body)
+            request = {'method': method, 'path': path, 'query': query}
+            self.fixtures.save(key, request, status, kept, payload)
+            return status, kept, payload, 'record'
+
+        if self.fixtures:
+            fixture = self.fixtures.load(key)
+            if fixture is not None:
+                return fixture['status'], fixture['headers'], fixture['body'], 'replay'
+
+        status, kept, payload = self._synthesize(method, path, query, headers, body)
+        return status, kept, payload, 'synthetic'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'   # keep-alive, like the real APIs
+            # Headers and body go out in separate writes; with Nagle's
+            # algorithm on, the body waits ~40ms for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)     # the Apify client gzips run inputs
+
+                try:
+                    status, headers, payload, source = server.handle(
+                        self.command, parts.path, parts.query, self.headers, body)
+                except Exception as e:
+                    status, headers, payload, source = 500, {}, error_body(parts.path, 500, str(e)), 'error'
+                server._count(source)
+
+                data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+                data = data.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_POST = _serve
+
+        return Handler
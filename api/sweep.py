@@ -0,0 +1,307 @@
+"""
+Area sweep: build a restaurant catalogue for all of Bali
+
+A single Text Search over one 50km circle only returns the first 20 places
+(60 with pagination), so a full catalogue needs many smaller searches:
+- Bali is tiled into a grid of small circles, or into named areas
+  (Canggu, Seminyak, Ubud...)
+- every tile follows nextPageToken through all of its result pages
+- tiles overlap, so places are de-duplicated by their 'id'
+- tiles run concurrently, under the same token-bucket rate limit as the
+  batch lookups (api/batch.py); pages answered from the response cache
+  do not take a token
+- finished tiles are recorded in a checkpoint file, so an interrupted sweep
+  resumes where it stopped instead of paying for every tile again
+
+Usage:
+    sweep = AreaSweep(api_key, query="restaurants")
+    async for tile, places in sweep.run(grid_tiles()):
+        print(tile.name, len(places))
+"""
+
+import functools
+import json
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from api.google_maps_client import search_places_page
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0         # API requests per second
+DEFAULT_SPACING_KM = 5.0    # distance between grid tile centres
+
+# Text Search (New) limits: 20 places per page, 3 pages per query
+PAGE_SIZE = 20
+MAX_PAGES = 3
+
+# Bounding box of Bali's main island plus the Nusa islands
+BALI_BOUNDS = {
+    'south': -8.85,
+    'west': 114.43,
+    'north': -8.06,
+    'east': 115.71,
+}
+
+KM_PER_DEGREE_LATITUDE = 111.32
+
+# One search circle
+Tile = namedtuple('Tile', ['name', 'latitude', 'longitude', 'radius'])
+
+# Named areas: (latitude, longitude, radius in metres)
+BALI_AREAS = {
+    'Canggu': (-8.6478, 115.1385, 3000),
+    'Seminyak': (-8.6913, 115.1682, 2500),
+    'Kuta': (-8.7180, 115.1686, 2500),
+    'Legian': (-8.7043, 115.1700, 1500),
+    'Jimbaran': (-8.7904, 115.1606, 3000),
+    'Uluwatu': (-8.8291, 115.0849, 5000),
+    'Nusa Dua': (-8.8009, 115.2305, 3000),
+    'Sanur': (-8.6883, 115.2617, 3000),
+    'Denpasar': (-8.6500, 115.2167, 5000),
+    'Ubud': (-8.5069, 115.2625, 4000),
+    'Tabanan': (-8.5417, 115.1250, 6000),
+    'Kintamani': (-8.2486, 115.3292, 8000),
+    'Amed': (-8.3480, 115.6600, 5000),
+    'Candidasa': (-8.5090, 115.5680, 4000),
+    'Sidemen': (-8.4780, 115.4440, 4000),
+    'Lovina': (-8.1580, 115.0270, 5000),
+    'Munduk': (-8.2660, 115.0770, 5000),
+    'Pemuteran': (-8.1470, 114.6530, 5000),
+    'Nusa Lembongan': (-8.6800, 115.4500, 4000),
+    'Nusa Penida': (-8.7300, 115.5400, 8000),
+}
+
+
+def area_tiles(names=None):
+    """
+    Return tiles for named areas
+
+    Args:
+        names: Area names from BALI_AREAS (None = all of them)
+
+    Returns:
+        List of Tile
+
+    Raises:
+        ValueError: If a name is not in BALI_AREAS
+    """
+    lookup = {name.lower(): name for name in BALI_AREAS}
+    tiles = []
+    for name in names or BALI_AREAS:
+        key = lookup.get(name.strip().lower())
+        if key is None:
+            raise ValueError(f"Unknown area: {name} (choose from {', '.join(BALI_AREAS)})")
+        latitude, longitude, radius = BALI_AREAS[key]
+        tiles.append(Tile(key, latitude, longitude, float(radius)))
+    return tiles
+
+
+def grid_tiles(bounds=None, spacing_km=DEFAULT_SPACING_KM):
+    """
+    Cover a bounding box with a square grid of overlapping circles
+
+    Each circle's radius reaches the corners of its grid cell, so the
+    circles leave no gaps between them.
+
+    Args:
+        bounds: Dictionary with 'south', 'west', 'north', 'east' (defaults to Bali)
+        spacing_km: Distance between neighbouring tile centres
+
+    Returns:
+        List of Tile, named by their centre ("-8.675,115.213")
+    """
+    bounds = bounds or BALI_BOUNDS
+    lat_step = spacing_km / KM_PER_DEGREE_LATITUDE
+    middle = math.radians((bounds['south'] + bounds['north']) / 2)
+    lng_step = spacing_km / (KM_PER_DEGREE_LATITUDE * math.cos(middle))
+    radius = spacing_km * 1000 / math.sqrt(2)
+
+    rows = max(1, math.ceil((bounds['north'] - bounds['south']) / lat_step))
+    columns = max(1, math.ceil((bounds['east'] - bounds['west']) / lng_step))
+
+    tiles = []
+    for row in range(rows):
+        latitude = bounds['south'] + (row + 0.5) * lat_step
+        for column in range(columns):
+            longitude = bounds['west'] + (column + 0.5) * lng_step
+            tiles.append(Tile(f"{latitude:.3f},{longitude:.3f}", latitude, longitude, radius))
+    return tiles
+
+
+def location_bias(tile):
+    """Build the Text Search locationBias circle for a tile"""
+    return {
+        "circle": {
+            "center": {"latitude": tile.latitude, "longitude": tile.longitude},
+            "radius": tile.radius
+        }
+    }
+
+
+class SweepCheckpoint:
+    """
+    Remembers which tiles of a sweep are finished
+
+    Saved as a small JSON file after every tile. The file is replaced
+    atomically, so an interrupted sweep never leaves it half-written.
+    """
+
+    def __init__(self, path, query):
+        self.path = path
+        self.query = query
+        self.done = set()
+
+    def load(self):
+        """
+        Read finished tiles from disk
+
+        A checkpoint written for a different query is ignored.
+
+        Returns:
+            Number of finished tiles
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('query') == self.query:
+            self.done = set(data.get('done_tiles', []))
+        return len(self.done)
+
+    def mark_done(self, tile):
+        """Record a finished tile and save the checkpoint"""
+        self.done.add(tile.name)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'query': self.query, 'done_tiles': sorted(self.done)}, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        """Delete the checkpoint (e.g. once the sweep has finished)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class AreaSweep:
+    """
+    Run paginated text searches over many tiles concurrently
+
+    Usage:
+        sweep = AreaSweep(api_key, query="restaurants", concurrency=8, rate=10)
+        async for tile, places in sweep.run(tiles, checkpoint=checkpoint):
+            ...
+    """
+
+    def __init__(self, api_key, query="restaurants", included_type="restaurant",
+                 concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, max_pages=MAX_PAGES,
+                 cache=None, offline=False, seen=None):
+        """
+        Args:
+            api_key: Google Maps API key
+            query: Text Search query for every tile
+            included_type: Only return places of this type (None = any type)
+            concurrency: Maximum API requests in flight at once
+            rate: Maximum API requests per second
+            max_pages: Result pages to follow per tile (1-3)
+            cache: Optional ResponseCache
+            offline: Only use cached responses
+            seen: Place ids already collected (e.g. from an earlier run)
+        """
+        self.api_key = api_key
+        self.query = query
+        self.included_type = included_type
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.cache = cache
+        self.offline = offline
+        self.seen = set(seen or ())
+        # Imported here, so scripts can list tiles and show the defaults
+        # above without loading requests and asyncio
+        from api.http_client import HttpClient
+        from api.rate_limit import TokenBucket
+        self.limiter = TokenBucket(rate)
+        self.client = HttpClient(pool_size=concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='sweep')
+        self._limited = None
+        self._loop = None
+
+    @property
+    def requests(self):
+        """API requests actually sent (cached pages are not counted)"""
+        return self._limited.requests if self._limited is not None else 0
+
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking API call in the worker pool (requests it sends are rate-limited)"""
+        return await self._loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def sweep_tile(self, tile):
+        """
+        Search one tile, following every result page
+
+        Args:
+            tile: Tile to search
+
+        Returns:
+            Tuple of (tile, list of places not seen in any earlier tile)
+        """
+        found = []
+        page_token = None
+        for _ in range(self.max_pages):
+            data = await self._call(
+                search_places_page, self.api_key, self.query,
+                location_bias=location_bias(tile), page_token=page_token,
+                page_size=PAGE_SIZE, included_type=self.included_type,
+                cache=self.cache, offline=self.offline, client=self._limited
+            )
+            found.extend(data.get('places', []))
+            page_token = data.get('nextPageToken')
+            if not page_token:
+                break
+
+        # The event loop is single-threaded, so checking and adding to
+        # the shared set here cannot race with another tile
+        new_places = []
+        for place in found:
+            if place.get('id') and place['id'] not in self.seen:
+                self.seen.add(place['id'])
+                new_places.append(place)
+        return tile, new_places
+
+    async def run(self, tiles, checkpoint=None):
+        """
+        Sweep every tile, yielding each one's new places as it finishes
+
+        Tiles already marked done in the checkpoint are skipped. A tile is
+        only marked done after the caller has processed its places, so a
+        sweep interrupted mid-tile repeats that tile on resume.
+
+        Args:
+            tiles: Iterable of Tile
+            checkpoint: Optional SweepCheckpoint
+
+        Yields:
+            (tile, new places) tuples, in completion order
+
+        Raises:
+            PlacesApiError: If a search fails (finished tiles stay checkpointed)
+        """
+        import asyncio
+        from api.rate_limit import LimitedClient
+
+        self._loop = asyncio.get_running_loop()
+        self._limited = LimitedClient(self.client, self.limiter, asyncio.Semaphore(self.concurrency),
+                                      self._loop)
+        pending = [tile for tile in tiles if checkpoint is None or tile.name not in checkpoint.done]
+        tasks = [asyncio.ensure_future(self.sweep_tile(tile)) for tile in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                tile, places = await next_done
+                yield tile, places
+                if checkpoint is not None:
+                    checkpoint.mark_done(tile)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,190 @@
+"""
+Short-link resolution and canonical restaurant keys
+
+Turns whatever link a user pasted into one canonical Google Maps URL
+(see utils.url_parser.canonical_url):
+
+- maps.app.goo.gl / goo.gl short links are followed ONCE and the result is
+  kept in the response cache (api/cache.py) for a long time - a short link
+  always points at the same place
+- many links are resolved concurrently over the pooled HTTP client, and
+  the same link requested twice at once is fetched once (single-flight)
+- CIDs learned to belong to a place id (e.g. from a scrape, whose items
+  carry both) are remembered, so a ?cid= link and a place_id link for the
+  same restaurant end up with the same key
+
+Usage:
+    resolver = UrlResolver(cache=ResponseCache())
+    canonical = resolver.canonicalize("https://maps.app.goo.gl/KXuHZ6dNENB9R3sr8")
+    canonical.url       # "https://www.google.com/maps/place/?q=place_id:ChIJ..."
+"""
+
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from api.cache import make_key
+from api.singleflight import SingleFlight
+from utils.url_parser import (
+    CID_URL, PLACE_ID_URL, canonical_url, is_short_link, parse_maps_url, resolve_short_link
+)
+
+# A short link never changes target; keep resolutions (and learned CID ->
+# place id aliases) for months
+SHORT_LINK_TTL = 90 * 24 * 60 * 60
+ALIAS_TTL = 365 * 24 * 60 * 60
+
+DEFAULT_CONCURRENCY = 8
+
+# Result of canonicalize(): the canonical URL plus the parts it was built from.
+# 'aliases' lists the other URL forms seen for it (input, resolved link, CID form)
+CanonicalUrl = namedtuple('CanonicalUrl', ['url', 'place_id', 'cid', 'name', 'latitude',
+                                           'longitude', 'aliases'])
+
+
+class UrlResolver:
+    """
+    Resolves short links and maps Google Maps URLs to canonical URLs
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, cache=None, client=None, concurrency=DEFAULT_CONCURRENCY, offline=False):
+        """
+        Args:
+            cache: Optional ResponseCache for resolutions and aliases
+            client: HttpClient to follow redirects with (defaults to the shared client)
+            concurrency: Short links followed at once by resolve_many()
+            offline: Never follow a link; unknown short links stay unresolved
+        """
+        self.cache = cache
+        self.client = client
+        self.concurrency = concurrency
+        self.offline = offline
+        self._resolved = {}         # short link -> full URL (this process)
+        self._aliases = {}          # cid -> place id (this process)
+        self._flights = SingleFlight('shortlink')
+
+    def resolve(self, url):
+        """
+        Follow a short link (once; later calls hit the cache)
+
+        Args:
+            url: Any Google Maps URL
+
+        Returns:
+            The full URL for a short link, the input for anything else
+            (and for short links that cannot be resolved offline or fail to
+            resolve)
+        """
+        url = url.strip()
+        if not is_short_link(url):
+            return url
+
+        resolved = self._resolved.get(url)
+        if resolved:
+            return resolved
+
+        key = make_key('shortlink', url)
+        if self.cache is not None:
+            resolved = self.cache.get_or_fetch(key, lambda: self._follow(url), ttl=SHORT_LINK_TTL,
+                                               offline=self.offline)
+        elif not self.offline:
+            resolved = self._follow(url)
+
+        if not resolved:
+            return url
+        self._resolved[url] = resolved
+        return resolved
+
+    def _follow(self, url):
+        # Following a link loads requests anyway, so importing it here is free
+        import requests
+
+        try:
+            return self._flights.do(url, lambda: resolve_short_link(url, client=self.client))
+        except requests.RequestException as e:
+            # Not cached, so the next run tries again; the scraper can still
+            # follow the short link itself
+            print(f"⚠️  Could not resolve {url} ({type(e).__name__}); using it as is",
+                  file=sys.stderr)
+            return None
+
+    def resolve_many(self, urls):
+        """
+        Resolve many links concurrently
+
+        Args:
+            urls: Iterable of Google Maps URLs
+
+        Returns:
+            Dictionary of input URL -> resolved URL (duplicates resolved once)
+        """
+        unique = list(dict.fromkeys(url.strip() for url in urls))
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='shortlink') as pool:
+            return dict(zip(unique, pool.map(self.resolve, unique)))
+
+    def learn(self, cid, place_id):
+        """
+        Remember that a CID belongs to a place id
+
+        Args:
+            cid: Google Maps CID (decimal string)
+            place_id: Places API place id
+        """
+        if not cid or not place_id:
+            return
+        cid = str(cid)
+        self._aliases[cid] = place_id
+        if self.cache is not None:
+            self.cache.set(make_key('cid', cid), place_id, ttl=ALIAS_TTL)
+
+    def place_id_for_cid(self, cid):
+        """Return the place id learned for a CID (or None)"""
+        if not cid:
+            return None
+        place_id = self._aliases.get(cid)
+        if place_id is None and self.cache is not None:
+            place_id, _ = self.cache.get(make_key('cid', cid))
+            if place_id:
+                self._aliases[cid] = place_id
+        return place_id
+
+    def canonicalize(self, url, resolved=None):
+        """
+        Map a link to its canonical URL
+
+        Args:
+            url: Any Google Maps URL
+            resolved: The already-resolved URL (skips resolve())
+
+        Returns:
+            CanonicalUrl
+        """
+        url = url.strip()
+        resolved = resolved or self.resolve(url)
+        parsed = parse_maps_url(resolved)
+        place_id = parsed.place_id or self.place_id_for_cid(parsed.cid)
+
+        canonical = PLACE_ID_URL.format(place_id=place_id) if place_id else canonical_url(resolved)
+        aliases = [form for form in dict.fromkeys((
+            url, resolved, canonical_url(resolved),
+            CID_URL.format(cid=parsed.cid) if parsed.cid else None,
+        )) if form and form != canonical]
+
+        return CanonicalUrl(canonical, place_id, parsed.cid, parsed.name,
+                            parsed.latitude, parsed.longitude, aliases)
+
+    def canonicalize_many(self, urls):
+        """
+        Canonicalize many links, resolving short links concurrently
+
+        Args:
+            urls: Iterable of Google Maps URLs
+
+        Returns:
+            List of CanonicalUrl, one per input (in input order)
+        """
+        urls = [url.strip() for url in urls]
+        resolved = self.resolve_many(urls)
+        return [self.canonicalize(url, resolved[url]) for url in urls]
@@ -0,0 +1,127 @@
+"""
+Look up many restaurants at once and stream the results as NDJSON
+Usage: python batch_lookup.py restaurants.txt > results.ndjson
+
+The input file has one restaurant name or Google Maps URL per line.
+Each output line is one JSON object, written as soon as that restaurant
+finishes (so the order may differ from the input file).
+Progress messages go to stderr so stdout stays valid NDJSON.
+"""
+
+import json
+import os
+import sys
+import time
+import argparse
+
+from api.batch import BatchLookup, read_lookup_file, DEFAULT_CONCURRENCY, DEFAULT_RATE
+from api.cache import ResponseCache
+from api.field_masks import PROFILES, FULL_REVIEWS
+from utils import metrics
+
+
+def log(message):
+    """Print a progress message to stderr"""
+    print(message, file=sys.stderr, flush=True)
+
+
+async def run_batch(args, api_key, lookups, output):
+    """Run the batch and write each result as one NDJSON line"""
+    cache = None if args.no_cache else ResponseCache()
+    batch = BatchLookup(api_key, concurrency=args.concurrency, rate=args.rate,
+                        cache=cache, offline=args.offline, profile=args.fields)
+
+    counts = {}
+    async for result in batch.run(lookups):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        done = sum(counts.values())
+        if result['status'] != 'ok':
+            log(f"⚠️  [{done}/{len(lookups)}] {result['input']}: {result.get('error', result['status'])}")
+        elif done % 25 == 0:
+            log(f"✓ [{done}/{len(lookups)}] done")
+
+    return counts, batch.client
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Look up many restaurants concurrently and stream results as NDJSON',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python batch_lookup.py restaurants.txt > results.ndjson
+  python batch_lookup.py restaurants.txt --output results.ndjson --concurrency 50
+  python batch_lookup.py restaurants.txt --offline
+  python batch_lookup.py restaurants.txt --fields rating-refresh
+  python batch_lookup.py restaurants.txt --offline --profile batch-profile.json
+        """
+    )
+
+    parser.add_argument('input_file', help='File with one restaurant name or Google Maps URL per line')
+    parser.add_argument('--output', '-o', help='Write NDJSON here instead of stdout')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Maximum lookups in flight at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Maximum API requests per second (default: {DEFAULT_RATE})')
+
+    parser.add_argument('--fields', choices=list(PROFILES), default=FULL_REVIEWS,
+                        help=f'Place fields to fetch; rating-refresh skips reviews and is much '
+                             f'smaller and cheaper (default: {FULL_REVIEWS})')
+
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument('--no-cache', action='store_true',
+                            help='Always call the API instead of reusing cached responses')
+    cache_mode.add_argument('--offline', action='store_true',
+                            help='Only use cached responses, never call the API')
+
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Time every stage and print a profile to stderr; optionally save it '
+                             '(.json for JSON, anything else for Prometheus text)')
+
+    args = parser.parse_args()
+
+    # Imported after parsing so --help stays fast
+    import asyncio
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    if args.profile:
+        metrics.enable()
+
+    api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+    if not api_key and not args.offline:
+        log("❌ ERROR: GOOGLE_MAPS_API_KEY not found in .env file")
+        sys.exit(1)
+
+    lookups = read_lookup_file(args.input_file)
+    if not lookups:
+        log("❌ No restaurants found in the input file")
+        sys.exit(1)
+
+    log(f"\n🍴 Looking up {len(lookups)} restaurant(s) "
+        f"({args.concurrency} at a time, max {args.rate:g} requests/s)")
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        counts, client = asyncio.run(run_batch(args, api_key, lookups, output))
+    finally:
+        if args.output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    log(f"\n✅ Done in {elapsed:.1f}s: {summary}")
+    client.print_latency_report(file=sys.stderr)
+
+    if args.profile:
+        metrics.report(args.profile, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark the review pipeline and check the V1 performance targets
+Usage: python benchmark.py --size 100k
+
+Generates a synthetic multilingual review corpus with a known share of
+food poisoning mentions, times every stage (URL parsing, normalization,
+detection, date bucketing, aggregation, rendering, fetching) and reports
+throughput plus p50/p99 latency. Results are saved as JSON so a later run
+can be compared with --compare.
+"""
+
+import json
+import os
+import sys
+import argparse
+
+from benchmarks.corpus import SIZES, corpus_size
+from benchmarks.harness import run_benchmarks, compare
+from benchmarks.startup import run_startup_benchmarks
+
+DEFAULT_RESULTS_DIR = os.path.join('.cache', 'benchmarks')
+
+
+def print_results(results, changes=None):
+    """Print the stage table, accuracy and target checks"""
+    meta = results['meta']
+    print(f"\n📊 BENCHMARK RESULTS ({meta['size']:,} reviews, commit {meta['commit'] or 'unknown'})")
+    print("=" * 78)
+    print(f"{'Stage':<18}{'Unit':<12}{'Items':>10}{'Per second':>14}{'p50 ms':>11}{'p99 ms':>11}")
+    print("-" * 78)
+    for stage, summary in results['stages'].items():
+        throughput = summary['throughput_per_s']
+        line = (f"{stage:<18}{summary['unit']:<12}{summary['items']:>10,}"
+                f"{throughput if throughput is not None else 0:>14,.0f}"
+                f"{summary['p50_ms'] or 0:>11.4f}{summary['p99_ms'] or 0:>11.4f}")
+        change = (changes or {}).get(stage)
+        if change and 'throughput_change' in change:
+            line += f"  ({change['throughput_change']:+.0%} throughput)"
+        print(line)
+
+    accuracy = results['accuracy']
+    print("\n🎯 Detection accuracy")
+    print(f"   Planted mentions: {accuracy['planted_mentions']:,}  Detected: {accuracy['detected']:,}  "
+          f"Recall: {accuracy['recall']:.1%}  False positives: {accuracy['false_positives']:,}")
+
+    if results['targets']:
+        print("\n⏱️  V1 targets")
+        for stage, target in results['targets'].items():
+            mark = "✅" if target['passed'] else "❌"
+            print(f"   {mark} {stage}: {target['metric']} {target['value_ms']:.3f} ms "
+                  f"(limit {target['limit_ms']:g} ms)")
+
+    if results.get('startup'):
+        print("\n🚀 Script start-up (fresh process each run)")
+        for case, timing in results['startup'].items():
+            heavy = ', '.join(timing['heavy_imports']) or 'none'
+            print(f"   {case:<34} p50 {timing['p50_ms']:>7.1f} ms  min {timing['min_ms']:>7.1f} ms  "
+                  f"heavy imports: {heavy}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark fetch -> detect -> aggregate on a synthetic review corpus',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python benchmark.py --size 1k
+  python benchmark.py --size 1k --no-fetch --startup
+  python benchmark.py --size 1m --no-fetch --workers 8
+  python benchmark.py --size 100k --compare .cache/benchmarks/baseline.json
+
+Named sizes: {', '.join(SIZES)} (or any number of reviews)
+        """
+    )
+
+    parser.add_argument('--size', default='100k', help='Corpus size (default: 100k)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed (default: 0)')
+    parser.add_argument('--page-size', type=int, default=10_000,
+                        help='Reviews generated and processed per page (default: 10000)')
+    parser.add_argument('--no-fetch', action='store_true',
+                        help='Skip the HTTP stages (local stand-in server)')
+    parser.add_argument('--workers', type=int,
+                        help='Also time detection spread over this many processes')
+    parser.add_argument('--startup', action='store_true',
+                        help='Also time script start-up (--help and a cached lookup)')
+    parser.add_argument('--output', '-o',
+                        help=f'Where to save the JSON results (default: {DEFAULT_RESULTS_DIR}/<time>-<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier results JSON to compare against')
+
+    args = parser.parse_args()
+
+    try:
+        size = corpus_size(args.size)
+    except ValueError:
+        print(f"❌ Unknown size: {args.size}")
+        sys.exit(1)
+
+    print(f"\n⏳ Benchmarking {size:,} reviews...")
+    results = run_benchmarks(size, seed=args.seed, page_size=args.page_size, fetch=not args.no_fetch,
+                              workers=args.workers)
+    if args.startup:
+        results['startup'] = run_startup_benchmarks()
+
+    changes = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            changes = compare(results, json.load(f))
+        results['compared_to'] = {'path': args.compare, 'changes': changes}
+
+    print_results(results, changes)
+
+    output = args.output
+    if not output:
+        stamp = results['meta']['timestamp'].replace(':', '').replace('-', '')
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{stamp}-{results['meta']['commit'] or 'nogit'}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n💾 Results saved to {output}")
+    print(f"   Took {results['meta']['duration_s']:.1f}s\n")
+
+    # A missed target is a failure, so CI can run this directly
+    if not all(target['passed'] for target in results['targets'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
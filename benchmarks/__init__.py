@@ -0,0 +1,3 @@
+"""
+Benchmark harness and synthetic review corpora
+"""
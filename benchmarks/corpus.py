@@ -0,0 +1,174 @@
+"""
+Synthetic review corpora for benchmarks
+
+Generates Apify-shaped review items (the same fields the Google Maps
+Reviews Scraper returns) in several languages, with a known share of
+food poisoning mentions. Every review records whether a mention was
+planted in it, so the benchmark can check detection accuracy as well as
+speed.
+
+The corpus is generated page by page from a seed, so 1M reviews never
+have to be in memory at once and the same seed always gives the same
+reviews.
+
+Usage:
+    for page in iter_corpus(100_000, seed=1):
+        for item in page:
+            ...
+"""
+
+import random
+import time
+
+# Named corpus sizes
+SIZES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+DEFAULT_PAGE_SIZE = 10_000
+DEFAULT_MENTION_RATE = 0.05     # share of reviews with a planted mention
+REVIEWS_PER_RESTAURANT = 500
+HISTORY_SECONDS = 365 * 86400
+
+# Item field marking a planted mention (not part of real Apify items)
+PLANTED_FIELD = '_planted_mention'
+
+# Everyday review sentences per language. None of them match a keyword
+# pattern, so the only mentions in the corpus are the planted ones.
+SENTENCES = {
+    'en': [
+        "Great food and friendly staff, we will come back.",
+        "Lovely view of the rice fields and the nasi goreng was excellent.",
+        "A bit pricey but the cocktails were worth it.",
+        "Service was slow tonight but the food made up for it.",
+        "Best smoothie bowl we had in Canggu, highly recommended!",
+        "Cozy place with good music and a relaxed atmosphere.",
+    ],
+    'id': [
+        "Makanannya enak dan pelayanannya ramah sekali.",
+        "Tempatnya nyaman, harga terjangkau, pasti kembali lagi.",
+        "Nasi campurnya mantap, sambalnya pedas sekali.",
+        "Pemandangan sawah yang indah, cocok untuk makan siang.",
+    ],
+    'ru': [
+        "Очень вкусно, приветливый персонал и красивый вид.",
+        "Немного дорого, но коктейли того стоят.",
+        "Отличное место для завтрака, рекомендую смузи боул.",
+    ],
+    'zh': [
+        "食物很好吃，服务也很周到。",
+        "环境优美，价格合理，值得再来。",
+        "稻田景色非常漂亮，推荐炒饭。",
+    ],
+    'ja': [
+        "料理がとても美味しく、スタッフも親切でした。",
+        "景色が素晴らしく、ゆっくり過ごせました。",
+    ],
+    'fr': [
+        "Cuisine délicieuse et personnel très accueillant.",
+        "Un peu cher mais les cocktails valent le détour.",
+        "Superbe vue sur les rizières, nous reviendrons.",
+    ],
+}
+
+# Share of reviews per language (roughly what Bali restaurants see)
+LANGUAGE_WEIGHTS = {'en': 0.55, 'id': 0.15, 'ru': 0.1, 'zh': 0.08, 'ja': 0.04, 'fr': 0.08}
+
+# Planted mentions, one or more per keyword category
+MENTIONS = [
+    "Unfortunately I got food poisoning after dinner here.",
+    "My husband got sick the same night.",
+    "It made us sick for two days.",
+    "I had terrible stomach cramps afterwards.",
+    "Felt nauseous the whole evening.",
+    "I was vomiting all night after the seafood.",
+    "Got a bad case of Bali belly the next day.",
+    "Had diarrhea for three days.",
+    "Ended up in hospital with an IV drip.",
+    "They served us undercooked chicken.",
+    "The fish smelled off and we sent it back.",
+]
+
+
+def corpus_size(name):
+    """Turn '1k' / '100k' / '1m' or a plain number into a review count"""
+    if name.lower() in SIZES:
+        return SIZES[name.lower()]
+    return int(name)
+
+
+def iter_corpus(size, seed=0, page_size=DEFAULT_PAGE_SIZE, mention_rate=DEFAULT_MENTION_RATE,
+                now=None):
+    """
+    Generate a synthetic review corpus page by page
+
+    Args:
+        size: Number of reviews
+        seed: Random seed (same seed = same corpus)
+        page_size: Reviews per page
+        mention_rate: Share of reviews with a planted food poisoning mention
+        now: Epoch seconds the newest review is close to (defaults to now)
+
+    Yields:
+        Lists of Apify-style review items; planted mentions have
+        PLANTED_FIELD set to True
+    """
+    rng = random.Random(seed)
+    now = int(time.time() if now is None else now)
+    languages = list(LANGUAGE_WEIGHTS)
+    weights = list(LANGUAGE_WEIGHTS.values())
+
+    produced = 0
+    while produced < size:
+        page = []
+        for index in range(produced, min(size, produced + page_size)):
+            restaurant = index // REVIEWS_PER_RESTAURANT
+            language = rng.choices(languages, weights)[0]
+            sentences = rng.sample(SENTENCES[language], k=min(2, len(SENTENCES[language])))
+            planted = rng.random() < mention_rate
+            if planted:
+                sentences.insert(rng.randint(0, len(sentences)), rng.choice(MENTIONS))
+
+            published = now - rng.randint(0, HISTORY_SECONDS)
+            page.append({
+                'placeId': f"ChIJbench{restaurant:08d}",
+                'title': f"Warung Bench {restaurant}",
+                'address': "Jl. Raya Ubud, Bali, Indonesia",
+                'totalScore': 4.5,
+                'reviewsCount': REVIEWS_PER_RESTAURANT,
+                'reviewId': f"bench-{index}",
+                'name': f"Reviewer {rng.randint(1, 50_000)}",
+                'stars': rng.randint(1, 2) if planted else rng.randint(3, 5),
+                'text': ' '.join(sentences),
+                'publishedAtDate': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(published)),
+                'publishAt': 'a month ago',
+                'originalLanguage': language,
+                PLANTED_FIELD: planted,
+            })
+        produced += len(page)
+        yield page
+
+
+def sample_urls(count, seed=0):
+    """
+    Generate Google Maps URLs in the formats users paste
+
+    Args:
+        count: Number of URLs
+        seed: Random seed
+
+    Returns:
+        List of URL strings
+    """
+    rng = random.Random(seed)
+    formats = [
+        "https://www.google.com/maps/place/?q=place_id:ChIJ{token}",
+        "https://www.google.com/maps/search/?api=1&query=Warung&query_place_id=ChIJ{token}",
+        "https://www.google.com/maps/place/Warung+{token}/@-8.65,115.13,17z/data=!3m1!4b1",
+        "https://maps.app.goo.gl/{token}",
+    ]
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    return [rng.choice(formats).format(token=''.join(rng.choices(alphabet, k=22)))
+            for _ in range(count)]
@@ -0,0 +1,359 @@
+"""
+Benchmark harness: fetch -> detect -> aggregate
+
+Times every stage of the review pipeline on a synthetic corpus
+(benchmarks/corpus.py) and checks the V1 performance targets from
+specs/technical_spec_v1.md:
+
+    url_parse       validate + extract a place id from a pasted URL
+    normalize       raw Apify item -> Review record (api/models.py)
+    detect          keyword scan of one review (engine/detector.py)
+    detect_batch    columnar scan of a whole page (engine/columnar.py)
+    detect_pool     a whole page sharded over worker processes (engine/parallel.py)
+    dedup           fingerprint a whole page and check it for near-duplicates
+                    (engine/dedup.py)
+    archive_read    decompress + decode archived raw items, one chunk at a time
+                    (storage/archive.py)
+    date_bucket     publish time -> integer month bucket (utils/dates.py)
+    aggregate       running KPI / timeline counters (engine/processor.py)
+    render          dashboard JSON payload for one restaurant
+    fetch           Place Details call against the local stand-in server
+    end_to_end      URL -> fetch -> detect -> KPIs -> payload for one restaurant
+
+Per-item stages are timed call by call, so each reports throughput and
+p50/p99 latency. Results are plain dictionaries that can be saved as JSON
+and compared with an earlier run.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from api.google_maps_client import get_place_details
+from api.models import Place, Review
+from api.standin import StandInServer
+from benchmarks.corpus import PLANTED_FIELD, iter_corpus, sample_urls
+from engine.columnar import ReviewBatch, keyword_flags
+from engine.dedup import Deduplicator
+from engine.detector import DEFAULT_DETECTOR
+from engine.parallel import DetectionPool
+from engine.processor import MentionStats
+from storage.archive import APIFY_REVIEWS, RawArchive
+from utils.dates import month_bucket, resolve_published_at
+from utils.url_parser import extract_place_id, validate_google_maps_url
+
+# V1 targets (specs/technical_spec_v1.md, "V1 Performance Targets"), in ms
+TARGETS = {
+    'url_parse': ('p99_ms', 100.0),
+    'detect_5_reviews': ('p99_ms', 500.0),
+    'end_to_end': ('p99_ms', 5000.0),
+}
+
+URL_SAMPLES = 1_000
+FETCH_SAMPLES = 50
+
+
+class StageTimer:
+    """Collects per-call durations for one stage"""
+
+    def __init__(self, name, unit='review'):
+        self.name = name
+        self.unit = unit
+        self.durations = []
+        self.items = 0
+        self.total = 0.0
+
+    def add(self, seconds, items=1):
+        """Record one timed call that processed `items` units"""
+        self.durations.append(seconds)
+        self.items += items
+        self.total += seconds
+
+    def summary(self):
+        """Return throughput and latency percentiles for the stage"""
+        ordered = sorted(self.durations)
+
+        def percentile(p):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 4)
+
+        return {
+            'unit': self.unit,
+            'calls': len(ordered),
+            'items': self.items,
+            'total_s': round(self.total, 4),
+            'throughput_per_s': round(self.items / self.total, 1) if self.total else None,
+            'p50_ms': percentile(50),
+            'p99_ms': percentile(99),
+            'max_ms': round(ordered[-1] * 1000, 4) if ordered else None,
+        }
+
+
+def _timed(timer, func, *args, items=1):
+    start = time.perf_counter()
+    result = func(*args)
+    timer.add(time.perf_counter() - start, items)
+    return result
+
+
+def render_payload(place, stats, flagged, now):
+    """Build the dashboard response for one restaurant (see the spec's /analyze route)"""
+    return json.dumps({
+        'restaurant': place.to_dict() if isinstance(place, Place) else place,
+        'kpis': stats.kpis(now),
+        'timeline': stats.timeline(),
+        'flagged_reviews': [review.to_dict() for review in flagged[:5]],
+    }, ensure_ascii=False)
+
+
+def bench_url_parse(seed):
+    """Time URL validation + place id extraction"""
+    timer = StageTimer('url_parse', unit='url')
+    for url in sample_urls(URL_SAMPLES, seed):
+        start = time.perf_counter()
+        validate_google_maps_url(url)
+        extract_place_id(url)
+        timer.add(time.perf_counter() - start)
+    return timer
+
+
+def bench_corpus(size, seed, page_size, detector=None):
+    """
+    Run the in-memory stages over a synthetic corpus
+
+    Returns:
+        Tuple of (list of StageTimer, accuracy dictionary)
+    """
+    detector = detector or DEFAULT_DETECTOR
+    now = int(time.time())
+    timers = {name: StageTimer(name) for name in ('normalize', 'detect', 'date_bucket', 'aggregate')}
+    timers['detect_batch'] = StageTimer('detect_batch')
+    timers['dedup'] = StageTimer('dedup')
+    timers['render'] = StageTimer('render', unit='restaurant')
+
+    stats = {}
+    flagged = {}
+    places = {}
+    dedup = Deduplicator()
+    planted = detected = true_positives = 0
+
+    for page in iter_corpus(size, seed=seed, page_size=page_size, now=now):
+        records = []
+        for item in page:
+            review = _timed(timers['normalize'], Review.from_apify, item)
+            records.append(review)
+            if item['placeId'] not in places:
+                places[item['placeId']] = Place.from_apify(item)
+
+            matches = _timed(timers['detect'], detector.scan, review.text or '')
+            bucket_start = time.perf_counter()
+            published_at = resolve_published_at(review, now)
+            if published_at is not None:
+                month_bucket(published_at)
+            timers['date_bucket'].add(time.perf_counter() - bucket_start)
+
+            place_stats = stats.get(review.place_id)
+            if place_stats is None:
+                place_stats = stats[review.place_id] = MentionStats()
+            aggregate_start = time.perf_counter()
+            place_stats.total_reviews += 1
+            if matches:
+                place_stats.add_mention(published_at)
+            timers['aggregate'].add(time.perf_counter() - aggregate_start)
+
+            if matches:
+                flagged.setdefault(review.place_id, []).append(review)
+            planted += item[PLANTED_FIELD]
+            detected += bool(matches)
+            true_positives += bool(matches) and item[PLANTED_FIELD]
+
+        _timed(timers['detect_batch'], lambda: keyword_flags(ReviewBatch.from_records(records), detector),
+               items=len(records))
+
+        def check_page():
+            fingerprints = dedup.fingerprints([item['text'] for item in page],
+                                              [item['name'] for item in page])
+            for item, fingerprint in zip(page, fingerprints):
+                dedup.check(item['placeId'], item['reviewId'], fingerprint)
+        _timed(timers['dedup'], check_page, items=len(page))
+
+    for place_id, place_stats in stats.items():
+        _timed(timers['render'], render_payload, places[place_id], place_stats,
+               flagged.get(place_id, []), now)
+
+    accuracy = {
+        'reviews': size,
+        'planted_mentions': planted,
+        'detected': detected,
+        'recall': round(true_positives / planted, 4) if planted else None,
+        'false_positives': detected - true_positives,
+        'duplicates': dedup.duplicates,
+    }
+    return list(timers.values()), accuracy
+
+
+def bench_pool(size, seed, page_size, workers, detector=None):
+    """Time multi-process detection, one page at a time"""
+    timer = StageTimer('detect_pool')
+    with DetectionPool(workers, detector, min_parallel=0) as pool:
+        # Start the workers before timing, as a long-running job would
+        list(pool.scan_many(['warm up'] * workers))
+        for page in iter_corpus(size, seed=seed, page_size=page_size):
+            texts = [item['text'] for item in page]
+            _timed(timer, lambda: list(pool.scan_many(texts)), items=len(texts))
+    return timer
+
+
+def bench_archive(size, seed, page_size):
+    """Time reading the corpus back from a raw archive (written once, untimed)"""
+    timer = StageTimer('archive_read')
+    directory = tempfile.mkdtemp(prefix='bench_archive_')
+    try:
+        archive = RawArchive(directory)
+        for page in iter_corpus(size, seed=seed, page_size=page_size):
+            archive.append(APIFY_REVIEWS, page)
+        archive.close()
+
+        pages = iter(archive.pages(APIFY_REVIEWS))
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                break
+            timer.add(time.perf_counter() - start, items=len(page))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return timer
+
+
+def bench_fetch(seed, detector=None):
+    """
+    Time Place Details calls and the whole single-restaurant flow
+
+    Runs against an in-process stand-in server (api/standin.py), so this
+    measures our client code and HTTP overhead, not Google's latency.
+    """
+    detector = detector or DEFAULT_DETECTOR
+    fetch = StageTimer('fetch', unit='request')
+    detect_five = StageTimer('detect_5_reviews', unit='restaurant')
+    end_to_end = StageTimer('end_to_end', unit='restaurant')
+
+    server = StandInServer().start()
+    previous = os.environ.get('PLACES_API_URL')
+    os.environ['PLACES_API_URL'] = server.places_url
+    try:
+        for url in sample_urls(FETCH_SAMPLES, seed):
+            start = time.perf_counter()
+            place_id = extract_place_id(url) or 'ChIJbenchmark'
+            fetch_start = time.perf_counter()
+            data = get_place_details('benchmark', place_id)
+            fetch.add(time.perf_counter() - fetch_start)
+
+            place = Place.from_places_api(data)
+            detect_start = time.perf_counter()
+            results = [(review, detector.scan(review.text or '')) for review in place.reviews]
+            detect_five.add(time.perf_counter() - detect_start)
+
+            stats = MentionStats()
+            flagged = []
+            for review, matches in results:
+                stats.add(review, flagged=bool(matches))
+                if matches:
+                    flagged.append(review)
+            render_payload(place, stats, flagged, time.time())
+            end_to_end.add(time.perf_counter() - start)
+    finally:
+        if previous is None:
+            os.environ.pop('PLACES_API_URL', None)
+        else:
+            os.environ['PLACES_API_URL'] = previous
+        server.stop()
+
+    return [fetch, detect_five, end_to_end]
+
+
+def git_commit():
+    """Return the current commit hash (or None outside a git checkout)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(size, seed=0, page_size=10_000, fetch=True, workers=None):
+    """
+    Run every benchmark stage
+
+    Args:
+        size: Number of reviews in the synthetic corpus
+        seed: Random seed for the corpus
+        page_size: Reviews per page
+        fetch: Also run the HTTP stages against the local stand-in server
+        workers: Also time detection over this many worker processes
+
+    Returns:
+        Results dictionary: 'meta', 'stages', 'accuracy' and 'targets'
+    """
+    started = time.time()
+    timers = [bench_url_parse(seed)]
+    corpus_timers, accuracy = bench_corpus(size, seed, page_size)
+    timers += corpus_timers
+    timers.append(bench_archive(size, seed, page_size))
+    if workers:
+        timers.append(bench_pool(size, seed, page_size, workers))
+    if fetch:
+        timers += bench_fetch(seed)
+
+    stages = {timer.name: timer.summary() for timer in timers}
+    targets = {}
+    for stage, (metric, limit) in TARGETS.items():
+        if stage in stages:
+            value = stages[stage][metric]
+            targets[stage] = {'metric': metric, 'limit_ms': limit, 'value_ms': value,
+                              'passed': value is not None and value < limit}
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(started)),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'size': size,
+            'seed': seed,
+            'workers': workers,
+            'duration_s': round(time.time() - started, 2),
+        },
+        'stages': stages,
+        'accuracy': accuracy,
+        'targets': targets,
+    }
+
+
+def compare(current, baseline):
+    """
+    Compare two results dictionaries stage by stage
+
+    Returns:
+        Dictionary of stage -> {'throughput_change', 'p50_change', 'p99_change'},
+        each a fraction (+0.10 = 10% higher than the baseline)
+    """
+    changes = {}
+    for stage, now in current['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if not before:
+            continue
+        change = {}
+        for metric, label in (('throughput_per_s', 'throughput_change'),
+                              ('p50_ms', 'p50_change'), ('p99_ms', 'p99_change')):
+            if now.get(metric) is not None and before.get(metric):
+                change[label] = round(now[metric] / before[metric] - 1, 4)
+        changes[stage] = change
+    return changes
+
@@ -0,0 +1,107 @@
+"""
+Start-up benchmark for the command-line scripts
+
+Each command is run as a fresh `python` process several times, the way a
+user or another tool runs it, and the wall-clock time is reported next to
+a bare `python -c pass` so the cost of our own imports is easy to see.
+
+The cached lookup runs search_restaurant.py --offline against a response
+cache filled once through the local stand-in server (api/standin.py), so
+no API key or network is needed.
+
+Usage:
+    results = run_startup_benchmarks(runs=10)
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from api.standin import StandInServer
+
+STARTUP_RUNS = 10
+
+# Project root (the scripts are run from here)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CACHED_QUERY = "Warung Benchmark"
+
+# Modules that should stay unloaded on the fast paths
+HEAVY_MODULES = ('requests', 'dotenv', 'apify_client', 'numpy')
+
+
+def _run(args, env, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    return subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def time_command(args, env=None, runs=STARTUP_RUNS):
+    """
+    Time a Python command from process start to exit
+
+    Args:
+        args: Arguments after `python` (e.g. ['search_restaurant.py', '--help'])
+        env: Environment for the process (defaults to the current one)
+        runs: Number of runs
+
+    Returns:
+        Dictionary with 'runs', 'min_ms', 'p50_ms', 'max_ms' and
+        'heavy_imports' (which HEAVY_MODULES the command loaded)
+    """
+    env = dict(os.environ if env is None else env)
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = _run(args, env)
+        durations.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed: {result.stderr.strip()[-500:]}")
+
+    # One extra run to see what got imported
+    imported = set()
+    for line in _run(args, env, importtime=True).stderr.splitlines():
+        if line.startswith('import time:'):
+            imported.add(line.rsplit('|', 1)[-1].strip())
+
+    durations.sort()
+    return {
+        'runs': runs,
+        'min_ms': round(durations[0] * 1000, 1),
+        'p50_ms': round(durations[len(durations) // 2] * 1000, 1),
+        'max_ms': round(durations[-1] * 1000, 1),
+        'heavy_imports': [name for name in HEAVY_MODULES if name in imported],
+    }
+
+
+def run_startup_benchmarks(runs=STARTUP_RUNS):
+    """
+    Time the scripts' start-up paths
+
+    Returns:
+        Dictionary of case name -> time_command() result
+    """
+    results = {'python -c pass': time_command(['-c', 'pass'], runs=runs)}
+    results['search_restaurant --help'] = time_command(['search_restaurant.py', '--help'], runs=runs)
+    results['test_apify --help'] = time_command(['test_apify.py', '--help'], runs=runs)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = StandInServer().start()
+        env = dict(os.environ,
+                   PLACES_API_URL=server.places_url,
+                   PLACES_CACHE_PATH=os.path.join(directory, 'cache.sqlite3'),
+                   GOOGLE_MAPS_API_KEY='benchmark')
+        try:
+            # Fill the cache once, then every timed run is answered from it
+            warm = _run(['search_restaurant.py', CACHED_QUERY], env)
+            if warm.returncode != 0:
+                raise RuntimeError(f"Could not fill the cache: {warm.stderr.strip()[-500:]}")
+        finally:
+            server.stop()
+
+        env.pop('PLACES_API_URL')
+        results['search_restaurant cached lookup'] = time_command(
+            ['search_restaurant.py', CACHED_QUERY, '--offline'], env=env, runs=runs)
+
+    return results
@@ -0,0 +1,3 @@
+"""
+Core logic: food poisoning detection and review processing
+"""
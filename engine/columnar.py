@@ -0,0 +1,265 @@
+"""
+Columnar review batches for bulk analysis
+
+Instead of walking lists of nested review dictionaries one at a time, a
+ReviewBatch stores a whole review set as flat NumPy arrays:
+
+    text            all review texts joined into one string
+    offsets         text[offsets[i]:offsets[i + 1]] is review i (plus separator)
+    rating          star rating per review (NaN if missing)
+    published_at    publish time per review (datetime64[s], NaT if missing)
+    restaurant      index into restaurant_ids per review
+
+Keyword detection then runs as ONE regex scan over the joined text, and
+monthly counts / rating statistics are computed with array operations over
+the whole batch.
+
+Usage:
+    batch = ReviewBatch.from_apify_items(items)
+    flags = keyword_flags(batch)
+    timeline = monthly_counts(batch, flags.flagged)
+"""
+
+import numbers
+from collections import namedtuple
+
+import numpy as np
+
+from engine.detector import DEFAULT_DETECTOR, SEPARATOR
+from engine.keywords import CONFIDENCE_RANK
+
+# Result of keyword_flags()
+KeywordFlags = namedtuple('KeywordFlags', ['categories', 'matrix', 'confidence', 'flagged'])
+
+# Confidence tier per rank, index = CONFIDENCE_RANK value (0 = not flagged)
+CONFIDENCE_BY_RANK = [None] + sorted(CONFIDENCE_RANK, key=CONFIDENCE_RANK.get)
+
+
+def _parse_timestamps(values):
+    """
+    Convert publish times to datetime64[s]
+
+    Accepts ISO-8601 strings (e.g. '2025-09-28T10:30:00.000Z') and epoch
+    seconds, mixed in any order; None becomes NaT.
+    """
+    # NaT is stored as the smallest int64; fractions of a second are dropped
+    epochs = np.full(len(values), np.iinfo(np.int64).min, dtype=np.int64)
+
+    # Numbers are converted one by one, strings are parsed together by numpy
+    positions, strings = [], []
+    for i, value in enumerate(values):
+        if isinstance(value, numbers.Number) and not isinstance(value, bool):
+            epochs[i] = int(value)
+        elif value:
+            positions.append(i)
+            strings.append(value.rstrip('Z'))
+
+    if strings:
+        parsed = np.array(strings, dtype='datetime64[ns]').astype('datetime64[s]')
+        epochs[positions] = parsed.view(np.int64)
+    return epochs.view('datetime64[s]')
+
+
+class ReviewBatch:
+    """
+    A set of reviews stored as columns
+
+    Build one with from_apify_items(), from_records() or from_places_details()
+    rather than calling the constructor directly.
+    """
+
+    def __init__(self, texts, ratings, published, restaurants):
+        """
+        Args:
+            texts: List of review texts ('' if missing)
+            ratings: List of star ratings (None if missing)
+            published: List of publish times (None if missing), either
+                       ISO-8601 strings or epoch seconds
+            restaurants: List of restaurant ids, one per review
+        """
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        self.offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.text = SEPARATOR.join(texts) + SEPARATOR
+
+        self.rating = np.array([np.nan if r is None else r for r in ratings], dtype=np.float32)
+        self.published_at = _parse_timestamps(published)
+
+        # Restaurant ids are stored once; each review keeps a small integer code
+        self.restaurant_ids, codes = np.unique(np.array(restaurants, dtype=object).astype(str),
+                                               return_inverse=True)
+        self.restaurant = codes.astype(np.int32)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def review_text(self, i):
+        """Return the text of review i"""
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+    @classmethod
+    def from_apify_items(cls, items):
+        """
+        Build a batch from Apify Google Maps Reviews Scraper items
+
+        Each item is one review with 'text', 'stars', 'publishedAtDate'
+        and the restaurant's 'placeId'.
+        """
+        items = list(items)
+        return cls(
+            texts=[item.get('text') or '' for item in items],
+            ratings=[item.get('stars') for item in items],
+            published=[item.get('publishedAtDate') for item in items],
+            restaurants=[item.get('placeId') or item.get('url') or '' for item in items],
+        )
+
+    @classmethod
+    def from_records(cls, reviews):
+        """
+        Build a batch from Review records (see api/models.py)
+
+        Args:
+            reviews: Iterable of Review
+        """
+        reviews = list(reviews)
+        return cls(
+            texts=[review.text or '' for review in reviews],
+            ratings=[review.rating for review in reviews],
+            published=[review.published_at for review in reviews],
+            restaurants=[review.place_id or '' for review in reviews],
+        )
+
+    @classmethod
+    def from_places_details(cls, places):
+        """
+        Build a batch from Places API (New) place details responses
+
+        Each place has an 'id' and a 'reviews' list whose entries carry
+        'originalText'/'text', 'rating' and 'publishTime'.
+        """
+        texts, ratings, published, restaurants = [], [], [], []
+        for place in places:
+            for review in place.get('reviews', []):
+                text = (review.get('originalText') or review.get('text') or {}).get('text') or ''
+                texts.append(text)
+                ratings.append(review.get('rating'))
+                published.append(review.get('publishTime'))
+                restaurants.append(place.get('id', ''))
+        return cls(texts, ratings, published, restaurants)
+
+
+def keyword_flags(batch, detector=None):
+    """
+    Detect keyword mentions across the whole batch in one scan
+
+    Args:
+        batch: ReviewBatch
+        detector: Detector to use (defaults to the built-in keyword list)
+
+    Returns:
+        KeywordFlags with:
+            categories: list of category names (matrix columns)
+            matrix: bool array (reviews x categories)
+            confidence: int8 array, strongest confidence rank per review (0 = none)
+            flagged: bool array, True for reviews with any mention
+    """
+    detector = detector or DEFAULT_DETECTOR
+    categories = sorted({category for category, _, _ in detector.patterns})
+    column = {category: i for i, category in enumerate(categories)}
+
+    # Per-pattern lookup tables so the hits can be mapped with array indexing
+    pattern_column = np.array([column[c] for c, _, _ in detector.patterns], dtype=np.int32)
+    pattern_rank = np.array([CONFIDENCE_RANK[conf] for _, conf, _ in detector.patterns], dtype=np.int8)
+
+    hits = [(i, start) for i, start, _ in detector.finditer(batch.text)]
+    hit_pattern = np.array([i for i, _ in hits], dtype=np.int32)
+    hit_start = np.array([start for _, start in hits], dtype=np.int64)
+
+    # Which review does each hit fall in?
+    hit_review = np.searchsorted(batch.offsets, hit_start, side='right') - 1
+
+    matrix = np.zeros((len(batch), len(categories)), dtype=bool)
+    matrix[hit_review, pattern_column[hit_pattern]] = True
+
+    confidence = np.zeros(len(batch), dtype=np.int8)
+    np.maximum.at(confidence, hit_review, pattern_rank[hit_pattern])
+
+    return KeywordFlags(categories, matrix, confidence, confidence > 0)
+
+
+def monthly_counts(batch, mask=None):
+    """
+    Count reviews per restaurant per month
+
+    Args:
+        batch: ReviewBatch
+        mask: Optional bool array selecting reviews (e.g. flags.flagged)
+
+    Returns:
+        Dictionary of restaurant id -> {'YYYY-MM': count}
+    """
+    selected = ~np.isnat(batch.published_at)
+    if mask is not None:
+        selected &= mask
+
+    months = batch.published_at[selected].astype('datetime64[M]').astype(np.int64)
+    restaurants = batch.restaurant[selected].astype(np.int64)
+    if months.size == 0:
+        return {}
+
+    # Combine (restaurant, month) into one integer key and count in one go
+    first_month = months.min()
+    span = months.max() - first_month + 1
+    keys, counts = np.unique(restaurants * span + (months - first_month), return_counts=True)
+
+    result = {}
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        restaurant, month = divmod(key, int(span))
+        label = str(np.datetime64(int(first_month + month), 'M'))
+        result.setdefault(str(batch.restaurant_ids[restaurant]), {})[label] = count
+    return result
+
+
+def rating_stats(batch, flagged):
+    """
+    Compare flagged and unflagged reviews by star rating
+
+    Args:
+        batch: ReviewBatch
+        flagged: bool array of flagged reviews (e.g. flags.flagged)
+
+    Returns:
+        Dictionary of restaurant id -> {
+            'reviews': count per star (index 0 = 1 star),
+            'flagged': flagged count per star,
+            'mean_rating': mean of all rated reviews,
+            'mean_rating_flagged': mean of flagged rated reviews
+        }
+    """
+    rated = ~np.isnan(batch.rating)
+    stars = np.clip(np.rint(batch.rating[rated]), 1, 5).astype(np.int64) - 1
+    restaurants = batch.restaurant[rated].astype(np.int64)
+    flagged_rated = flagged[rated]
+    n = len(batch.restaurant_ids)
+
+    # One bincount per measure over (restaurant, star) cells
+    cells = restaurants * 5 + stars
+    reviews = np.bincount(cells, minlength=n * 5).reshape(n, 5)
+    flagged_counts = np.bincount(cells[flagged_rated], minlength=n * 5).reshape(n, 5)
+
+    weights = np.arange(1, 6)
+    total = reviews.sum(axis=1)
+    total_flagged = flagged_counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_all = (reviews * weights).sum(axis=1) / total
+        mean_flagged = (flagged_counts * weights).sum(axis=1) / total_flagged
+
+    result = {}
+    for i, restaurant_id in enumerate(batch.restaurant_ids):
+        result[str(restaurant_id)] = {
+            'reviews': reviews[i].tolist(),
+            'flagged': flagged_counts[i].tolist(),
+            'mean_rating': None if total[i] == 0 else round(float(mean_all[i]), 2),
+            'mean_rating_flagged': None if total_flagged[i] == 0 else round(float(mean_flagged[i]), 2),
+        }
+    return result
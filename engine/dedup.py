@@ -0,0 +1,262 @@
+"""
+Near-duplicate review detection (MinHash + LSH)
+
+Scraper results often hold the same review more than once: in its original
+language and again machine-translated ("(Translated by Google) ...
+(Original) ..."), or repeated across re-scrapes under a new review id.
+Counting each copy inflates mention counts and scans the same text twice.
+
+Each review gets a MinHash signature of its word pairs, taken from the
+original-language text so a translated copy fingerprints like the original:
+- signatures for a whole page are computed in one batch with numpy
+- per restaurant, signatures are bucketed by bands (locality-sensitive
+  hashing), so a new review is only compared with the few reviews that
+  share a bucket - roughly linear time instead of comparing every pair
+- a candidate is a duplicate when the signatures agree on at least
+  SIMILARITY_THRESHOLD of their values (estimated Jaccard similarity)
+
+Short reviews ("Great food!") are written word for word by many different
+people, so they only count as duplicates of the same author's reviews.
+
+Usage:
+    dedup = Deduplicator()
+    fingerprints = dedup.fingerprints([item.get('text') for item in page],
+                                      [item.get('name') for item in page])
+    for item, fingerprint in zip(page, fingerprints):
+        if dedup.check(item['placeId'], item['reviewId'], fingerprint):
+            continue    # a copy of a review seen before
+"""
+
+import re
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+
+NUM_PERMUTATIONS = 64
+BANDS = 16                  # LSH bands of 4 values each
+SIMILARITY_THRESHOLD = 0.8
+
+# Reviews with fewer words only match the same author's reviews
+SHORT_REVIEW_WORDS = 30
+
+# Google's inline translation: "(Translated by Google) <text> (Original) <text>"
+_TRANSLATED = re.compile(r'^\s*\(Translated by Google\)\s*(.*?)(?:\s*\(Original\)\s*(.*))?$',
+                         re.DOTALL)
+_WORD = re.compile(r'\w+')
+
+# Fixed seeds so signatures stored in one run match those computed in the next
+_SEEDS = [(0x9E3779B1 * (i + 1) | 1) & 0xFFFFFFFF for i in range(NUM_PERMUTATIONS)]
+_OFFSETS = [(0x85EBCA77 * (i + 7)) & 0xFFFFFFFF for i in range(NUM_PERMUTATIONS)]
+
+# Words whose hashes are remembered; the most common ones stay cached while
+# rare words and typos drop out, so a long-running service doesn't grow
+WORD_CACHE_SIZE = 100_000
+
+# A review's fingerprint: MinHash signature (bytes), author, and whether the
+# review is short enough to need the same author to count as a duplicate
+Fingerprint = namedtuple('Fingerprint', ['signature', 'author', 'short'])
+
+
+def original_text(text):
+    """
+    Return the original-language part of a review text
+
+    Google prefixes machine translations with "(Translated by Google)" and
+    appends the original after "(Original)"; anything else is returned as is.
+    """
+    if not text:
+        return ''
+    match = _TRANSLATED.match(text)
+    if not match:
+        return text
+    return match.group(2) or match.group(1)
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _word_hash(word):
+    # 32-bit word hash; crc32 is stable across processes, unlike hash()
+    return zlib.crc32(word.encode('utf-8'))
+
+
+def signatures(texts):
+    """
+    Compute MinHash signatures for many texts in one batch
+
+    Args:
+        texts: Iterable of review texts
+
+    Returns:
+        List of (signature bytes, word count); signature is None for a text
+        without words
+    """
+    # Imported here: only ingest needs it, and it is slow to import
+    import numpy as np
+
+    words = [[_word_hash(word) for word in _WORD.findall(original_text(text).lower())]
+             for text in texts]
+    counts = np.array([len(text_words) for text_words in words], dtype=np.int64)
+    results = [(None, 0)] * len(words)
+    if not counts.sum():
+        return results
+
+    # Word pairs (shingles): each text's words followed by a 0, so a text's
+    # last word pairs with the end marker and one-word texts still get one
+    flat = np.fromiter((value for text_words in words for value in text_words + [0]),
+                       dtype=np.uint64, count=int(counts.sum() + len(words)))
+    pairs = (flat[:-1] * np.uint64(0x01000193) + flat[1:]) & np.uint64(0xFFFFFFFF)
+
+    text_starts = np.concatenate(([0], np.cumsum(counts + 1)[:-1]))
+    shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    index = np.repeat(text_starts - shingle_starts, counts) + np.arange(counts.sum())
+    shingles = pairs[index]
+
+    # One universal hash per permutation; the signature is each one's minimum per text
+    seeds = np.array(_SEEDS, dtype=np.uint64)[:, None]
+    offsets = np.array(_OFFSETS, dtype=np.uint64)[:, None]
+    hashed = ((seeds * shingles[None, :] + offsets) >> np.uint64(16)) & np.uint64(0xFFFFFFFF)
+    has_words = counts > 0
+    minimums = np.minimum.reduceat(hashed, shingle_starts[has_words], axis=1).T.astype('<u4')
+
+    for row, position in zip(minimums, np.flatnonzero(has_words)):
+        results[position] = (row.tobytes(), int(counts[position]))
+    return results
+
+
+def similarity(signature1, signature2):
+    """Estimated Jaccard similarity of two signatures (share of equal values)"""
+    width = len(signature1) // NUM_PERMUTATIONS
+    equal = sum(signature1[i:i + width] == signature2[i:i + width]
+                for i in range(0, len(signature1), width))
+    return equal / NUM_PERMUTATIONS
+
+
+class DuplicateIndex:
+    """
+    LSH index of one restaurant's review fingerprints
+
+    Usage:
+        index = DuplicateIndex()
+        original = index.find(fingerprint)      # key of a near-duplicate, or None
+        index.add(review_id, fingerprint)
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._bands = [{} for _ in range(BANDS)]    # per band: band bytes -> list of keys
+        self._fingerprints = {}                     # key -> Fingerprint
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def __contains__(self, key):
+        return key in self._fingerprints
+
+    def items(self):
+        """(key, fingerprint) pairs in the order they were added"""
+        return self._fingerprints.items()
+
+    @staticmethod
+    def band_keys(fingerprint):
+        """LSH bucket keys, one per band; a short review's are prefixed with its author"""
+        signature = fingerprint.signature
+        step = len(signature) // BANDS
+        if fingerprint.short:
+            owner = (fingerprint.author or '').encode('utf-8') + b'\x00'
+            return [owner + signature[i:i + step] for i in range(0, len(signature), step)]
+        return [signature[i:i + step] for i in range(0, len(signature), step)]
+
+    def find(self, fingerprint, band_keys=None):
+        """
+        Find a stored review this one duplicates
+
+        Args:
+            fingerprint: Fingerprint to look for
+            band_keys: band_keys(fingerprint), if already computed
+
+        Returns:
+            The stored review's key, or None
+        """
+        checked = set()
+        for band, band_key in zip(self._bands, band_keys or self.band_keys(fingerprint)):
+            for key in band.get(band_key, ()):
+                if key not in checked:
+                    checked.add(key)
+                    if similarity(fingerprint.signature, self._fingerprints[key].signature) >= self.threshold:
+                        return key
+        return None
+
+    def add(self, key, fingerprint, band_keys=None):
+        """Add a unique review's fingerprint"""
+        self._fingerprints[key] = fingerprint
+        for band, band_key in zip(self._bands, band_keys or self.band_keys(fingerprint)):
+            band.setdefault(band_key, []).append(key)
+
+
+class Deduplicator:
+    """
+    Near-duplicate detection across many restaurants (one index per place)
+
+    Not thread-safe; use one per thread or per store connection.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._indexes = {}
+        self.duplicates = 0
+
+    def __contains__(self, place_id):
+        return place_id in self._indexes
+
+    def index(self, place_id):
+        """Return (creating it if needed) a restaurant's DuplicateIndex"""
+        index = self._indexes.get(place_id)
+        if index is None:
+            index = self._indexes[place_id] = DuplicateIndex(self.threshold)
+        return index
+
+    def release(self, place_id):
+        """Forget a restaurant's index (e.g. once all its reviews are in); returns it, or None"""
+        return self._indexes.pop(place_id, None)
+
+    @staticmethod
+    def fingerprints(texts, authors=None):
+        """
+        Fingerprint many review texts in one batch
+
+        Args:
+            texts: Iterable of review texts
+            authors: Matching iterable of author names (None = unknown)
+
+        Returns:
+            List of Fingerprint, or None for texts without words
+        """
+        texts = list(texts)
+        authors = list(authors) if authors is not None else [None] * len(texts)
+        return [Fingerprint(signature, author, words < SHORT_REVIEW_WORDS) if signature else None
+                for (signature, words), author in zip(signatures(texts), authors)]
+
+    def check(self, place_id, key, fingerprint):
+        """
+        Check a review against its restaurant's earlier reviews
+
+        A unique review is added to the index, so later copies match it.
+
+        Args:
+            place_id: Restaurant the review belongs to
+            key: Review id
+            fingerprint: Fingerprint from fingerprints() (None, or a short
+                         review without an author, is never a duplicate)
+
+        Returns:
+            Key of the review this one duplicates, or None if it is unique
+        """
+        if fingerprint is None or (fingerprint.short and not fingerprint.author):
+            return None
+        index = self.index(place_id)
+        band_keys = index.band_keys(fingerprint)
+        original = index.find(fingerprint, band_keys)
+        if original is None:
+            index.add(key, fingerprint, band_keys)
+        else:
+            self.duplicates += 1
+        return original
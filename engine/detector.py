@@ -0,0 +1,179 @@
+"""
+Food poisoning detection engine
+
+All keyword patterns are compiled ONCE into a single combined regex with one
+named group per pattern. Each review is scanned in a single pass; every match
+is reported with its keyword, category and confidence tier.
+
+The combined regex sits inside a lookahead, so it never consumes text: a
+mention like "terrible stomach pain" reports both "terrible stomach" and
+"stomach pain", exactly as running each pattern separately would.
+
+Usage:
+    from engine.detector import detect_food_poisoning
+
+    is_flagged, keywords = detect_food_poisoning("Got food poisoning here!")
+"""
+
+import re
+from collections import namedtuple
+
+from engine.keywords import FOOD_POISONING_PATTERNS, CONFIDENCE_RANK
+
+# Joins review texts when many are scanned as one string; it is neither
+# whitespace nor a word character, so no keyword pattern can match across
+# two reviews
+SEPARATOR = '\x00'
+
+# One keyword found in a review
+KeywordMatch = namedtuple('KeywordMatch', ['keyword', 'category', 'confidence', 'start', 'end'])
+
+
+class Detector:
+    """
+    Compiled keyword matcher
+
+    Build one Detector and reuse it - compiling is the expensive part.
+    """
+
+    def __init__(self, patterns=FOOD_POISONING_PATTERNS):
+        """
+        Args:
+            patterns: List of (category, confidence, regex) tuples
+        """
+        self.patterns = list(patterns)
+
+        # Individual patterns, used only to double-check the (rare) spots
+        # where two different patterns start at the same character
+        self._compiled = [re.compile(pattern, re.IGNORECASE) for _, _, pattern in self.patterns]
+
+        # When every pattern starts at a word boundary (all of ours do), test
+        # the boundary once up front instead of once per pattern: the combined
+        # regex then only tries the alternatives at the start of each word
+        sources = [pattern for _, _, pattern in self.patterns]
+        prefix = ''
+        if all(source.startswith(r'\b') for source in sources):
+            sources = [source[2:] for source in sources]
+            prefix = r'\b(?=\w)'
+
+        # Group name -> pattern index, e.g. 'k7' -> 7
+        alternatives = '|'.join(f'(?P<k{i}>{source})' for i, source in enumerate(sources))
+        self._combined = re.compile(f'{prefix}(?=(?:{alternatives}))', re.IGNORECASE)
+        self._group_index = {f'k{i}': i for i in range(len(self.patterns))}
+
+    def finditer(self, text):
+        """
+        Yield every raw pattern hit in the text
+
+        Unlike scan(), repeated mentions are not merged, which makes this
+        suitable for scanning many reviews joined into one string.
+
+        Args:
+            text: Text to scan
+
+        Yields:
+            Tuples of (pattern_index, start, keyword)
+        """
+        for hit in self._combined.finditer(text):
+            first = self._group_index[hit.lastgroup]
+            start = hit.start()
+            yield first, start, hit.group(hit.lastgroup).strip()
+
+            # The alternation reports only the first pattern matching at this
+            # position; check whether any later pattern also starts here
+            for i in range(first + 1, len(self._compiled)):
+                found = self._compiled[i].match(text, start)
+                if found:
+                    yield i, start, found.group(0).strip()
+
+    def scan(self, text):
+        """
+        Find every keyword mention in one review
+
+        Args:
+            text: Review text
+
+        Returns:
+            List of KeywordMatch, in the order they appear in the text
+            (each distinct keyword/category pair is reported once)
+        """
+        if not text:
+            return []
+
+        matches = []
+        seen = set()
+
+        for i, start, keyword in self.finditer(text):
+            category, confidence, _ = self.patterns[i]
+
+            key = (keyword.lower(), category)
+            if key in seen:
+                continue
+            seen.add(key)
+            matches.append(KeywordMatch(keyword, category, confidence,
+                                        start, start + len(keyword)))
+
+        return matches
+
+
+def highest_confidence(matches):
+    """
+    Return the strongest confidence tier among the matches
+
+    Args:
+        matches: List of KeywordMatch
+
+    Returns:
+        'high', 'medium', 'low', or None if there are no matches
+    """
+    if not matches:
+        return None
+    return max((m.confidence for m in matches), key=CONFIDENCE_RANK.get)
+
+
+# Shared detector, compiled once at import
+DEFAULT_DETECTOR = Detector()
+
+
+def detect_food_poisoning(review_text, detector=None):
+    """
+    Detect food poisoning mentions in review text
+
+    Args:
+        review_text: The review text to analyze
+        detector: Detector to use (defaults to the built-in keyword list)
+
+    Returns:
+        tuple: (is_flagged: bool, matched_keywords: list)
+    """
+    matches = (detector or DEFAULT_DETECTOR).scan(review_text)
+    return len(matches) > 0, [m.keyword for m in matches]
+
+
+def analyze_reviews(reviews, detector=None, text_key='text'):
+    """
+    Scan all reviews and collect flagged ones
+
+    Args:
+        reviews: List of review dictionaries
+        detector: Detector to use (defaults to the built-in keyword list)
+        text_key: Key holding the review text
+
+    Returns:
+        list: Copies of the flagged reviews with 'matched_keywords',
+              'matched_categories' and 'confidence' added
+    """
+    detector = detector or DEFAULT_DETECTOR
+    flagged_reviews = []
+
+    for review in reviews:
+        matches = detector.scan(review.get(text_key) or '')
+
+        if matches:
+            flagged_review = review.copy()
+            flagged_review['matched_keywords'] = [m.keyword for m in matches]
+            flagged_review['matched_categories'] = sorted({m.category for m in matches})
+            flagged_review['confidence'] = highest_confidence(matches)
+            flagged_reviews.append(flagged_review)
+
+    return flagged_reviews
@@ -0,0 +1,61 @@
+"""
+Food poisoning keyword patterns
+
+Source of truth: specs/food_poisoning_keywords.md
+
+Each pattern has a category (what kind of mention it is) and a confidence
+tier, following the spec's confidence levels:
+- high:   explicit mentions ("food poisoning", "got sick")
+- medium: strong symptoms ("vomiting", "diarrhea", "stomach pain")
+- low:    mild symptoms and hygiene concerns ("upset stomach", "tasted off")
+"""
+
+HIGH = 'high'
+MEDIUM = 'medium'
+LOW = 'low'
+
+# Higher number = stronger signal (used to pick a review's overall confidence)
+CONFIDENCE_RANK = {LOW: 1, MEDIUM: 2, HIGH: 3}
+
+# (category, confidence, pattern) - all patterns are matched case-insensitively
+FOOD_POISONING_PATTERNS = [
+    # Direct mentions
+    ('direct_mention', HIGH, r'\bfood\s*poison(ing|ed)?\b'),
+    ('direct_mention', HIGH, r'\bfood[\s-]*borne\s*(illness|disease)\b'),
+    ('direct_mention', HIGH, r'\bcontaminated\s*food\b'),
+    ('direct_mention', HIGH, r'\bfood\s*safety\s*(issue|concern|problem)s?\b'),
+
+    # Getting sick
+    ('getting_sick', HIGH, r'\b(got|became|gotten)\s+(sick|ill)\b'),
+    ('getting_sick', HIGH, r'\bmade\s+(me|us|them)\s+(sick|ill)\b'),
+    ('getting_sick', HIGH, r'\b(feeling|felt|feel)\s+(sick|ill|unwell)\b'),
+
+    # Stomach issues
+    ('stomach', MEDIUM, r'\bstomach\s*(aches?|pains?|cramps?|issues?|problems?)\b'),
+    ('stomach', MEDIUM, r'\b(terrible|severe)\s*stomach\b'),
+    ('stomach', LOW, r'\b(upset|bad)\s*stomach\b'),
+
+    # Nausea
+    ('nausea', MEDIUM, r'\bnause(a|ous|ated)\b'),
+
+    # Vomiting
+    ('vomiting', MEDIUM, r'\b(vomit(ing|ed)?|threw\s*up|throw(ing)?\s*up|puk(e|ed|ing))\b'),
+
+    # Diarrhea (multiple spellings) and regional terms
+    ('diarrhea', MEDIUM, r'\bdiarrh[oeœ]a\b'),
+    ('diarrhea', HIGH, r'\b(bali\s*belly|travell?ers?\'?\s*diarrh[oeœ]a)\b'),
+
+    # Duration/Severity
+    ('severity', MEDIUM, r'\bsick\s*for\s*(days|hours|a\s*week)\b'),
+    ('severity', MEDIUM, r'\b(hospital|emergency\s*room|ER|doctor)\b'),
+    ('severity', MEDIUM, r'\bmedical\s*attention\b'),
+
+    # Hygiene concerns
+    ('hygiene', LOW, r'\b(dirty|unclean|unsanitary)\s*(kitchen|restaurant|food)?\b'),
+    ('hygiene', LOW, r'\b(spoiled|rotten|bad)\s*food\b'),
+    ('hygiene', LOW, r'\b(undercooked|raw)\s*(chicken|meat|seafood|fish|egg)\b'),
+    ('hygiene', LOW, r'\b(smelled|tasted)\s*(bad|off|weird|funny|strange)\b'),
+]
+
+# Flat pattern list, as used by the spec's examples
+FOOD_POISONING_KEYWORDS = [pattern for _, _, pattern in FOOD_POISONING_PATTERNS]
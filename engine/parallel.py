@@ -0,0 +1,152 @@
+"""
+Multi-process keyword detection
+
+Regex scanning is CPU-bound and holds the GIL, so threads do not help with
+a large backlog (hundreds of restaurants x up to 1000 reviews each). A
+DetectionPool shards the reviews across worker processes instead:
+
+- each worker compiles the keyword patterns ONCE, when it starts
+- reviews travel in chunks, joined into one string per chunk, so there is
+  one small pickle per chunk instead of one per review
+- workers send back only the flagged reviews, as plain tuples
+
+Results come back in input order and are the same KeywordMatch lists that
+Detector.scan() returns, so the pool is a drop-in for a scan loop.
+
+Usage:
+    with DetectionPool() as pool:
+        for text, matches in zip(texts, pool.scan_many(texts)):
+            ...
+"""
+
+import os
+
+from engine.detector import DEFAULT_DETECTOR, SEPARATOR, Detector, KeywordMatch
+
+# Reviews sent to a worker at a time. Large enough that pickling and
+# scheduling are a small share of the work, small enough to keep every
+# worker busy until the end.
+DEFAULT_CHUNK_SIZE = 2_000
+
+# Below this many reviews, starting processes costs more than it saves
+MIN_PARALLEL_REVIEWS = 5_000
+
+# The detector each worker process builds at startup
+_worker_detector = None
+
+
+def _init_worker(patterns):
+    """Compile the patterns once per worker process"""
+    global _worker_detector
+    _worker_detector = Detector(patterns)
+
+
+def _scan_chunk(joined):
+    """
+    Scan one chunk of reviews in a worker
+
+    Args:
+        joined: Review texts joined with SEPARATOR
+
+    Returns:
+        List of (index in chunk, tuple of KeywordMatch field tuples),
+        for flagged reviews only
+    """
+    results = []
+    for i, text in enumerate(joined.split(SEPARATOR)):
+        matches = _worker_detector.scan(text)
+        if matches:
+            results.append((i, tuple(tuple(match) for match in matches)))
+    return results
+
+
+def default_workers():
+    """Return the number of worker processes to use (one per available core)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class DetectionPool:
+    """
+    Pool of worker processes running keyword detection
+
+    Start it once and reuse it for the whole backlog - starting worker
+    processes is the expensive part. Use it as a context manager (or call
+    close()) so the workers are shut down.
+    """
+
+    def __init__(self, workers=None, detector=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 min_parallel=MIN_PARALLEL_REVIEWS):
+        """
+        Args:
+            workers: Number of worker processes (defaults to one per core)
+            detector: Detector whose patterns the workers use
+                      (defaults to the built-in keyword list)
+            chunk_size: Reviews per chunk sent to a worker
+            min_parallel: Smaller inputs are scanned in this process
+        """
+        self.detector = detector or DEFAULT_DETECTOR
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel
+        self._executor = None
+
+    def _get_executor(self):
+        """Start the workers on first use"""
+        if self._executor is None:
+            # Imported here: most scans never start a process pool
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.detector.patterns,))
+        return self._executor
+
+    def _chunks(self, texts):
+        chunk = []
+        for text in texts:
+            # The separator can never be part of a review; drop it if it is
+            chunk.append((text or '').replace(SEPARATOR, ' '))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def scan_many(self, texts):
+        """
+        Scan many reviews, spread over the worker processes
+
+        Args:
+            texts: Iterable of review texts (None counts as empty)
+
+        Yields:
+            One list of KeywordMatch per text, in input order
+            (the same lists Detector.scan() returns)
+        """
+        texts = texts if isinstance(texts, list) else list(texts)
+
+        if self.workers <= 1 or len(texts) < self.min_parallel:
+            for text in texts:
+                yield self.detector.scan(text or '')
+            return
+
+        chunks = list(self._chunks(texts))
+        joined = (SEPARATOR.join(chunk) for chunk in chunks)
+        for chunk, flagged in zip(chunks, self._get_executor().map(_scan_chunk, joined)):
+            results = [[] for _ in chunk]
+            for i, matches in flagged:
+                results[i] = [KeywordMatch._make(match) for match in matches]
+            yield from results
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
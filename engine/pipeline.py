@@ -0,0 +1,254 @@
+"""
+Streaming review analysis
+
+Analyzes Apify results page by page as they arrive instead of collecting
+every item into a list first:
+- restaurant-level fields (title, address, totalScore...) are split off
+  each item and kept once per restaurant
+- each review is scanned for keywords as soon as its page arrives, unless
+  it is a near-copy of an earlier review of the same restaurant
+  (engine/dedup.py). Copies are counted separately and not analyzed; only
+  a copy with different text (e.g. the translation) of a review without
+  mentions is scanned, and a mention it has counts for that review.
+- only running totals and one small fingerprint per review are kept, and
+  fingerprints only for the MAX_PLACES_IN_MEMORY restaurants seen most
+  recently: older ones are moved to a temporary SQLite file and loaded back
+  if more of their reviews arrive (archived pages mix restaurants), so
+  memory stays low however many reviews come through
+- with a DetectionPool (engine/parallel.py), each page is scanned by the
+  worker processes while this process checks and counts the results -
+  worth it for large pages, e.g. re-analyzing the raw archive
+
+Usage:
+    for kind, data in stream_analysis(pages):
+        if kind == 'flagged':
+            print(data['matched_keywords'])
+"""
+
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from itertools import repeat
+
+from api.apify_client import split_item
+from engine.dedup import Deduplicator, Fingerprint
+from engine.detector import DEFAULT_DETECTOR, highest_confidence
+from engine.processor import MentionStats
+from utils import metrics
+from utils.dates import month_key, resolve_published_at
+
+# Event kinds yielded by stream_analysis()
+RESTAURANT = 'restaurant'   # first time a restaurant is seen: restaurant fields
+FLAGGED = 'flagged'         # a review with mentions: review fields + matches
+SUMMARY = 'summary'         # once at the end: per-restaurant totals
+
+# Marks the end of the results in _timed()
+_DONE = object()
+
+# Restaurants whose review fingerprints are kept in memory at once
+MAX_PLACES_IN_MEMORY = 64
+
+
+def _timed(results, elapsed):
+    """Yield from results, adding the seconds spent waiting for each one to elapsed[0]"""
+    results = iter(results)
+    while True:
+        start = time.perf_counter()
+        value = next(results, _DONE)
+        elapsed[0] += time.perf_counter() - start
+        if value is _DONE:
+            return
+        yield value
+
+
+def _new_totals():
+    return {
+        'analyzed_reviews_count': 0,
+        'duplicate_reviews_count': 0,
+        'total_mentions': 0,
+        'monthly_timeline': {},
+        'newest_review': None,
+        'oldest_review': None,
+    }
+
+
+class _RecentPlaces:
+    """
+    Duplicate indexes and unflagged-review checksums of the restaurants seen
+    most recently
+
+    Less recent restaurants are moved to a private temporary SQLite database
+    (created on first use, deleted by close()) and loaded back when more of
+    their reviews arrive.
+    """
+
+    def __init__(self, max_places=MAX_PLACES_IN_MEMORY):
+        self.dedup = Deduplicator()
+        self.max_places = max_places
+        self._unflagged = OrderedDict()     # place_id -> {review id: checksum}, least recent first
+        self._saved = set()
+        self._conn = None
+
+    def use(self, place_id):
+        """
+        Get a restaurant ready for dedup.check()
+
+        Returns:
+            Dictionary of review id -> checksum of its text, for the
+            restaurant's unique reviews without mentions
+        """
+        unflagged = self._unflagged.get(place_id)
+        if unflagged is not None:
+            self._unflagged.move_to_end(place_id)
+            return unflagged
+
+        unflagged = self._unflagged[place_id] = self._load(place_id) if place_id in self._saved else {}
+        if len(self._unflagged) > self.max_places:
+            self._save(*self._unflagged.popitem(last=False))
+        return unflagged
+
+    def _save(self, place_id, unflagged):
+        if self._conn is None:
+            # An empty path gives a temporary database that is deleted on close
+            self._conn = sqlite3.connect('')
+            self._conn.execute("CREATE TABLE fingerprints (place_id TEXT, review_id TEXT, "
+                               "signature BLOB, author TEXT, short INTEGER, checksum INTEGER)")
+            self._conn.execute("CREATE INDEX idx_place ON fingerprints (place_id)")
+        # Only indexed reviews can be the original of a copy, so the other
+        # checksums are dropped
+        index = self.dedup.release(place_id)
+        self._conn.executemany(
+            "INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+            ((place_id, key, fingerprint.signature, fingerprint.author, int(fingerprint.short),
+              unflagged.get(key)) for key, fingerprint in (index.items() if index else ()))
+        )
+        self._saved.add(place_id)
+
+    def _load(self, place_id):
+        index = self.dedup.index(place_id)
+        unflagged = {}
+        rows = self._conn.execute(
+            "SELECT review_id, signature, author, short, checksum FROM fingerprints "
+            "WHERE place_id = ? ORDER BY rowid", (place_id,)
+        )
+        for review_id, signature, author, short, checksum in rows:
+            index.add(review_id, Fingerprint(signature, author, bool(short)))
+            if checksum is not None:
+                unflagged[review_id] = checksum
+        self._conn.execute("DELETE FROM fingerprints WHERE place_id = ?", (place_id,))
+        self._saved.discard(place_id)
+        return unflagged
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def stream_analysis(pages, detector=None, pool=None):
+    """
+    Detect and aggregate food poisoning mentions page by page
+
+    Args:
+        pages: Iterable of lists of Apify review items
+               (e.g. iter_dataset_pages(...))
+        detector: Detector to use (defaults to the built-in keyword list)
+        pool: Optional DetectionPool to scan every page with (its detector
+              is used instead)
+
+    Yields:
+        (kind, data) tuples:
+            ('restaurant', restaurant fields) once per restaurant
+            ('flagged', review with 'matched_keywords', 'matched_categories'
+                        and 'confidence') for every flagged review
+            ('summary', {place_id: totals}) once, after the last page
+    """
+    detector = pool.detector if pool is not None else detector or DEFAULT_DETECTOR
+    places = _RecentPlaces()
+    totals = {}
+    stats = {}      # place_id -> MentionStats (monthly buckets kept as integers)
+
+    try:
+        for page in pages:
+            # Detection time is summed per page (when profiling) rather than
+            # timed review by review
+            profiling = metrics.is_enabled()
+            detect_seconds = 0.0
+            duplicates = 0
+            texts = [item.get('text') for item in page]
+            fingerprints = places.dedup.fingerprints(texts, [item.get('name') for item in page])
+            # With a pool every review is scanned up front, copies included;
+            # the time spent waiting for the workers counts as detection
+            pool_seconds = [0.0]
+            if pool is None:
+                scans = repeat(None)
+            elif profiling:
+                scans = _timed(pool.scan_many(texts), pool_seconds)
+            else:
+                scans = pool.scan_many(texts)
+            for item, fingerprint, scanned in zip(page, fingerprints, scans):
+                restaurant, review = split_item(item)
+                place_id = restaurant.get('placeId')
+                unflagged = places.use(place_id)
+
+                if place_id not in totals:
+                    totals[place_id] = _new_totals()
+                    stats[place_id] = MentionStats()
+                    yield RESTAURANT, restaurant
+
+                place_totals = totals[place_id]
+                text = review.get('text') or ''
+                original = places.dedup.check(place_id, review.get('reviewId'), fingerprint)
+                if original is not None:
+                    place_totals['duplicate_reviews_count'] += 1
+                    duplicates += 1
+                    checksum = unflagged.get(original)
+                    if checksum is None or checksum == zlib.crc32(text.encode('utf-8')):
+                        continue
+                    matches = scanned if scanned is not None else detector.scan(text)
+                    if not matches:
+                        continue
+                    # The original had no mentions; its translation does
+                    del unflagged[original]
+                    stats[place_id].add_mention(resolve_published_at(review))
+                else:
+                    place_totals['analyzed_reviews_count'] += 1
+
+                    published = review.get('publishedAtDate')
+                    if published:
+                        if place_totals['newest_review'] is None or published > place_totals['newest_review']:
+                            place_totals['newest_review'] = published
+                        if place_totals['oldest_review'] is None or published < place_totals['oldest_review']:
+                            place_totals['oldest_review'] = published
+
+                    if scanned is not None:
+                        matches = scanned
+                    elif profiling:
+                        start = time.perf_counter()
+                        matches = detector.scan(text)
+                        detect_seconds += time.perf_counter() - start
+                    else:
+                        matches = detector.scan(text)
+                    stats[place_id].add(review, flagged=bool(matches))
+                    if not matches:
+                        unflagged[review.get('reviewId')] = zlib.crc32(text.encode('utf-8'))
+                        continue
+
+                place_totals['total_mentions'] += 1
+
+                review['matched_keywords'] = [m.keyword for m in matches]
+                review['matched_categories'] = sorted({m.category for m in matches})
+                review['confidence'] = highest_confidence(matches)
+                metrics.count('reviews_flagged_total')
+                yield FLAGGED, review
+
+            metrics.observe('detect_seconds', detect_seconds + pool_seconds[0], stage='stream')
+            metrics.count('reviews_analyzed_total', len(page) - duplicates)
+            metrics.count('reviews_duplicate_total', duplicates)
+    finally:
+        places.close()
+
+    for place_id, place_stats in stats.items():
+        totals[place_id]['monthly_timeline'] = place_stats.timeline(label=month_key)
+    yield SUMMARY, totals
@@ -0,0 +1,164 @@
+"""
+KPI and timeline calculation for flagged reviews
+
+Every review's publish date is resolved ONCE, when it is added, into an
+integer month bucket (see utils/dates.py). MentionStats then keeps running
+counts per month and per day, so the dashboard numbers are read straight
+from those counters instead of re-parsing and re-formatting every flagged
+review on each render:
+    timeline()  -> mentions per month
+    kpis()      -> total mentions, last 6 months, this month
+
+Usage:
+    stats = MentionStats()
+    for review in reviews:
+        stats.add(review, flagged=is_flagged)
+    print(stats.kpis(), stats.timeline())
+"""
+
+import time
+from datetime import datetime, timezone
+
+from utils.dates import month_bucket, month_label, resolve_published_at
+
+# Window for the "last 6 months" KPI (matches the PRD's 180 days)
+RECENT_DAYS = 180
+
+SECONDS_PER_DAY = 86400
+
+
+class MentionStats:
+    """
+    Running mention counts for one restaurant
+
+    Counts are updated as each review is added, so reviews can be fed in
+    page by page and the KPIs read at any point.
+    """
+
+    def __init__(self):
+        self.total_reviews = 0
+        self.total_mentions = 0
+        self.undated_mentions = 0
+        self.mentions_by_month = {}    # month bucket -> flagged reviews
+        self.mentions_by_day = {}      # days since 1970 -> flagged reviews
+
+    def add(self, review, flagged, now=None):
+        """
+        Count one analyzed review
+
+        Args:
+            review: Review dictionary or Review record
+            flagged: True if the review mentions food poisoning
+            now: Reference epoch seconds for relative publish times
+
+        Returns:
+            The review's publish time as epoch seconds (None if unknown)
+        """
+        self.total_reviews += 1
+        published_at = resolve_published_at(review, now)
+        if flagged:
+            self.add_mention(published_at)
+        return published_at
+
+    def add_mention(self, published_at):
+        """
+        Count one flagged review whose publish time is already known
+
+        Args:
+            published_at: Epoch seconds (None if unknown)
+        """
+        self.total_mentions += 1
+        if published_at is None:
+            self.undated_mentions += 1
+            return
+
+        month = month_bucket(published_at)
+        self.mentions_by_month[month] = self.mentions_by_month.get(month, 0) + 1
+        day = published_at // SECONDS_PER_DAY
+        self.mentions_by_day[day] = self.mentions_by_day.get(day, 0) + 1
+
+    def kpis(self, now=None):
+        """
+        Return the dashboard KPIs
+
+        Args:
+            now: Reference epoch seconds (defaults to the current time)
+
+        Returns:
+            Dictionary with 'total_mentions', 'mentions_last_6_months' and
+            'mentions_this_month'
+        """
+        if now is None:
+            now = time.time()
+        first_recent_day = int(now) // SECONDS_PER_DAY - RECENT_DAYS
+
+        return {
+            'total_mentions': self.total_mentions,
+            'mentions_last_6_months': sum(count for day, count in self.mentions_by_day.items()
+                                          if day >= first_recent_day),
+            'mentions_this_month': self.mentions_by_month.get(month_bucket(int(now)), 0),
+        }
+
+    def timeline(self, label=month_label):
+        """
+        Return mentions per month, oldest first
+
+        Args:
+            label: Function that formats a month bucket (default 'Jan 2025')
+
+        Returns:
+            Dictionary of month label -> mentions
+        """
+        return {label(month): self.mentions_by_month[month]
+                for month in sorted(self.mentions_by_month)}
+
+
+def parse_review_date(review, now=None):
+    """
+    Convert a review's publish time to a timezone-aware UTC datetime
+
+    Uses the exact 'publishedAtDate'/'publishTime' when present and only
+    falls back to the relative description ("2 months ago") otherwise.
+
+    Returns:
+        datetime, or None if the review has no usable date
+    """
+    published_at = resolve_published_at(review, now)
+    if published_at is None:
+        return None
+    return datetime.fromtimestamp(published_at, tz=timezone.utc)
+
+
+def calculate_kpis(flagged_reviews, now=None):
+    """
+    Calculate total mentions and mentions in the last 6 months
+
+    Args:
+        flagged_reviews: List of flagged review dictionaries or records
+        now: Reference epoch seconds (defaults to the current time)
+
+    Returns:
+        Dictionary with 'total_mentions', 'mentions_last_6_months' and
+        'mentions_this_month'
+    """
+    stats = MentionStats()
+    for review in flagged_reviews:
+        stats.add(review, flagged=True, now=now)
+    return stats.kpis(now)
+
+
+def generate_timeline(flagged_reviews, now=None):
+    """
+    Group mentions by month for the timeline chart
+
+    Args:
+        flagged_reviews: List of flagged review dictionaries or records
+        now: Reference epoch seconds for relative publish times
+
+    Returns:
+        Dictionary of 'Jan 2025' style labels -> mentions, oldest first
+    """
+    stats = MentionStats()
+    for review in flagged_reviews:
+        stats.add(review, flagged=True, now=now)
+    return stats.timeline()
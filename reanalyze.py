@@ -0,0 +1,161 @@
+"""
+Re-run food poisoning detection over the raw response archive
+Usage: python reanalyze.py --days 365
+
+Every page of reviews fetched from Apify is kept in a compressed archive
+(storage/archive.py). After changing the keyword list
+(engine/keywords.py) run this script to see what the new list finds in
+everything fetched so far - it reads the archive from disk and makes no
+network calls, so nothing is scraped (or paid for) again.
+
+Reviews that were fetched more than once (e.g. by overlapping syncs) and
+translated copies are counted once, just like in a live scrape. Detection
+is spread over one worker process per core.
+"""
+
+import sys
+import time
+import argparse
+
+from utils import metrics
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Archive chunks are joined into pages this large, so each page keeps every
+# worker process busy
+PAGE_SIZE = 20_000
+
+
+def format_bytes(size):
+    """Format a byte count as e.g. '12.3 MB'"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_stats(archive):
+    """Print what the archive holds, per kind of record"""
+    summary = archive.stats()
+    print(f"\n🗄️  RAW ARCHIVE ({archive.path})")
+    print("=" * 60)
+    if not summary:
+        print("   (empty)")
+    for kind, totals in summary.items():
+        ratio = totals['raw_bytes'] / totals['stored_bytes'] if totals['stored_bytes'] else 0
+        first = time.strftime('%Y-%m-%d', time.localtime(totals['first']))
+        last = time.strftime('%Y-%m-%d', time.localtime(totals['last']))
+        print(f"   {kind:<16} {totals['records']:>10,} records in {totals['chunks']:,} chunks  "
+              f"{format_bytes(totals['stored_bytes'])} ({ratio:.1f}x smaller)  {first} → {last}")
+    print()
+
+
+def print_summary(restaurants, totals, top):
+    """Print the restaurants with the most mentions"""
+    ranked = sorted(totals.items(), key=lambda entry: entry[1]['total_mentions'], reverse=True)
+    print("\n🚨 TOP RESTAURANTS BY MENTIONS")
+    print("=" * 60)
+    shown = 0
+    for place_id, place_totals in ranked:
+        if not place_totals['total_mentions'] or shown == top:
+            break
+        shown += 1
+        title = restaurants.get(place_id, {}).get('title') or place_id
+        print(f"{shown:>3}. {title}")
+        print(f"     ⚠️  {place_totals['total_mentions']} mention(s) in "
+              f"{place_totals['analyzed_reviews_count']:,} reviews")
+    if not shown:
+        print("   No mentions found")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Re-run detection over archived reviews (no API calls)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python reanalyze.py
+  python reanalyze.py --days 30 --top 50
+  python reanalyze.py --all --flagged
+  python reanalyze.py --stats
+        """
+    )
+    parser.add_argument('--days', type=float, default=365,
+                        help='Only reviews fetched in the last N days (default: 365)')
+    parser.add_argument('--all', action='store_true', help='Every archived review, however old')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Restaurants to list (default: 20)')
+    parser.add_argument('--flagged', action='store_true', help='Also print every flagged review')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for detection (default: one per core)')
+    parser.add_argument('--stats', action='store_true', help='Only show what the archive holds')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Time every stage and print a profile; optionally save it '
+                             '(.json for JSON, anything else for Prometheus text)')
+
+    args = parser.parse_args()
+
+    if args.profile:
+        metrics.enable()
+
+    # Imported after parsing so --help stays fast
+    from dotenv import load_dotenv
+    from engine.parallel import DetectionPool
+    from engine.pipeline import stream_analysis, RESTAURANT, FLAGGED, SUMMARY
+    from storage.archive import APIFY_REVIEWS, RawArchive
+
+    # The archive location may be set in .env (RAW_ARCHIVE_PATH)
+    load_dotenv()
+
+    archive = RawArchive()
+    if args.stats:
+        print_stats(archive)
+        return
+
+    since = None if args.all else time.time() - args.days * SECONDS_PER_DAY
+    chunks = archive.chunks(APIFY_REVIEWS, since=since)
+    if not chunks:
+        print("❌ No archived reviews yet - they are archived as they are fetched "
+              "(sync_reviews.py, refresh.py, test_apify.py)")
+        sys.exit(1)
+
+    print(f"\n🔁 Re-analyzing up to {sum(chunk.records for chunk in chunks):,} archived reviews "
+          f"from {len(chunks):,} chunks...")
+
+    restaurants = {}
+    totals = {}
+    start = time.perf_counter()
+    with DetectionPool(args.workers) as pool:
+        pages = archive.pages(APIFY_REVIEWS, since=since, page_size=PAGE_SIZE)
+        for kind, data in stream_analysis(pages, pool=pool):
+            if kind == RESTAURANT:
+                restaurants[data.get('placeId')] = data
+            elif kind == FLAGGED and args.flagged:
+                print(f"🚨 {data.get('name', 'Anonymous')} ({data.get('publishedAtDate', 'N/A')}) - "
+                      f"{', '.join(data['matched_keywords'])}")
+            elif kind == SUMMARY:
+                totals = data
+    elapsed = time.perf_counter() - start
+
+    analyzed = sum(place_totals['analyzed_reviews_count'] for place_totals in totals.values())
+    duplicates = sum(place_totals['duplicate_reviews_count'] for place_totals in totals.values())
+    mentions = sum(place_totals['total_mentions'] for place_totals in totals.values())
+
+    print_summary(restaurants, totals, args.top)
+
+    print("\n" + "=" * 60)
+    print(f"✓ {analyzed:,} reviews from {len(totals):,} restaurants analyzed in {elapsed:.1f}s "
+          f"({analyzed / elapsed if elapsed else 0:,.0f}/s)")
+    if duplicates:
+        print(f"✓ Skipped {duplicates:,} duplicate reviews (re-fetched, translations / repeats)")
+    print(f"🚨 {mentions:,} reviews with food poisoning mentions")
+    print("=" * 60 + "\n")
+
+    if args.profile:
+        metrics.report(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Keep the stored restaurants fresh within a daily scraping budget
+Usage: python refresh.py --daily-budget 5
+
+Every restaurant synced with sync_reviews.py gets its own refresh interval:
+busy restaurants and ones with many food poisoning mentions are refreshed
+within hours, quiet ones every week or so (see api/refresh_scheduler.py).
+The most overdue restaurants are refreshed first, in packed parallel
+scraper runs, until the budget for the last 24 hours is spent.
+
+Runs until interrupted; use --once for a single round (e.g. from cron) or
+--plan to see the queue without scraping anything.
+"""
+
+import os
+import sys
+import argparse
+
+from api.limits import DEFAULT_DAILY_BUDGET, MAX_PARALLEL_RUNS, REFRESH_POLL_INTERVAL, URLS_PER_RUN
+
+
+def format_duration(seconds):
+    """Format seconds as e.g. '3.5h' or '6.0d'"""
+    hours = seconds / 3600
+    return f"{hours:.1f}h" if hours < 48 else f"{hours / 24:.1f}d"
+
+
+def print_plan(scheduler, limit):
+    """Print the refresh queue and what the next round would pick"""
+    candidates = scheduler.candidates()
+    picked = {candidate.url for candidate in scheduler.pick()}
+
+    print(f"\n📋 REFRESH QUEUE ({len(candidates)} restaurants, "
+          f"${scheduler.remaining_budget():.2f} of ${scheduler.daily_budget:.2f} left today)")
+    print("=" * 60)
+    for candidate in candidates[:limit]:
+        marker = "▶️ " if candidate.url in picked else "  "
+        print(f"{marker} {candidate.url}")
+        print(f"     priority {candidate.priority:.2f}  last sync {format_duration(candidate.age)} ago  "
+              f"every {format_duration(candidate.interval)}")
+        print(f"     {candidate.velocity:.2f} reviews/day  {candidate.flag_rate:.0%} flagged  "
+              f"~{candidate.expected_reviews:.0f} new  (max {candidate.max_reviews}, "
+              f"≤ ${candidate.max_cost:.3f})")
+    print(f"\n▶️  Next round: {len(picked)} restaurant(s)\n")
+
+
+def print_result(result):
+    """Print one refreshed restaurant"""
+    if result['error']:
+        print(f"❌ {result['url']}: {result['error']}")
+        return
+    print(f"📥 {result['url']}: fetched {result['fetched']}, new {result['added']}, "
+          f"~${result['estimated_cost']:.3f}")
+
+
+async def run(scheduler, args):
+    """Run one round or keep going until interrupted"""
+    if args.once:
+        results = await scheduler.run_once()
+        for result in results:
+            print_result(result)
+        if not results:
+            print("✅ Nothing due (or no budget left)")
+        return
+    await scheduler.run_forever(poll_interval=args.poll_minutes * 60, on_result=print_result)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Refresh stored restaurants by priority, within a daily scraping budget',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python refresh.py --plan
+  python refresh.py --once --daily-budget 2.50
+  python refresh.py --daily-budget 10 --parallel-runs 8
+        """
+    )
+    parser.add_argument('--daily-budget', type=float, default=DEFAULT_DAILY_BUDGET,
+                        help=f'Dollars to spend per rolling 24 hours (default: {DEFAULT_DAILY_BUDGET:.2f})')
+    parser.add_argument('--parallel-runs', type=int, default=MAX_PARALLEL_RUNS,
+                        help=f'Scraper runs in flight at once (default: {MAX_PARALLEL_RUNS})')
+    parser.add_argument('--urls-per-run', type=int, default=URLS_PER_RUN,
+                        help=f'Restaurants packed into one scraper run (default: {URLS_PER_RUN})')
+    parser.add_argument('--poll-minutes', type=float, default=REFRESH_POLL_INTERVAL / 60,
+                        help=f'Minutes between rounds (default: {REFRESH_POLL_INTERVAL // 60})')
+    parser.add_argument('--once', action='store_true', help='Run a single round and exit')
+    parser.add_argument('--plan', nargs='?', type=int, const=20, metavar='N',
+                        help='Show the top N of the queue (default 20) without scraping')
+
+    args = parser.parse_args()
+
+    # Imported after parsing so --help stays fast
+    import asyncio
+    from dotenv import load_dotenv
+    from api.refresh_scheduler import RefreshScheduler
+    from storage.review_store import ReviewStore
+
+    load_dotenv()
+
+    api_key = os.getenv('APIFY_API_KEY')
+    if not api_key and args.plan is None:
+        print("❌ ERROR: APIFY_API_KEY not found in .env file")
+        sys.exit(1)
+
+    store = ReviewStore()
+    scheduler = RefreshScheduler(store, api_key, daily_budget=args.daily_budget,
+                                 max_parallel_runs=args.parallel_runs, per_run=args.urls_per_run)
+
+    try:
+        if args.plan is not None:
+            print_plan(scheduler, args.plan)
+        else:
+            print(f"\n🔄 REFRESH SCHEDULER (${scheduler.remaining_budget():.2f} of "
+                  f"${args.daily_budget:.2f} left today)")
+            print("=" * 60)
+            asyncio.run(run(scheduler, args))
+    except KeyboardInterrupt:
+        print("\n⏸️  Stopped")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
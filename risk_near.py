@@ -0,0 +1,128 @@
+"""
+Find restaurants with recent food-poisoning mentions near a location
+Usage: python risk_near.py -8.6478 115.1385 --radius 2km
+
+Everything is answered from the local review store (storage/geo_index.py):
+no API key is needed and no API calls are made. Restaurants are known by
+their coordinates once their reviews have been synced (sync_reviews.py),
+or after importing a sweep catalogue (sweep_bali.py) with --import.
+"""
+
+import json
+import sys
+import time
+import argparse
+
+
+def parse_distance(text):
+    """Parse a distance like "2km", "500m" or "1500" (metres)"""
+    text = text.strip().lower()
+    try:
+        if text.endswith('km'):
+            return float(text[:-2]) * 1000
+        if text.endswith('m'):
+            return float(text[:-1])
+        return float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a distance: {text!r} (e.g. 2km, 500m)")
+
+
+def parse_bbox(text):
+    """Parse "south,west,north,east" into four floats"""
+    try:
+        south, west, north, east = (float(part) for part in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a bounding box: {text!r} (south,west,north,east)")
+    return south, west, north, east
+
+
+def import_catalogue(store, path):
+    """Store the places (with coordinates) from a sweep_bali.py NDJSON catalogue"""
+    from api.models import Place
+
+    places = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                places.append(Place.from_places_api(json.loads(line)))
+            except ValueError:
+                continue    # skip a line cut short by an interruption
+    saved = store.save_places(places)
+    print(f"📥 Imported {saved} places from {path}")
+
+
+def print_results(results, elapsed, indexed):
+    """Print the ranked restaurants"""
+    print(f"\n🔎 {len(results)} restaurant(s) found among {indexed} located places "
+          f"in {elapsed * 1000:.1f} ms\n")
+    for rank, place in enumerate(results, 1):
+        distance = f"{place.distance_m / 1000:.2f} km" if place.distance_m is not None else ""
+        print(f"{rank:>3}. {place.name or place.place_id}")
+        print(f"     ⚠️  {place.mentions} mention(s)   📍 {distance}  {place.address or ''}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Rank nearby restaurants by recent food-poisoning mentions (local data only)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python risk_near.py -8.6478 115.1385
+  python risk_near.py -8.6478 115.1385 --radius 500m --months 6
+  python risk_near.py --bbox=-8.72,115.15,-8.63,115.22 --limit 20
+  python risk_near.py --import bali_restaurants.ndjson -8.5069 115.2625 --min-mentions 0
+        """
+    )
+    parser.add_argument('latitude', nargs='?', type=float, help='Latitude of the location')
+    parser.add_argument('longitude', nargs='?', type=float, help='Longitude of the location')
+    parser.add_argument('--radius', type=parse_distance, default='2km',
+                        help='Search radius, e.g. 2km or 500m (default: 2km)')
+    parser.add_argument('--bbox', type=parse_bbox,
+                        help='Search a box instead: south,west,north,east')
+    parser.add_argument('--months', type=int, default=1,
+                        help='Count mentions in this many calendar months (default: 1 = this month)')
+    parser.add_argument('--min-mentions', type=int, default=1,
+                        help='Hide restaurants with fewer mentions (default: 1; 0 lists all)')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20)')
+    parser.add_argument('--import', dest='catalogue', metavar='FILE',
+                        help='First store the places from a sweep_bali.py catalogue')
+
+    args = parser.parse_args()
+    if args.bbox is None and (args.latitude is None or args.longitude is None):
+        parser.error("give a latitude and longitude, or --bbox")
+
+    # Imported after parsing so --help stays fast
+    from dotenv import load_dotenv
+    from storage.geo_index import RiskMap
+    from storage.review_store import ReviewStore
+
+    # The store location may be set in .env (REVIEW_STORE_PATH)
+    load_dotenv()
+
+    store = ReviewStore()
+    if args.catalogue:
+        import_catalogue(store, args.catalogue)
+
+    risk = RiskMap(store)
+    if not len(risk):
+        print("❌ No restaurants with coordinates in the store yet - "
+              "sync some reviews or use --import with a sweep catalogue")
+        store.close()
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.bbox:
+        results = risk.in_bbox(*args.bbox, months=args.months, min_mentions=args.min_mentions,
+                               limit=args.limit)
+    else:
+        results = risk.near(args.latitude, args.longitude, radius_m=args.radius, months=args.months,
+                            min_mentions=args.min_mentions, limit=args.limit)
+    elapsed = time.perf_counter() - start
+
+    print_results(results, elapsed, len(risk))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
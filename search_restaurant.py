@@ -1,20 +1,21 @@
 """
 Search for a specific restaurant and view its reviews
 Usage: python search_restaurant.py "Restaurant Name"
+
+Start-up is kept short: heavy modules (dotenv, requests) are only imported
+once they are needed, so --help and lookups answered from the cache never
+load them.
 """
 
 import os
 import sys
-from dotenv import load_dotenv
-import requests
 import argparse
 
-# Load environment variables
-load_dotenv()
-
-# New Places API endpoints
-TEXT_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
-PLACE_DETAILS_URL = "https://places.googleapis.com/v1/places/{place_id}"
+from api.cache import ResponseCache
+from api.google_maps_client import PlacesApiError, search_places, get_place_details
+from api.field_masks import LISTING, FULL_REVIEWS, profile_fields
+from api.models import Place
+from utils import metrics
 
 def get_api_key():
     """Get API key from environment"""
@@ -24,98 +25,72 @@ def get_api_key():
         sys.exit(1)
     return api_key
 
-def search_restaurant(api_key, restaurant_name):
+def search_restaurant(api_key, restaurant_name, cache=None, offline=False):
     """
     Search for a restaurant by name
 
     Args:
         api_key: Google Maps API key
         restaurant_name: Name of the restaurant to search for
+        cache: Optional ResponseCache to reuse previous search results
+        offline: Only use cached results, never call the API
 
     Returns:
-        List of matching restaurants
+        List of matching restaurants (Place records)
     """
     print(f"\n🔍 Searching for: '{restaurant_name}'")
     print("=" * 60)
 
-    # Request body - you can modify locationBias to search in different areas
-    request_body = {
-        "textQuery": restaurant_name,
-        "locationBias": {
-            "circle": {
-                "center": {
-                    "latitude": -8.6705,  # Bali coordinates
-                    "longitude": 115.2126
-                },
-                "radius": 50000.0  # 50km radius to cover more of Bali
-            }
-        }
-    }
-
-    # Headers with field mask
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": api_key,
-        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.rating,places.userRatingCount"
-    }
-
+    # Searches within 50km of central Bali (see BALI_LOCATION_BIAS) -
+    # pass location_bias to search_places() to search a different area.
+    # Only the listing fields are requested (no reviews)
     try:
-        response = requests.post(TEXT_SEARCH_URL, headers=headers, json=request_body)
-
-        if response.status_code == 200:
-            data = response.json()
-            places = data.get('places', [])
-
-            if places:
-                print(f"✓ Found {len(places)} matching restaurant(s)\n")
-                return places
-            else:
-                print("❌ No restaurants found with that name")
-                return []
-        else:
-            print(f"❌ Search failed with status code: {response.status_code}")
-            print(f"Response: {response.text}")
-            return []
-
+        places = search_places(api_key, restaurant_name, cache=cache, offline=offline,
+                               profile=LISTING)
+    except PlacesApiError as e:
+        print(f"❌ {e}")
+        if e.response_text:
+            print(f"Response: {e.response_text}")
+        return []
     except Exception as e:
         print(f"❌ Error during search: {e}")
         return []
 
-def get_restaurant_reviews(api_key, place):
+    if places:
+        print(f"✓ Found {len(places)} matching restaurant(s)\n")
+        fields = profile_fields(LISTING)
+        return [Place.from_places_api(place, fields) for place in places]
+    else:
+        print("❌ No restaurants found with that name")
+        return []
+
+def get_restaurant_reviews(api_key, place, cache=None, offline=False):
     """
     Fetch detailed information and reviews for a specific restaurant
 
     Args:
         api_key: Google Maps API key
-        place: Place object from search results
+        place: Place record from search results
+        cache: Optional ResponseCache to reuse previous details responses
+        offline: Only use cached details, never call the API
 
     Returns:
-        Dictionary with restaurant details and reviews
+        Place record with restaurant details and reviews
     """
-    place_id = place.get('id')
-    place_name = place.get('displayName', {}).get('text', 'Unknown')
+    place_id = place.place_id
+    place_name = place.name or 'Unknown'
 
     print(f"\n📖 Fetching reviews for: {place_name}")
     print("=" * 60)
 
-    url = PLACE_DETAILS_URL.format(place_id=place_id)
-
-    # Request all review-related fields
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": api_key,
-        "X-Goog-FieldMask": "id,displayName,formattedAddress,rating,userRatingCount,reviews"
-    }
-
+    # Requests all review-related fields (see api/field_masks.py)
     try:
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"❌ Failed to fetch details: {response.status_code}")
-            return None
-
+        data = get_place_details(api_key, place_id, cache=cache, offline=offline,
+                                 profile=FULL_REVIEWS)
+        return Place.from_places_api(data, profile_fields(FULL_REVIEWS))
+    except PlacesApiError as e:
+        print(f"❌ {e}")
+        return None
     except Exception as e:
         print(f"❌ Error fetching reviews: {e}")
         return None
@@ -125,13 +100,13 @@ def display_restaurant_info(restaurant_data):
     Display restaurant information and reviews in a readable format
 
     Args:
-        restaurant_data: Dictionary with restaurant details
+        restaurant_data: Place record with restaurant details
     """
-    name = restaurant_data.get('displayName', {}).get('text', 'N/A')
-    address = restaurant_data.get('formattedAddress', 'N/A')
-    rating = restaurant_data.get('rating', 'N/A')
-    total_reviews = restaurant_data.get('userRatingCount', 0)
-    reviews = restaurant_data.get('reviews', [])
+    name = restaurant_data.name or 'N/A'
+    address = restaurant_data.address or 'N/A'
+    rating = restaurant_data.rating if restaurant_data.rating is not None else 'N/A'
+    total_reviews = restaurant_data.total_reviews or 0
+    reviews = restaurant_data.reviews
 
     print(f"\n{'=' * 60}")
     print(f"🍽️  {name}")
@@ -146,14 +121,12 @@ def display_restaurant_info(restaurant_data):
         print(f"{'=' * 60}\n")
 
         for i, review in enumerate(reviews, 1):
-            author = review.get('authorAttribution', {})
-            author_name = author.get('displayName', 'Anonymous')
-            rating_stars = review.get('rating', 'N/A')
-            time_desc = review.get('relativePublishTimeDescription', 'N/A')
+            author_name = review.author or 'Anonymous'
+            rating_stars = review.rating if review.rating is not None else 'N/A'
+            time_desc = review.relative_time or 'N/A'
 
-            # Get review text
-            review_text = review.get('originalText', {}).get('text',
-                         review.get('text', {}).get('text', 'No text provided'))
+            # Original-language text is preferred over the translation
+            review_text = review.text or 'No text provided'
 
             print(f"Review #{i}")
             print(f"{'-' * 60}")
@@ -177,6 +150,7 @@ Examples:
   python search_restaurant.py "Naughty Nuri's Warung"
   python search_restaurant.py "Locavore Ubud"
   python search_restaurant.py "pizza restaurants in Canggu"
+  python search_restaurant.py "Locavore Ubud" --profile profile.prom
         """
     )
 
@@ -192,17 +166,58 @@ Examples:
         help='Show all matching restaurants (default: show only first match)'
     )
 
+    # --no-cache and --offline contradict each other, so only allow one
+    cache_mode = parser.add_mutually_exclusive_group()
+
+    cache_mode.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always call the API instead of reusing cached responses'
+    )
+
+    cache_mode.add_argument(
+        '--offline',
+        action='store_true',
+        help='Only use cached responses, never call the API'
+    )
+
+    parser.add_argument(
+        '--latency',
+        action='store_true',
+        help='Print API latency per endpoint when finished'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='Time every stage and print a profile; optionally save it '
+             '(.json for JSON, anything else for Prometheus text)'
+    )
+
     # Parse arguments
     args = parser.parse_args()
 
+    # Load environment variables (after parsing, so --help doesn't pay for it)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if args.profile:
+        metrics.enable()
+
     print("\n🍴 RESTAURANT SEARCH & REVIEW TOOL")
     print("=" * 60)
 
-    # Get API key
-    api_key = get_api_key()
+    # Get API key (not needed when working purely from the cache)
+    api_key = None if args.offline else get_api_key()
+
+    # Cached responses make repeat lookups near-instant
+    cache = None if args.no_cache else ResponseCache()
 
     # Search for restaurant
-    places = search_restaurant(api_key, args.restaurant)
+    with metrics.timer('stage_seconds', stage='search'):
+        places = search_restaurant(api_key, args.restaurant, cache=cache, offline=args.offline)
 
     if not places:
         print("\nTry:")
@@ -215,10 +230,10 @@ Examples:
     if args.all:
         # Show brief info for all matches
         for i, place in enumerate(places, 1):
-            name = place.get('displayName', {}).get('text', 'N/A')
-            address = place.get('formattedAddress', 'N/A')
-            rating = place.get('rating', 'N/A')
-            review_count = place.get('userRatingCount', 0)
+            name = place.name or 'N/A'
+            address = place.address or 'N/A'
+            rating = place.rating if place.rating is not None else 'N/A'
+            review_count = place.total_reviews or 0
 
             print(f"\n{i}. {name}")
             print(f"   📍 {address}")
@@ -227,14 +242,26 @@ Examples:
         print(f"\n💡 Tip: Run without --all flag to see detailed reviews for the first match")
     else:
         # Get detailed reviews for the first match
-        restaurant_data = get_restaurant_reviews(api_key, places[0])
+        with metrics.timer('stage_seconds', stage='details'):
+            restaurant_data = get_restaurant_reviews(api_key, places[0],
+                                                     cache=cache, offline=args.offline)
 
         if restaurant_data:
-            display_restaurant_info(restaurant_data)
+            with metrics.timer('stage_seconds', stage='render'):
+                display_restaurant_info(restaurant_data)
 
             if len(places) > 1:
                 print(f"\n💡 Tip: Found {len(places)} matches. Use --all flag to see all matches")
 
+    if args.latency and 'api.http_client' in sys.modules:
+        # Only if a request was sent - importing the client just to report
+        # nothing would load requests for a fully cached run
+        from api.http_client import get_client
+        get_client().print_latency_report()
+
+    if args.profile:
+        metrics.report(args.profile)
+
     print("\n" + "=" * 60)
     print("✅ Done!")
     print("=" * 60 + "\n")
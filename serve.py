@@ -0,0 +1,76 @@
+"""
+Run the food safety lookup service
+Usage: python serve.py [--port 8080]
+
+Starts once and keeps HTTP connections, the response cache and the
+compiled keyword patterns warm, so each lookup skips the start-up cost
+of the one-shot scripts:
+
+    curl http://127.0.0.1:8080/restaurants/ChIJXxe2rXNH0i0Rnt_qeoqnQcc/safety
+    curl -X POST http://127.0.0.1:8080/batch -d '{"place_ids": ["ChIJ...", "ChIJ..."]}'
+
+See api/service.py for every endpoint.
+"""
+
+import os
+import sys
+import argparse
+
+from api.limits import DEFAULT_POOL_SIZE, SERVICE_HOST, SERVICE_PORT
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Serve food safety lookups over HTTP with warm caches',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python serve.py
+  python serve.py --host 0.0.0.0 --port 9000 --concurrency 40
+  python serve.py --no-cache
+        """
+    )
+
+    parser.add_argument('--host', default=SERVICE_HOST, help=f'Address to listen on (default: {SERVICE_HOST})')
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help=f'Port to listen on (default: {SERVICE_PORT})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_POOL_SIZE,
+                        help=f'Upstream fetches in flight at once (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the API instead of reusing cached responses')
+
+    args = parser.parse_args()
+
+    # Imported after parsing so --help stays fast
+    import asyncio
+    from dotenv import load_dotenv
+    from api.service import SafetyService
+
+    load_dotenv()
+
+    api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+    if not api_key:
+        print("❌ ERROR: GOOGLE_MAPS_API_KEY not found in .env file")
+        sys.exit(1)
+
+    service = SafetyService(api_key, cache=False if args.no_cache else None,
+                            max_concurrency=args.concurrency)
+
+    print("\n🛡️  FOOD SAFETY SERVICE")
+    print("=" * 60)
+    print(f"Listening on http://{args.host}:{args.port}")
+    print(f"Review store: {service.store_path or 'none (Place Details reviews only)'}")
+    print("\nPress Ctrl+C to stop")
+
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+    health = service.health()
+    print(f"\n✅ Stopped after {health['requests']} request(s), {health['fetches']} upstream fetch(es), "
+          f"{health['coalesced']} coalesced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Run a local stand-in for the Places API and Apify
+Usage: python standin_server.py [--port 8765] [--latency 0.05] [--error-rate 0.05]
+
+Then, in another terminal, point the scripts at it:
+    PLACES_API_URL=http://127.0.0.1:8765/v1 APIFY_API_URL=http://127.0.0.1:8765 \\
+        python search_restaurant.py "Locavore Ubud"
+
+Modes:
+    (default)  replay recorded fixtures, generate synthetic data otherwise
+    --record   forward to the real APIs and save every response as a fixture
+               (uses your real API keys and costs real money)
+"""
+
+import time
+import argparse
+
+from api.standin import StandInServer, DEFAULT_FIXTURES_DIR, SYNTHETIC_RUN_SECONDS, SYNTHETIC_APIFY_REVIEWS
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Serve a local stand-in for the Places API and Apify',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python standin_server.py
+  python standin_server.py --latency 0.2 --error-rate 0.05 --rate-limit-rate 0.1
+  python standin_server.py --record --fixtures .cache/fixtures
+        """
+    )
+
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR,
+                        help=f'Fixture directory (default: {DEFAULT_FIXTURES_DIR})')
+    parser.add_argument('--record', action='store_true',
+                        help='Forward requests to the real APIs and save the responses as fixtures')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Mean added delay per request in seconds (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of requests answered with a 503 (default: 0)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Share of requests answered with a 429 (default: 0)')
+    parser.add_argument('--seed', type=int, help='Random seed for the injected faults')
+    parser.add_argument('--run-seconds', type=float, default=SYNTHETIC_RUN_SECONDS,
+                        help=f'How long a synthetic Apify run takes (default: {SYNTHETIC_RUN_SECONDS:g})')
+    parser.add_argument('--apify-reviews', type=int, default=SYNTHETIC_APIFY_REVIEWS,
+                        help=f'Synthetic reviews per restaurant in an Apify run '
+                             f'(default: {SYNTHETIC_APIFY_REVIEWS})')
+
+    args = parser.parse_args()
+
+    # Loaded after parsing so --help stays fast (record mode needs the API keys)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    server = StandInServer(port=args.port, fixtures_dir=args.fixtures, record=args.record,
+                           latency=args.latency, error_rate=args.error_rate,
+                           rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+                           run_seconds=args.run_seconds, apify_reviews=args.apify_reviews)
+
+    print("\n🧪 PLACES API / APIFY STAND-IN")
+    print("=" * 60)
+    print(f"Mode: {'RECORD (real API calls!)' if args.record else 'replay + synthetic'}")
+    print(f"Fixtures: {args.fixtures}")
+    print(f"Faults: latency {args.latency:g}s, errors {args.error_rate:.0%}, "
+          f"429s {args.rate_limit_rate:.0%}")
+    print()
+    print(f"export PLACES_API_URL={server.places_url}")
+    print(f"export APIFY_API_URL={server.apify_url}")
+    print("\nPress Ctrl+C to stop")
+
+    start = time.perf_counter()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{count} {source}" for source, count in sorted(server.counts.items())) or "none"
+    print(f"\n✅ Served for {elapsed:.0f}s. Responses: {summary}")
+
+
+if __name__ == "__main__":
+    main()
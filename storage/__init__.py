@@ -0,0 +1,3 @@
+"""
+Local storage for fetched reviews
+"""
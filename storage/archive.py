@@ -0,0 +1,436 @@
+"""
+Append-only archive of raw API responses
+
+Every Places API response and every page of Apify review items is
+appended here as it arrives. Re-running the analysis later (new keywords,
+a tuned false-positive list) then reads the archive instead of paying for
+a re-scrape:
+
+    archive = get_archive()
+    for page in archive.pages(APIFY_REVIEWS, since=time.time() - 365 * 86400):
+        ...     # lists of Apify review items, as iter_dataset_pages() yields them
+
+Layout (one directory, default .cache/raw_archive):
+    <stamp>-<pid>.ndjson.zst   a segment: compressed chunks written back to back
+    <stamp>-<pid>.idx          its offset index: one JSON line per chunk
+                               (offset, length, kind, record count, fetch times)
+
+- records are buffered and written as chunks of about CHUNK_BYTES of NDJSON,
+  each compressed on its own, so a reader can decompress one chunk at a time
+- files are only ever appended to; each writing process has its own
+  segments, so several CLIs can archive at once without locking
+- readers memory-map a segment and decompress just the chunks the index
+  says they need (by kind and fetch time), one at a time
+
+Chunks are compressed with zstd when the zstandard package is installed,
+otherwise with zlib (the segment name ends in .zst or .zz). Readers handle
+both, so an archive keeps working when zstandard is added or removed.
+
+Set RAW_ARCHIVE_PATH to move the archive, or to "off" to stop archiving.
+"""
+
+import atexit
+import glob
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from utils import metrics
+
+# Default location of the archive (override with RAW_ARCHIVE_PATH)
+DEFAULT_ARCHIVE_PATH = os.path.join('.cache', 'raw_archive')
+
+# Kinds of record archived
+APIFY_REVIEWS = 'apify_reviews'         # Apify review items (one per review)
+PLACES_SEARCH = 'places_search'         # Text Search response pages
+PLACES_DETAILS = 'places_details'       # Place Details responses
+
+# Uncompressed NDJSON per chunk, and the size at which a new segment is started
+CHUNK_BYTES = 1024 * 1024
+SEGMENT_BYTES = 256 * 1024 * 1024
+
+# Buffered records are written at least this often (seconds), so a quiet
+# long-running process does not hold them in memory indefinitely
+FLUSH_INTERVAL = 60
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# One archived record: what it is, when it was fetched, where from, and the
+# raw JSON as the API returned it
+ArchiveRecord = namedtuple('ArchiveRecord', ['kind', 'fetched_at', 'source', 'data'])
+
+# One index entry: where a chunk is, what it holds and when it was fetched
+Chunk = namedtuple('Chunk', ['segment', 'offset', 'length', 'kind', 'records', 'first', 'last'])
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def _zstandard():
+    """Return the zstandard module, or None if it is not installed"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class _Codec:
+    """Compresses and decompresses whole chunks"""
+
+    def __init__(self, name):
+        self.name = name
+        if name == 'zstd':
+            zstandard = _zstandard()
+            if zstandard is None:
+                raise RuntimeError("This archive has zstd segments: pip install zstandard")
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    @property
+    def extension(self):
+        return '.ndjson.zst' if self.name == 'zstd' else '.ndjson.zz'
+
+    def compress(self, data):
+        if self.name == 'zstd':
+            return self._compressor.compress(data)
+        return zlib.compress(data, ZLIB_LEVEL)
+
+    def decompress(self, data):
+        if self.name == 'zstd':
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+
+def default_codec():
+    """'zstd' if the zstandard package is installed, otherwise 'zlib'"""
+    return 'zstd' if _zstandard() is not None else 'zlib'
+
+
+def _segment_codec(path):
+    return 'zstd' if path.endswith('.zst') else 'zlib'
+
+
+class RawArchive:
+    """
+    Append-only, chunked, compressed archive of raw API responses
+
+    Writing is thread-safe. Buffered records reach the disk when a chunk
+    fills up, on flush() or close(), FLUSH_INTERVAL after the oldest
+    buffered record, and when the process exits.
+
+    Usage:
+        archive = RawArchive()
+        archive.append(APIFY_REVIEWS, items, source=dataset_id)
+        archive.flush()
+        for page in archive.pages(APIFY_REVIEWS):
+            ...
+    """
+
+    def __init__(self, path=None, codec=None, chunk_bytes=CHUNK_BYTES, segment_bytes=SEGMENT_BYTES):
+        """
+        Args:
+            path: Archive directory (defaults to RAW_ARCHIVE_PATH or .cache/raw_archive)
+            codec: 'zstd' or 'zlib' for new chunks (defaults to zstd when installed)
+            chunk_bytes: Uncompressed bytes per chunk
+            segment_bytes: Compressed bytes per segment file before starting another
+        """
+        self.path = path or os.getenv('RAW_ARCHIVE_PATH') or DEFAULT_ARCHIVE_PATH
+        self.codec = _Codec(codec or default_codec())
+        self.chunk_bytes = chunk_bytes
+        self.segment_bytes = segment_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._buffers = {}          # kind -> [lines, byte count, first fetched_at, last fetched_at]
+        self._oldest = None         # when the oldest buffered record was appended
+        self._segment = None        # (segment file, index file) being written
+        self._codecs = {}           # codec name -> _Codec, for reading
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, kind, records, source=None, fetched_at=None):
+        """
+        Add raw records to the archive
+
+        Args:
+            kind: What the records are (APIFY_REVIEWS, PLACES_SEARCH, ...)
+            records: Iterable of JSON-serializable records (e.g. one page of items)
+            source: Where they came from (dataset id, place id, query...)
+            fetched_at: Epoch seconds they were fetched (defaults to now)
+
+        Returns:
+            Number of records added
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        lines = [json.dumps({'at': fetched_at, 'source': source, 'data': record},
+                            ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                 for record in records]
+        if not lines:
+            return 0
+
+        with self._lock:
+            buffer = self._buffers.get(kind)
+            if buffer is None:
+                buffer = self._buffers[kind] = [[], 0, fetched_at, fetched_at]
+            buffer[0].extend(lines)
+            buffer[1] += sum(len(line) for line in lines)
+            buffer[2] = min(buffer[2], fetched_at)
+            buffer[3] = max(buffer[3], fetched_at)
+            if self._oldest is None:
+                self._oldest = time.time()
+
+            if buffer[1] >= self.chunk_bytes:
+                self._write_chunk(kind)
+            if self._oldest is not None and time.time() - self._oldest >= FLUSH_INTERVAL:
+                self._flush_locked()
+
+        metrics.count('archive_records_total', len(lines), kind=kind)
+        return len(lines)
+
+    def flush(self):
+        """Write every buffered record to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush and close the segment being written"""
+        with self._lock:
+            self._flush_locked()
+            if self._segment is not None:
+                for f in self._segment:
+                    f.close()
+                self._segment = None
+        atexit.unregister(self.flush)
+
+    def _flush_locked(self):
+        for kind in list(self._buffers):
+            self._write_chunk(kind)
+        self._oldest = None
+
+    def _open_segment(self):
+        """Start a new segment file and its index"""
+        if self._segment is not None:
+            for f in self._segment:
+                f.close()
+        base = os.path.join(self.path, f"{time.time_ns()}-{os.getpid()}")
+        self._segment = (open(base + self.codec.extension, 'ab'), open(base + '.idx', 'ab'))
+
+    def _write_chunk(self, kind):
+        """Compress one kind's buffered lines into a chunk and index it"""
+        lines, size, first, last = self._buffers.pop(kind)
+        with metrics.timer('archive_write_seconds'):
+            compressed = self.codec.compress(b''.join(lines))
+
+            if self._segment is None or self._segment[0].tell() >= self.segment_bytes:
+                self._open_segment()
+            segment, index = self._segment
+
+            # Chunk first, index entry second: a crash in between leaves
+            # unindexed bytes that readers never look at
+            offset = segment.tell()
+            segment.write(compressed)
+            segment.flush()
+            entry = {'offset': offset, 'length': len(compressed), 'kind': kind, 'records': len(lines),
+                     'first': first, 'last': last, 'raw_bytes': size}
+            index.write(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n')
+            index.flush()
+        metrics.count('archive_bytes_total', len(compressed))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _segments(self):
+        """Return (segment path, index path) pairs, oldest first"""
+        pairs = []
+        for index_path in glob.glob(os.path.join(self.path, '*.idx')):
+            base = index_path[:-len('.idx')]
+            for extension in ('.ndjson.zst', '.ndjson.zz'):
+                if os.path.exists(base + extension):
+                    pairs.append((base + extension, index_path))
+                    break
+        # Names start with a nanosecond timestamp
+        pairs.sort(key=lambda pair: int(os.path.basename(pair[1]).split('-')[0]))
+        return pairs
+
+    def chunks(self, kind=None, since=None, until=None):
+        """
+        Read the offset index
+
+        Args:
+            kind: Only chunks of this kind (None = all)
+            since: Only chunks with records fetched at or after this epoch time
+            until: Only chunks with records fetched before this epoch time
+
+        Returns:
+            List of Chunk, in the order they were written (per segment)
+        """
+        # Records this process still holds in memory are readable too
+        self.flush()
+        found = []
+        for segment, index_path in self._segments():
+            with open(index_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue    # a line still being written
+                    if kind is not None and entry['kind'] != kind:
+                        continue
+                    if since is not None and entry['last'] < since:
+                        continue
+                    if until is not None and entry['first'] >= until:
+                        continue
+                    found.append(Chunk(segment, entry['offset'], entry['length'], entry['kind'],
+                                       entry['records'], entry['first'], entry['last']))
+        return found
+
+    def _decoder(self, segment):
+        name = _segment_codec(segment)
+        codec = self._codecs.get(name)
+        if codec is None:
+            codec = self._codecs[name] = _Codec(name)
+        return codec
+
+    def iter_chunks(self, chunks):
+        """
+        Decompress and decode chunks one at a time from memory-mapped segments
+
+        Only the chunk being decoded is ever held in memory uncompressed.
+
+        Args:
+            chunks: Chunk list from chunks()
+
+        Yields:
+            (Chunk, list of record dictionaries with 'at', 'source' and 'data')
+        """
+        by_segment = {}
+        for chunk in chunks:
+            by_segment.setdefault(chunk.segment, []).append(chunk)
+
+        for segment, segment_chunks in by_segment.items():
+            codec = self._decoder(segment)
+            with open(segment, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for chunk in segment_chunks:
+                        with metrics.timer('archive_read_seconds'):
+                            data = codec.decompress(view[chunk.offset:chunk.offset + chunk.length])
+                            # JSON never contains a raw newline, so the lines
+                            # become one array: a single decode per chunk
+                            # instead of one per record
+                            records = json.loads(b'[' + data.rstrip(b'\n').replace(b'\n', b',') + b']')
+                        yield chunk, records
+                finally:
+                    view.release()
+
+    def records(self, kind=None, since=None, until=None):
+        """
+        Stream archived records
+
+        Args:
+            kind: Only records of this kind (None = all)
+            since: Only records fetched at or after this epoch time
+            until: Only records fetched before this epoch time
+
+        Yields:
+            ArchiveRecord, in the order they were archived (per writing process)
+        """
+        for chunk, records in self.iter_chunks(self.chunks(kind, since, until)):
+            for record in records:
+                fetched_at = record['at']
+                if (since is None or fetched_at >= since) and (until is None or fetched_at < until):
+                    yield ArchiveRecord(chunk.kind, fetched_at, record['source'], record['data'])
+
+    def pages(self, kind=APIFY_REVIEWS, since=None, until=None, page_size=None):
+        """
+        Stream the raw records page by page
+
+        Args:
+            kind: Kind of record (defaults to Apify review items)
+            since: Only records fetched at or after this epoch time
+            until: Only records fetched before this epoch time
+            page_size: Join chunks into pages of at least this many records
+                       (None = one page per chunk)
+
+        Yields:
+            Lists of raw records, e.g. pages of Apify items for stream_analysis()
+        """
+        page = []
+        for _, records in self.iter_chunks(self.chunks(kind, since, until)):
+            if since is not None or until is not None:
+                records = [record for record in records
+                           if (since is None or record['at'] >= since) and (until is None or record['at'] < until)]
+            page.extend(record['data'] for record in records)
+            if page and len(page) >= (page_size or 1):
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def stats(self):
+        """
+        Summarize the archive
+
+        Returns:
+            Dictionary of kind -> {'chunks', 'records', 'raw_bytes', 'stored_bytes',
+            'first', 'last'}
+        """
+        summary = {}
+        for _, index_path in self._segments():
+            with open(index_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    totals = summary.setdefault(entry['kind'], {
+                        'chunks': 0, 'records': 0, 'raw_bytes': 0, 'stored_bytes': 0,
+                        'first': entry['first'], 'last': entry['last']})
+                    totals['chunks'] += 1
+                    totals['records'] += entry['records']
+                    totals['raw_bytes'] += entry.get('raw_bytes', 0)
+                    totals['stored_bytes'] += entry['length']
+                    totals['first'] = min(totals['first'], entry['first'])
+                    totals['last'] = max(totals['last'], entry['last'])
+        return summary
+
+
+def get_archive():
+    """
+    Return the process-wide shared RawArchive (created on first use)
+
+    Returns None when archiving is switched off (RAW_ARCHIVE_PATH=off).
+    """
+    global _archive
+    if os.getenv('RAW_ARCHIVE_PATH', '').lower() == 'off':
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = RawArchive()
+        return _archive
+
+
+def archive_raw(kind, records, source=None):
+    """
+    Append raw API records to the shared archive, if archiving is on
+
+    Never raises: a full disk must not lose a response that was already
+    paid for, so failures are only counted (archive_errors_total).
+    """
+    try:
+        archive = get_archive()
+        if archive is not None:
+            archive.append(kind, records, source=source)
+    except (OSError, ValueError, TypeError, RuntimeError):
+        metrics.count('archive_errors_total')
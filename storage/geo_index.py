@@ -0,0 +1,243 @@
+"""
+Geospatial index for "risk near me" questions
+
+Answers "which restaurants within 2 km of this villa have food-poisoning
+mentions this month" from local data only - no API calls:
+
+- restaurant coordinates come from the review store (scraped items carry
+  them, and a sweep catalogue can be imported with save_places())
+- places are bucketed into a fixed grid of small lat/lng cells, so a radius
+  or bounding-box query only looks at the handful of cells it overlaps
+  instead of every place in the catalogue
+- mention counts for just the places found are read from the monthly
+  counts the store keeps (primary-key lookups), then joined to them
+
+Usage:
+    risk = RiskMap(ReviewStore())
+    for place in risk.near(-8.6478, 115.1385, radius_m=2000):
+        print(place.name, place.mentions, round(place.distance_m))
+"""
+
+import math
+import time
+from collections import namedtuple
+
+from utils.dates import month_bucket
+
+# Grid cell size in degrees (~1.1 km at Bali's latitude). A 2 km radius
+# query then touches about 5 x 5 cells.
+DEFAULT_CELL_DEGREES = 0.01
+
+DEFAULT_RADIUS_M = 2000
+EARTH_RADIUS_M = 6_371_000
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# One restaurant in a query result. 'distance_m' is None for bounding-box
+# queries; 'mentions' counts flagged reviews in the requested months.
+NearbyPlace = namedtuple('NearbyPlace', ['place_id', 'name', 'address', 'latitude', 'longitude',
+                                         'distance_m', 'mentions'])
+
+
+def haversine_m(latitude1, longitude1, latitude2, longitude2):
+    """Return the great-circle distance between two points in metres"""
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """
+    Grid index of points (place ids with coordinates)
+
+    Usage:
+        index = GeoIndex()
+        index.add('ChIJ...', -8.6478, 115.1385)
+        index.within_radius(-8.65, 115.14, 2000)    # [(distance_m, 'ChIJ...')]
+    """
+
+    def __init__(self, cell_degrees=DEFAULT_CELL_DEGREES):
+        """
+        Args:
+            cell_degrees: Grid cell size in degrees
+        """
+        self.cell_degrees = cell_degrees
+        self._cells = {}        # (row, column) -> list of (latitude, longitude, key)
+        self._points = {}       # key -> (latitude, longitude)
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def add(self, key, latitude, longitude):
+        """
+        Add a point (or move it, if the key is already indexed)
+
+        Args:
+            key: Point identity, e.g. a place id
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+        """
+        if key in self._points:
+            self.remove(key)
+        self._points[key] = (latitude, longitude)
+        self._cells.setdefault(self._cell(latitude, longitude), []).append((latitude, longitude, key))
+
+    def remove(self, key):
+        """Remove a point (unknown keys are ignored)"""
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        entries = [entry for entry in self._cells[cell] if entry[2] != key]
+        if entries:
+            self._cells[cell] = entries
+        else:
+            del self._cells[cell]
+
+    def _candidates(self, south, west, north, east):
+        """Yield the points in every cell overlapping a bounding box"""
+        first_row, first_column = self._cell(south, west)
+        last_row, last_column = self._cell(north, east)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                yield from self._cells.get((row, column), ())
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Find the points inside a bounding box
+
+        Args:
+            south, west, north, east: Box edges in degrees
+
+        Returns:
+            List of keys
+        """
+        return [key for latitude, longitude, key in self._candidates(south, west, north, east)
+                if south <= latitude <= north and west <= longitude <= east]
+
+    def within_radius(self, latitude, longitude, radius_m):
+        """
+        Find the points within a distance of a location
+
+        Args:
+            latitude: Centre latitude in degrees
+            longitude: Centre longitude in degrees
+            radius_m: Radius in metres
+
+        Returns:
+            List of (distance in metres, key), nearest first
+        """
+        # Box around the circle: a degree of longitude shrinks away from the equator
+        lat_span = radius_m / METRES_PER_DEGREE
+        lng_span = radius_m / (METRES_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+
+        found = []
+        for point_lat, point_lng, key in self._candidates(latitude - lat_span, longitude - lng_span,
+                                                          latitude + lat_span, longitude + lng_span):
+            distance = haversine_m(latitude, longitude, point_lat, point_lng)
+            if distance <= radius_m:
+                found.append((distance, key))
+        found.sort(key=lambda hit: hit[0])
+        return found
+
+
+class RiskMap:
+    """
+    Restaurant coordinates from a ReviewStore, joined to their mention counts
+
+    The grid is built once, when the map is created; call refresh() after
+    new places have been stored. Mention counts are read on every query,
+    so new reviews show up straight away.
+    """
+
+    def __init__(self, store, cell_degrees=DEFAULT_CELL_DEGREES):
+        """
+        Args:
+            store: ReviewStore holding the restaurants and their reviews
+            cell_degrees: Grid cell size in degrees
+        """
+        self.store = store
+        self.cell_degrees = cell_degrees
+        self.index = None
+        self._places = {}
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the grid from the store's restaurant coordinates"""
+        index = GeoIndex(self.cell_degrees)
+        places = {}
+        for place_id, name, address, latitude, longitude in self.store.located_restaurants():
+            index.add(place_id, latitude, longitude)
+            places[place_id] = (name, address, latitude, longitude)
+        self.index = index
+        self._places = places
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def _since_month(months):
+        """First month bucket counted for the last `months` calendar months"""
+        return month_bucket(time.time()) - months + 1
+
+    def _rank(self, hits, months, min_mentions, limit):
+        """
+        Join (distance, place id) hits to their mention counts
+
+        Most mentions first, nearest first among equal counts.
+        """
+        mentions = self.store.mentions_by_place(since_month=self._since_month(months),
+                                                place_ids=[place_id for _, place_id in hits])
+        results = []
+        for distance, place_id in hits:
+            count = mentions.get(place_id, 0)
+            if count < min_mentions:
+                continue
+            name, address, latitude, longitude = self._places[place_id]
+            results.append(NearbyPlace(place_id, name, address, latitude, longitude, distance, count))
+
+        results.sort(key=lambda place: (-place.mentions, place.distance_m or 0.0))
+        return results[:limit] if limit else results
+
+    def near(self, latitude, longitude, radius_m=DEFAULT_RADIUS_M, months=1, min_mentions=1,
+             limit=None):
+        """
+        Restaurants within a radius, ranked by recent mentions
+
+        Args:
+            latitude: Centre latitude in degrees
+            longitude: Centre longitude in degrees
+            radius_m: Radius in metres
+            months: Count mentions in this many calendar months (1 = this month)
+            min_mentions: Leave out restaurants with fewer mentions (0 = list all)
+            limit: Maximum results (None = all)
+
+        Returns:
+            List of NearbyPlace, most mentions first (nearest first on ties)
+        """
+        hits = self.index.within_radius(latitude, longitude, radius_m)
+        return self._rank(hits, months, min_mentions, limit)
+
+    def in_bbox(self, south, west, north, east, months=1, min_mentions=1, limit=None):
+        """
+        Restaurants inside a bounding box, ranked by recent mentions
+
+        Args:
+            south, west, north, east: Box edges in degrees
+            months: Count mentions in this many calendar months (1 = this month)
+            min_mentions: Leave out restaurants with fewer mentions (0 = list all)
+            limit: Maximum results (None = all)
+
+        Returns:
+            List of NearbyPlace (distance_m is None), most mentions first
+        """
+        hits = [(None, place_id) for place_id in self.index.within_bbox(south, west, north, east)]
+        return self._rank(hits, months, min_mentions, limit)
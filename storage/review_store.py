@@ -0,0 +1,922 @@
+"""
+Local review store
+
+Keeps every review fetched from Apify in a SQLite database, so reviews are
+only ever paid for once. For each restaurant it also remembers a
+"high-water mark": the newest review seen so far. The next sync only asks
+the scraper for reviews after that mark.
+
+Detection results are stored next to each review, and the tables are
+indexed so the dashboard questions are index lookups instead of a re-fetch
+and re-scan:
+    "mentions this month"                  -> count_mentions(place_id, since=...)
+    "last 6 months"                        -> count_mentions(place_id, since=...)
+    ">N vomiting mentions in Ubud"         -> restaurants_with_mentions('vomiting', N, area='Ubud')
+    "mentions per month" (timeline chart)  -> monthly_mentions(place_id)
+
+Tables:
+    reviews          one row per review (de-duplicated by review id); a
+                     near-copy of an earlier review (e.g. its translation)
+                     is kept but marked duplicate_of, and never analyzed
+    review_fingerprints  MinHash fingerprint per unique review (engine/dedup.py)
+    review_matches   one row per keyword match (category, keyword, confidence)
+    restaurants      restaurant name/address/rating/coordinates from the
+                     scraper or a sweep catalogue (see storage/geo_index.py)
+    sync_state       per-restaurant high-water mark, last sync time and
+                     the restaurant's review count at that sync
+    refresh_spend    estimated scraping cost of every sync, for the
+                     refresh scheduler's daily budget (api/refresh_scheduler.py)
+    mention_months   flagged reviews per restaurant per month bucket, kept
+                     up to date as reviews are added
+    reviews_fts,     full-text indexes over review text and restaurant
+    restaurants_fts  name/address (only if SQLite has FTS5)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from engine.dedup import Deduplicator, Fingerprint
+from engine.detector import DEFAULT_DETECTOR
+from engine.keywords import CONFIDENCE_RANK
+from engine.parallel import DetectionPool
+from utils import metrics
+from utils.dates import month_bucket, resolve_published_at
+from utils.url_parser import extract_place_id
+
+# Default location of the review database (override with REVIEW_STORE_PATH)
+DEFAULT_STORE_PATH = os.path.join('.cache', 'reviews.sqlite3')
+
+
+def _fts5_available(conn):
+    """Return True if this SQLite build supports FTS5"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class ReviewStore:
+    """
+    SQLite-backed review store
+
+    Usage:
+        store = ReviewStore()
+        added = store.add_reviews('https://maps.app.goo.gl/...', items)
+        mark = store.get_high_water_mark('https://maps.app.goo.gl/...')
+    """
+
+    def __init__(self, path=None, detector=None):
+        self.path = path or os.getenv('REVIEW_STORE_PATH', DEFAULT_STORE_PATH)
+        self.detector = detector or DEFAULT_DETECTOR
+        self.dedup = Deduplicator()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.has_fts = _fts5_available(self.conn)
+        self._create_tables()
+
+    def _create_tables(self):
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master")}
+
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS reviews (
+                    review_id TEXT PRIMARY KEY,
+                    restaurant_key TEXT NOT NULL,
+                    place_id TEXT,
+                    published_at INTEGER,
+                    stars INTEGER,
+                    text TEXT,
+                    raw TEXT NOT NULL
+                )
+            """)
+
+            # Strongest match confidence (0 = no mention, NULL = not analyzed yet)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(reviews)")}
+            needs_analysis = 'confidence' not in columns
+            if needs_analysis:
+                self.conn.execute("ALTER TABLE reviews ADD COLUMN confidence INTEGER")
+
+            # Review id this review is a copy of (NULL = unique)
+            needs_dedup = 'duplicate_of' not in columns
+            if needs_dedup:
+                self.conn.execute("ALTER TABLE reviews ADD COLUMN duplicate_of TEXT")
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_fingerprints (
+                    review_id TEXT PRIMARY KEY,
+                    place_id TEXT,
+                    signature BLOB NOT NULL,
+                    author TEXT,
+                    short INTEGER NOT NULL
+                )
+            """)
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_matches (
+                    review_id TEXT NOT NULL,
+                    place_id TEXT,
+                    published_at INTEGER,
+                    category TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    confidence TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS restaurants (
+                    place_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    address TEXT,
+                    rating REAL,
+                    total_reviews INTEGER,
+                    updated_at REAL,
+                    latitude REAL,
+                    longitude REAL
+                )
+            """)
+            restaurant_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(restaurants)")}
+            for column in ('latitude', 'longitude'):
+                if column not in restaurant_columns:
+                    self.conn.execute(f"ALTER TABLE restaurants ADD COLUMN {column} REAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    restaurant_key TEXT PRIMARY KEY,
+                    place_id TEXT,
+                    last_published_at INTEGER,
+                    last_review_id TEXT,
+                    last_synced_at REAL,
+                    reviews_at_sync INTEGER
+                )
+            """)
+            sync_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sync_state)")}
+            if 'reviews_at_sync' not in sync_columns:
+                self.conn.execute("ALTER TABLE sync_state ADD COLUMN reviews_at_sync INTEGER")
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_spend (
+                    restaurant_key TEXT NOT NULL,
+                    spent_at REAL NOT NULL,
+                    fetched INTEGER NOT NULL,
+                    cost REAL NOT NULL
+                )
+            """)
+
+            # Month buckets are integers (months since January 1970, see utils/dates.py)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS mention_months (
+                    place_id TEXT NOT NULL,
+                    month INTEGER NOT NULL,
+                    mentions INTEGER NOT NULL,
+                    PRIMARY KEY (place_id, month)
+                )
+            """)
+
+            # Time-window lookups per restaurant
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_place_published "
+                              "ON reviews (place_id, published_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_key_published "
+                              "ON reviews (restaurant_key, published_at)")
+            # Keyword-category lookups, across restaurants or for one restaurant
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_category "
+                              "ON review_matches (category, published_at, place_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_place "
+                              "ON review_matches (place_id, published_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_review "
+                              "ON review_matches (review_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_place "
+                              "ON review_fingerprints (place_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_spend_time ON refresh_spend (spent_at)")
+
+            if self.has_fts:
+                self._create_fts_tables()
+
+        # Stores created before de-duplication get their copies marked first,
+        # so a full detection pass below never scans them
+        if needs_dedup:
+            self.deduplicate()
+
+        # Stores created before detection results were kept need one full pass;
+        # stores created before monthly counts were kept just need counting
+        if needs_analysis:
+            self.reanalyze()
+        elif 'mention_months' not in existing:
+            with self.conn:
+                self._rebuild_mention_months()
+
+    def _create_fts_tables(self):
+        """Full-text indexes kept in sync with their tables by triggers"""
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master")}
+
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts
+            USING fts5(text, content='reviews', content_rowid='rowid')
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS reviews_fts_insert AFTER INSERT ON reviews BEGIN
+                INSERT INTO reviews_fts (rowid, text) VALUES (new.rowid, new.text);
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS reviews_fts_delete AFTER DELETE ON reviews BEGIN
+                INSERT INTO reviews_fts (reviews_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END
+        """)
+
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS restaurants_fts
+            USING fts5(name, address, content='restaurants', content_rowid='rowid')
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS restaurants_fts_insert AFTER INSERT ON restaurants BEGIN
+                INSERT INTO restaurants_fts (rowid, name, address) VALUES (new.rowid, new.name, new.address);
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS restaurants_fts_update AFTER UPDATE ON restaurants BEGIN
+                INSERT INTO restaurants_fts (restaurants_fts, rowid, name, address)
+                    VALUES ('delete', old.rowid, old.name, old.address);
+                INSERT INTO restaurants_fts (rowid, name, address) VALUES (new.rowid, new.name, new.address);
+            END
+        """)
+
+        # Index rows that were stored before the full-text tables existed
+        for table in ('reviews_fts', 'restaurants_fts'):
+            if table not in existing:
+                self.conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def get_high_water_mark(self, restaurant_key):
+        """
+        Return the newest review stored for a restaurant
+
+        Args:
+            restaurant_key: Identifier the restaurant was synced under
+
+        Returns:
+            Tuple of (published_at epoch seconds, review id), or None if the
+            restaurant has never been synced
+        """
+        row = self.conn.execute(
+            "SELECT last_published_at, last_review_id FROM sync_state WHERE restaurant_key = ?",
+            (restaurant_key,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return row[0], row[1]
+
+    def get_place_id(self, restaurant_key):
+        """Return the Google place id recorded for a synced restaurant (or None)"""
+        row = self.conn.execute(
+            "SELECT place_id FROM sync_state WHERE restaurant_key = ?", (restaurant_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save_matches(self, review_id, place_id, published_at, text, matches=None):
+        """
+        Run detection on one review and store the results; returns the confidence rank
+
+        Pass `matches` when the review was already scanned (e.g. by a DetectionPool).
+        """
+        if matches is None:
+            matches = self.detector.scan(text or '')
+        self.conn.executemany(
+            "INSERT INTO review_matches "
+            "(review_id, place_id, published_at, category, keyword, confidence) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(review_id, place_id, published_at, m.category, m.keyword.lower(), m.confidence)
+             for m in matches]
+        )
+        return max((CONFIDENCE_RANK[m.confidence] for m in matches), default=0)
+
+    def _count_mention(self, place_id, published_at):
+        """Add one flagged review to its restaurant's monthly count"""
+        # Without a place id there is no restaurant to count it for (and
+        # mention_months.place_id is NOT NULL)
+        if place_id is None or published_at is None:
+            return
+        self.conn.execute(
+            "INSERT INTO mention_months (place_id, month, mentions) VALUES (?, ?, 1) "
+            "ON CONFLICT(place_id, month) DO UPDATE SET mentions = mentions + 1",
+            (place_id, month_bucket(published_at))
+        )
+
+    def _rebuild_mention_months(self):
+        """Recount mention_months from the stored detection results"""
+        self.conn.execute("DELETE FROM mention_months")
+        rows = self.conn.execute(
+            "SELECT place_id, published_at FROM reviews "
+            "WHERE confidence > 0 AND published_at IS NOT NULL"
+        ).fetchall()
+        for place_id, published_at in rows:
+            self._count_mention(place_id, published_at)
+
+    def _save_restaurant(self, item):
+        """Store the restaurant-level fields that Apify repeats on every review"""
+        location = item.get('location') or {}
+        self.conn.execute(
+            "INSERT INTO restaurants (place_id, name, address, rating, total_reviews, updated_at, "
+            "latitude, longitude) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(place_id) DO UPDATE SET "
+            "name = excluded.name, address = excluded.address, rating = excluded.rating, "
+            "total_reviews = excluded.total_reviews, updated_at = excluded.updated_at, "
+            "latitude = COALESCE(excluded.latitude, latitude), "
+            "longitude = COALESCE(excluded.longitude, longitude)",
+            (item.get('placeId'), item.get('title'), item.get('address'),
+             item.get('totalScore'), item.get('reviewsCount'), time.time(),
+             location.get('lat'), location.get('lng'))
+        )
+
+    def save_places(self, places):
+        """
+        Add or update restaurants from the Places API (e.g. a sweep catalogue)
+
+        Fields a place does not carry (None) keep their stored value, so a
+        listing without coordinates never erases the ones a scrape stored.
+
+        Args:
+            places: Iterable of api.models.Place
+
+        Returns:
+            Number of places saved
+        """
+        rows = [(place.place_id, place.name, place.address, place.rating, place.total_reviews,
+                 time.time(), place.latitude, place.longitude)
+                for place in places if place.place_id]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO restaurants (place_id, name, address, rating, total_reviews, updated_at, "
+                "latitude, longitude) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(place_id) DO UPDATE SET "
+                "name = COALESCE(excluded.name, name), "
+                "address = COALESCE(excluded.address, address), "
+                "rating = COALESCE(excluded.rating, rating), "
+                "total_reviews = COALESCE(excluded.total_reviews, total_reviews), "
+                "updated_at = excluded.updated_at, "
+                "latitude = COALESCE(excluded.latitude, latitude), "
+                "longitude = COALESCE(excluded.longitude, longitude)",
+                rows
+            )
+        return len(rows)
+
+    def located_restaurants(self):
+        """
+        Return every restaurant with known coordinates
+
+        Returns:
+            List of (place_id, name, address, latitude, longitude)
+        """
+        return self.conn.execute(
+            "SELECT place_id, name, address, latitude, longitude FROM restaurants "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        ).fetchall()
+
+    def adopt_key(self, restaurant_key, old_keys):
+        """
+        Move reviews stored under other keys for the same restaurant to one key
+
+        Used when a restaurant first synced under one URL form (e.g. a short
+        link) is now known by its canonical URL, so the next sync continues
+        from the old high-water mark instead of starting over.
+
+        Args:
+            restaurant_key: Key to keep (e.g. the canonical URL)
+            old_keys: Other keys the restaurant may be stored under
+
+        Returns:
+            Number of reviews moved
+        """
+        moved = 0
+        with self.conn:
+            for old_key in old_keys:
+                if old_key == restaurant_key:
+                    continue
+                moved += self.conn.execute(
+                    "UPDATE reviews SET restaurant_key = ? WHERE restaurant_key = ?",
+                    (restaurant_key, old_key)
+                ).rowcount
+                # The old sync state carries over unless the key already has one
+                has_state = self.conn.execute(
+                    "SELECT 1 FROM sync_state WHERE restaurant_key = ?", (restaurant_key,)
+                ).fetchone()
+                if has_state:
+                    self.conn.execute("DELETE FROM sync_state WHERE restaurant_key = ?", (old_key,))
+                else:
+                    self.conn.execute("UPDATE sync_state SET restaurant_key = ? WHERE restaurant_key = ?",
+                                      (restaurant_key, old_key))
+        return moved
+
+    def update_high_water_mark(self, restaurant_key):
+        """
+        Set a restaurant's high-water mark to the newest review stored for it
+
+        Args:
+            restaurant_key: Identifier the restaurant was synced under
+        """
+        newest = self.conn.execute(
+            "SELECT published_at, review_id, place_id FROM reviews "
+            "WHERE restaurant_key = ? AND published_at IS NOT NULL "
+            "ORDER BY published_at DESC, review_id DESC LIMIT 1",
+            (restaurant_key,)
+        ).fetchone()
+        with self.conn:
+            self._save_sync_state(restaurant_key, newest[2] if newest else None,
+                                  newest[:2] if newest else None)
+
+    def _save_sync_state(self, restaurant_key, place_id, newest):
+        # The review count at this sync is the baseline the refresh
+        # scheduler measures growth (new reviews on Google) against
+        self.conn.execute(
+            "INSERT INTO sync_state "
+            "(restaurant_key, place_id, last_published_at, last_review_id, last_synced_at, "
+            "reviews_at_sync) VALUES (?, ?, ?, ?, ?, ("
+            "SELECT total_reviews FROM restaurants WHERE place_id = COALESCE(?, "
+            "(SELECT place_id FROM sync_state WHERE restaurant_key = ?)))) "
+            "ON CONFLICT(restaurant_key) DO UPDATE SET "
+            "place_id = COALESCE(excluded.place_id, place_id), "
+            "last_published_at = excluded.last_published_at, "
+            "last_review_id = excluded.last_review_id, "
+            "last_synced_at = excluded.last_synced_at, "
+            "reviews_at_sync = excluded.reviews_at_sync",
+            (restaurant_key, place_id,
+             newest[0] if newest else None, newest[1] if newest else None, time.time(),
+             place_id, restaurant_key)
+        )
+
+    def _check_duplicate(self, place_id, review_id, fingerprint):
+        """
+        Check a new review against its restaurant's stored fingerprints
+
+        The restaurant's fingerprints are loaded the first time it is seen;
+        a unique review's fingerprint is stored so later copies match it.
+
+        Returns:
+            Review id of the earlier review this one copies, or None
+        """
+        if place_id not in self.dedup:
+            index = self.dedup.index(place_id)
+            for stored_id, signature, author, short in self.conn.execute(
+                    "SELECT review_id, signature, author, short FROM review_fingerprints "
+                    "WHERE place_id = ? ORDER BY rowid", (place_id,)):
+                index.add(stored_id, Fingerprint(signature, author, bool(short)))
+
+        original = self.dedup.check(place_id, review_id, fingerprint)
+        if original is None and review_id in self.dedup.index(place_id):
+            self.conn.execute(
+                "INSERT OR REPLACE INTO review_fingerprints "
+                "(review_id, place_id, signature, author, short) VALUES (?, ?, ?, ?, ?)",
+                (review_id, place_id, fingerprint.signature, fingerprint.author, int(fingerprint.short))
+            )
+        return original
+
+    def _scan_copy(self, original, text):
+        """
+        Scan a copy whose text differs from its original's (e.g. the translation)
+
+        Only done when the original had no mentions; matches are stored for
+        the original, so the review is still counted once.
+        """
+        row = self.conn.execute(
+            "SELECT place_id, published_at, confidence, text FROM reviews WHERE review_id = ?",
+            (original,)
+        ).fetchone()
+        if row is None or row[2] != 0 or (text or '') == (row[3] or ''):
+            return
+        place_id, published_at = row[0], row[1]
+        confidence = self._save_matches(original, place_id, published_at, text)
+        if confidence:
+            self.conn.execute("UPDATE reviews SET confidence = ? WHERE review_id = ?",
+                              (confidence, original))
+            self._count_mention(place_id, published_at)
+
+    def _scan_copies(self):
+        """_scan_copy() every stored copy of a review without mentions"""
+        rows = self.conn.execute(
+            "SELECT c.duplicate_of, c.text FROM reviews c JOIN reviews o ON o.review_id = c.duplicate_of "
+            "WHERE o.confidence = 0 AND c.text IS NOT o.text"
+        ).fetchall()
+        for original, text in rows:
+            self._scan_copy(original, text)
+
+    def add_reviews(self, restaurant_key, items, update_mark=True):
+        """
+        Merge Apify review items into the store
+
+        Reviews already stored (same review id) are skipped. New reviews are
+        scanned for keywords and the matches are stored with them, unless
+        they are a near-copy of an earlier review of the same restaurant
+        (see engine/dedup.py): copies are stored but not counted, and only
+        scanned when their text differs from a review without mentions.
+        The restaurant's high-water mark moves forward to the newest review.
+        Items of another place than the one the key is known to belong to
+        are skipped with a warning.
+
+        Args:
+            restaurant_key: Identifier to sync the restaurant under
+            items: Apify Google Maps Reviews Scraper items
+            update_mark: Move the high-water mark now (pass False when adding
+                         a run page by page, then call update_high_water_mark())
+
+        Returns:
+            Number of reviews that were new (copies included)
+        """
+        added = 0
+        duplicates = 0
+        skipped = 0
+        newest = self.get_high_water_mark(restaurant_key)
+        place_id = None
+        # Filing another place's reviews under this key would mix two
+        # restaurants and rewrite the key's place id
+        known_place_id = self.get_place_id(restaurant_key) or extract_place_id(restaurant_key)
+
+        # Fingerprinted as one batch per call (i.e. per page)
+        items = items if isinstance(items, list) else list(items)
+        fingerprints = self.dedup.fingerprints([item.get('text') for item in items],
+                                               [item.get('name') for item in items])
+
+        with metrics.timer('store_write_seconds'), self.conn:
+            for item, fingerprint in zip(items, fingerprints):
+                review_id = item.get('reviewId')
+                if not review_id:
+                    continue
+                if known_place_id and item.get('placeId') and item['placeId'] != known_place_id:
+                    skipped += 1
+                    continue
+
+                published_at = resolve_published_at(item)
+                if item.get('placeId') and item.get('placeId') != place_id:
+                    place_id = item['placeId']
+                    self._save_restaurant(item)
+
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO reviews "
+                    "(review_id, restaurant_key, place_id, published_at, stars, text, raw) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (review_id, restaurant_key, item.get('placeId'), published_at,
+                     item.get('stars'), item.get('text'), json.dumps(item, ensure_ascii=False))
+                )
+                if cursor.rowcount:
+                    added += 1
+                    original = self._check_duplicate(item.get('placeId'), review_id, fingerprint)
+                    if original is not None:
+                        duplicates += 1
+                        self.conn.execute("UPDATE reviews SET duplicate_of = ? WHERE review_id = ?",
+                                          (original, review_id))
+                        self._scan_copy(original, item.get('text'))
+                    else:
+                        confidence = self._save_matches(review_id, item.get('placeId'),
+                                                        published_at, item.get('text'))
+                        self.conn.execute("UPDATE reviews SET confidence = ? WHERE review_id = ?",
+                                          (confidence, review_id))
+                        if confidence:
+                            self._count_mention(item.get('placeId'), published_at)
+
+                if published_at is not None and (newest is None or (published_at, review_id) > newest):
+                    newest = (published_at, review_id)
+
+            if update_mark:
+                self._save_sync_state(restaurant_key, place_id, newest)
+
+        if skipped:
+            print(f"⚠️  Skipped {skipped} review(s) of another place than {known_place_id} "
+                  f"({restaurant_key})", file=sys.stderr)
+        metrics.count('reviews_stored_total', added)
+        metrics.count('reviews_duplicate_total', duplicates)
+        return added
+
+    def deduplicate(self):
+        """
+        Fingerprint stored reviews that have no fingerprint yet and mark the copies
+
+        Only needed once, for reviews stored before de-duplication existed;
+        add_reviews() checks new reviews as they arrive. Copies lose their
+        keyword matches and the monthly counts are rebuilt.
+
+        Returns:
+            Number of reviews marked as duplicates
+        """
+        rows = self.conn.execute(
+            "SELECT review_id, place_id, text, raw FROM reviews "
+            "WHERE duplicate_of IS NULL AND review_id NOT IN (SELECT review_id FROM review_fingerprints) "
+            "ORDER BY rowid"
+        ).fetchall()
+
+        marked = 0
+        with self.conn:
+            for start in range(0, len(rows), 10_000):
+                batch = rows[start:start + 10_000]
+                fingerprints = self.dedup.fingerprints(
+                    [text for _, _, text, _ in batch],
+                    [json.loads(raw).get('name') for _, _, _, raw in batch]
+                )
+                for (review_id, place_id, _, _), fingerprint in zip(batch, fingerprints):
+                    original = self._check_duplicate(place_id, review_id, fingerprint)
+                    if original is None:
+                        continue
+                    marked += 1
+                    self.conn.execute("DELETE FROM review_matches WHERE review_id = ?", (review_id,))
+                    self.conn.execute("UPDATE reviews SET duplicate_of = ?, confidence = NULL "
+                                      "WHERE review_id = ?", (original, review_id))
+            if marked:
+                self._rebuild_mention_months()
+                self._scan_copies()
+        return marked
+
+    def reanalyze(self, detector=None, workers=1):
+        """
+        Re-run detection over every unique stored review (e.g. after changing keywords)
+
+        Args:
+            detector: Detector to use from now on (defaults to the current one)
+            workers: Worker processes to scan with (None = one per core);
+                     large stores scan much faster with several
+
+        Returns:
+            Number of reviews analyzed
+        """
+        if detector is not None:
+            self.detector = detector
+
+        rows = self.conn.execute(
+            "SELECT review_id, place_id, published_at, text FROM reviews WHERE duplicate_of IS NULL"
+        ).fetchall()
+        with DetectionPool(workers, self.detector) as pool:
+            results = pool.scan_many([row[3] for row in rows])
+            with self.conn:
+                self.conn.execute("DELETE FROM review_matches")
+                for (review_id, place_id, published_at, text), matches in zip(rows, results):
+                    confidence = self._save_matches(review_id, place_id, published_at, text, matches)
+                    self.conn.execute("UPDATE reviews SET confidence = ? WHERE review_id = ?",
+                                      (confidence, review_id))
+                self._rebuild_mention_months()
+                self._scan_copies()
+        return len(rows)
+
+    def get_reviews(self, restaurant_key, include_duplicates=False):
+        """
+        Return every stored review for a restaurant, newest first
+
+        Args:
+            restaurant_key: Identifier the restaurant was synced under
+            include_duplicates: Also return reviews marked as copies
+
+        Returns:
+            List of the original Apify review items
+        """
+        sql = "SELECT raw FROM reviews WHERE restaurant_key = ?"
+        if not include_duplicates:
+            sql += " AND duplicate_of IS NULL"
+        rows = self.conn.execute(sql + " ORDER BY published_at DESC", (restaurant_key,))
+        return [json.loads(raw) for (raw,) in rows]
+
+    def count_reviews(self, restaurant_key, include_duplicates=False):
+        """Return how many (unique, by default) reviews are stored for a restaurant"""
+        sql = "SELECT COUNT(*) FROM reviews WHERE restaurant_key = ?"
+        if not include_duplicates:
+            sql += " AND duplicate_of IS NULL"
+        return self.conn.execute(sql, (restaurant_key,)).fetchone()[0]
+
+    def count_mentions(self, place_id, since=None, until=None, category=None):
+        """
+        Count reviews with food poisoning mentions for one restaurant
+
+        Args:
+            place_id: Google place id
+            since: Only reviews published at/after this epoch second
+            until: Only reviews published before this epoch second
+            category: Only mentions in this keyword category (e.g. 'vomiting')
+
+        Returns:
+            Number of flagged reviews
+        """
+        sql = "SELECT COUNT(DISTINCT review_id) FROM review_matches WHERE place_id = ?"
+        params = [place_id]
+        sql, params = self._add_filters(sql, params, since, until, category)
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def monthly_mentions(self, place_id, since_month=None):
+        """
+        Return flagged reviews per month for one restaurant
+
+        Reads the counts kept up to date by add_reviews(), so no reviews are
+        re-parsed or re-scanned.
+
+        Args:
+            place_id: Google place id
+            since_month: Only months from this month bucket on
+                         (e.g. month_bucket(six_months_ago))
+
+        Returns:
+            Dictionary of month bucket -> mentions, oldest first
+            (format with utils.dates.month_label / month_key)
+        """
+        sql = "SELECT month, mentions FROM mention_months WHERE place_id = ?"
+        params = [place_id]
+        if since_month is not None:
+            sql += " AND month >= ?"
+            params.append(since_month)
+        sql += " ORDER BY month"
+        return dict(self.conn.execute(sql, params).fetchall())
+
+    def mentions_by_place(self, since_month=None, place_ids=None):
+        """
+        Return flagged reviews per restaurant, for many restaurants at once
+
+        Reads the monthly counts, so it is one small grouped query however
+        many reviews are stored.
+
+        Args:
+            since_month: Only count months from this month bucket on
+            place_ids: Only these restaurants (None = every restaurant)
+
+        Returns:
+            Dictionary of place_id -> mentions (restaurants without any are left out)
+        """
+        if place_ids is None:
+            sql = "SELECT place_id, SUM(mentions) FROM mention_months WHERE month >= ? GROUP BY place_id"
+            return dict(self.conn.execute(sql, (since_month or 0,)).fetchall())
+
+        # Looked up by primary key, in batches below SQLite's variable limit
+        place_ids = list(place_ids)
+        counts = {}
+        for start in range(0, len(place_ids), 500):
+            batch = place_ids[start:start + 500]
+            sql = (f"SELECT place_id, SUM(mentions) FROM mention_months "
+                   f"WHERE place_id IN ({','.join('?' * len(batch))}) AND month >= ? GROUP BY place_id")
+            counts.update(self.conn.execute(sql, batch + [since_month or 0]).fetchall())
+        return counts
+
+    def refresh_signals(self, since):
+        """
+        Return what the refresh scheduler needs to know about every synced restaurant
+
+        Args:
+            since: Start of the "recent" window (epoch seconds)
+
+        Returns:
+            List of (restaurant_key, place_id, last_synced_at, total_reviews,
+            reviews_at_sync, recent_reviews, recent_mentions); recent counts
+            are unique reviews published at/after `since`
+        """
+        recent_reviews = dict(self.conn.execute(
+            "SELECT place_id, COUNT(*) FROM reviews WHERE published_at >= ? AND duplicate_of IS NULL "
+            "GROUP BY place_id", (since,)
+        ).fetchall())
+        recent_mentions = dict(self.conn.execute(
+            "SELECT place_id, COUNT(DISTINCT review_id) FROM review_matches WHERE published_at >= ? "
+            "GROUP BY place_id", (since,)
+        ).fetchall())
+        rows = self.conn.execute(
+            "SELECT s.restaurant_key, s.place_id, s.last_synced_at, r.total_reviews, s.reviews_at_sync "
+            "FROM sync_state s LEFT JOIN restaurants r ON r.place_id = s.place_id"
+        ).fetchall()
+        return [row + (recent_reviews.get(row[1], 0), recent_mentions.get(row[1], 0)) for row in rows]
+
+    def record_spend(self, restaurant_key, fetched, cost):
+        """Log the estimated cost of one sync (for the refresh budget)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO refresh_spend (restaurant_key, spent_at, fetched, cost) VALUES (?, ?, ?, ?)",
+                (restaurant_key, time.time(), fetched, cost)
+            )
+
+    def spent_since(self, since):
+        """Return the estimated scraping cost logged at/after an epoch second"""
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(cost), 0) FROM refresh_spend WHERE spent_at >= ?", (since,)
+        ).fetchone()[0]
+
+    def flagged_reviews(self, place_id, since=None, until=None):
+        """
+        Return flagged reviews for one restaurant, newest first
+
+        Args:
+            place_id: Google place id
+            since: Only reviews published at/after this epoch second
+            until: Only reviews published before this epoch second
+
+        Returns:
+            List of Apify review items with 'matched_keywords' and
+            'matched_categories' added
+        """
+        sql = "SELECT review_id, raw FROM reviews WHERE place_id = ? AND confidence > 0"
+        params = [place_id]
+        if since is not None:
+            sql += " AND published_at >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND published_at < ?"
+            params.append(until)
+        sql += " ORDER BY published_at DESC"
+
+        reviews = []
+        for review_id, raw in self.conn.execute(sql, params).fetchall():
+            review = json.loads(raw)
+            matches = self.conn.execute(
+                "SELECT keyword, category FROM review_matches WHERE review_id = ?", (review_id,)
+            ).fetchall()
+            review['matched_keywords'] = [keyword for keyword, _ in matches]
+            review['matched_categories'] = sorted({category for _, category in matches})
+            reviews.append(review)
+        return reviews
+
+    def restaurants_with_mentions(self, category=None, min_mentions=1, area=None,
+                                  since=None, until=None):
+        """
+        Find restaurants with more than a given number of mentions
+
+        Example: restaurants_with_mentions('vomiting', 3, area='Ubud')
+
+        Args:
+            category: Keyword category to count (None = any category)
+            min_mentions: Minimum number of flagged reviews
+            area: Only restaurants whose name/address mention this place
+            since: Only reviews published at/after this epoch second
+            until: Only reviews published before this epoch second
+
+        Returns:
+            List of (place_id, name, address, mentions), most mentions first
+        """
+        sql = "SELECT place_id, COUNT(DISTINCT review_id) AS mentions FROM review_matches WHERE 1 = 1"
+        params = []
+        sql, params = self._add_filters(sql, params, since, until, category)
+
+        if area:
+            if self.has_fts:
+                sql += (" AND place_id IN (SELECT r.place_id FROM restaurants_fts f "
+                        "JOIN restaurants r ON r.rowid = f.rowid WHERE restaurants_fts MATCH ?)")
+                params.append(self._fts_phrase(area))
+            else:
+                sql += " AND place_id IN (SELECT place_id FROM restaurants WHERE address LIKE ?)"
+                params.append(f"%{area}%")
+
+        sql += " GROUP BY place_id HAVING mentions >= ? ORDER BY mentions DESC"
+        params.append(min_mentions)
+
+        results = []
+        for place_id, mentions in self.conn.execute(sql, params).fetchall():
+            row = self.conn.execute(
+                "SELECT name, address FROM restaurants WHERE place_id = ?", (place_id,)
+            ).fetchone() or (None, None)
+            results.append((place_id, row[0], row[1], mentions))
+        return results
+
+    def search_text(self, query, place_id=None, limit=50):
+        """
+        Full-text search over stored review text
+
+        Args:
+            query: Words or phrase to look for, e.g. "bali belly"
+            place_id: Only search this restaurant's reviews
+            limit: Maximum results
+
+        Returns:
+            List of Apify review items
+        """
+        if self.has_fts:
+            sql = ("SELECT r.raw FROM reviews_fts f JOIN reviews r ON r.rowid = f.rowid "
+                   "WHERE reviews_fts MATCH ?")
+            params = [self._fts_phrase(query)]
+            if place_id:
+                sql += " AND r.place_id = ?"
+                params.append(place_id)
+            sql += " ORDER BY f.rank LIMIT ?"
+        else:
+            sql = "SELECT raw FROM reviews WHERE text LIKE ?"
+            params = [f"%{query}%"]
+            if place_id:
+                sql += " AND place_id = ?"
+                params.append(place_id)
+            sql += " LIMIT ?"
+        params.append(limit)
+        return [json.loads(raw) for (raw,) in self.conn.execute(sql, params)]
+
+    @staticmethod
+    def _add_filters(sql, params, since, until, category):
+        """Append the shared time-window/category filters for review_matches queries"""
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
+        if since is not None:
+            sql += " AND published_at >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND published_at < ?"
+            params.append(until)
+        return sql, params
+
+    @staticmethod
+    def _fts_phrase(text):
+        """Quote user text as an FTS5 phrase so punctuation can't break the query"""
+        return '"' + text.replace('"', '""') + '"'
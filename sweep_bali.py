@@ -0,0 +1,177 @@
+"""
+Build a catalogue of every restaurant in Bali
+Usage: python sweep_bali.py --output bali_restaurants.ndjson
+
+Bali is split into a grid of small search circles (or named areas like
+Canggu, Seminyak and Ubud). Each circle is searched with every result page,
+places found by several circles are only written once, and finished
+circles are checkpointed: run the same command again after an interruption
+and the sweep carries on where it stopped.
+
+Each output line is one place as returned by Text Search (New).
+"""
+
+import json
+import os
+import sys
+import time
+import argparse
+
+from api.cache import ResponseCache
+from api.sweep import (
+    AreaSweep, SweepCheckpoint, area_tiles, grid_tiles, BALI_AREAS,
+    DEFAULT_CONCURRENCY, DEFAULT_RATE, DEFAULT_SPACING_KM, MAX_PAGES
+)
+
+
+def read_place_ids(path):
+    """Return the ids of places already written to an NDJSON catalogue"""
+    place_ids = set()
+    if not os.path.exists(path):
+        return place_ids
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                place_ids.add(json.loads(line)['id'])
+            except (ValueError, KeyError):
+                continue    # skip a line cut short by an interruption
+    return place_ids
+
+
+async def run_sweep(args, api_key, tiles, checkpoint, seen, output):
+    """Sweep the tiles and append each new place to the output file"""
+    cache = None if args.no_cache else ResponseCache()
+    sweep = AreaSweep(api_key, query=args.query, included_type=args.type or None,
+                      concurrency=args.concurrency, rate=args.rate, max_pages=args.max_pages,
+                      cache=cache, offline=args.offline, seen=seen)
+
+    remaining = len([tile for tile in tiles if tile.name not in checkpoint.done])
+    finished = 0
+    added = 0
+    async for tile, places in sweep.run(tiles, checkpoint=checkpoint):
+        for place in places:
+            output.write(json.dumps(place, ensure_ascii=False) + "\n")
+        output.flush()
+
+        finished += 1
+        added += len(places)
+        print(f"✓ [{finished}/{remaining}] {tile.name}: {len(places)} new "
+              f"({len(sweep.seen)} places total)", flush=True)
+
+    return added, sweep
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Sweep Bali tile by tile and build a de-duplicated restaurant catalogue',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python sweep_bali.py --output bali_restaurants.ndjson
+  python sweep_bali.py --areas Canggu Seminyak Ubud
+  python sweep_bali.py --spacing-km 3 --concurrency 16 --rate 20
+  python sweep_bali.py --query "warung" --output warungs.ndjson
+  python sweep_bali.py --list-tiles
+        """
+    )
+
+    parser.add_argument('--output', '-o', default='bali_restaurants.ndjson',
+                        help='NDJSON catalogue to write (default: bali_restaurants.ndjson)')
+    parser.add_argument('--query', default='restaurants',
+                        help='Text Search query for every tile (default: restaurants)')
+    parser.add_argument('--type', default='restaurant',
+                        help='Only include places of this type; "" for any (default: restaurant)')
+
+    tiling = parser.add_mutually_exclusive_group()
+    tiling.add_argument('--areas', nargs='*', metavar='AREA',
+                        help=f'Search named areas instead of a grid (all if no names given): '
+                             f'{", ".join(BALI_AREAS)}')
+    tiling.add_argument('--spacing-km', type=float, default=DEFAULT_SPACING_KM,
+                        help=f'Distance between grid tiles (default: {DEFAULT_SPACING_KM:g})')
+
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES, choices=range(1, MAX_PAGES + 1),
+                        help=f'Result pages per tile (default: {MAX_PAGES})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Maximum tiles searched at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Maximum API requests per second (default: {DEFAULT_RATE})')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore the checkpoint and start a fresh catalogue')
+    parser.add_argument('--list-tiles', action='store_true',
+                        help='Print the tiles that would be searched and exit')
+
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument('--no-cache', action='store_true',
+                            help='Always call the API instead of reusing cached responses')
+    cache_mode.add_argument('--offline', action='store_true',
+                            help='Only use cached responses, never call the API')
+
+    args = parser.parse_args()
+
+    # Imported after parsing so --help stays fast
+    import asyncio
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    try:
+        tiles = area_tiles(args.areas) if args.areas is not None else grid_tiles(spacing_km=args.spacing_km)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.list_tiles:
+        for tile in tiles:
+            print(f"{tile.name:>18}  ({tile.latitude:.4f}, {tile.longitude:.4f})  r={tile.radius:.0f}m")
+        print(f"\n{len(tiles)} tiles")
+        return
+
+    api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+    if not api_key and not args.offline:
+        print("❌ ERROR: GOOGLE_MAPS_API_KEY not found in .env file")
+        sys.exit(1)
+
+    checkpoint = SweepCheckpoint(args.output + '.checkpoint.json', args.query)
+    if args.restart:
+        checkpoint.remove()
+    resumed = checkpoint.load()
+
+    # Resuming appends to the existing catalogue; the ids already in it are
+    # skipped, so a tile interrupted halfway never writes a place twice
+    seen = read_place_ids(args.output) if resumed else set()
+    output = open(args.output, 'a' if resumed else 'w', encoding='utf-8')
+
+    print("\n🗺️  BALI RESTAURANT SWEEP")
+    print("=" * 60)
+    print(f"Query: {args.query!r}  Tiles: {len(tiles)}  "
+          f"({args.concurrency} at a time, max {args.rate:g} requests/s)")
+    if resumed:
+        print(f"↩️  Resuming: {resumed} tiles done, {len(seen)} places already in {args.output}")
+    print()
+
+    start = time.perf_counter()
+    try:
+        added, sweep = asyncio.run(run_sweep(args, api_key, tiles, checkpoint, seen, output))
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted - run the same command again to resume")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n❌ Sweep stopped: {e}")
+        print("Run the same command again to resume from the last finished tile")
+        sys.exit(1)
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    checkpoint.remove()
+
+    print("\n" + "=" * 60)
+    print(f"✅ Done in {elapsed:.1f}s: {added} new places, {len(sweep.seen)} in {args.output}")
+    print(f"   API requests: {sweep.requests}")
+    print("=" * 60 + "\n")
+    sweep.client.print_latency_report()
+
+
+if __name__ == "__main__":
+    main()
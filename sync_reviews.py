@@ -0,0 +1,197 @@
+"""
+Keep a local copy of each restaurant's reviews up to date
+Usage: python sync_reviews.py "https://maps.app.goo.gl/..." [more URLs...]
+
+The first run for a restaurant fetches the last 6 months of reviews.
+Every later run only fetches reviews newer than the newest one already
+stored, so a daily refresh costs only the reviews added since yesterday.
+
+With several restaurants, URLs are packed into shared scraper runs and the
+runs execute in parallel (see api/apify_batch.py), so a 200-restaurant
+refresh takes minutes instead of hours.
+
+Every URL is first mapped to its canonical form (api/url_resolver.py), so
+a restaurant shared as a short link, a /maps/place/ URL or a ?cid= URL is
+stored - and scraped - once.
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from api.apify_client import sync_restaurant_reviews, MAX_REVIEWS
+from api.batch import read_lookup_file
+from api.cache import ResponseCache
+from api.limits import MAX_PARALLEL_RUNS, URLS_PER_RUN
+from api.url_resolver import UrlResolver
+from storage.review_store import ReviewStore
+from utils import metrics
+
+
+def print_mentions(store, url):
+    """Print a restaurant's recent mention counts from the store"""
+    place_id = store.get_place_id(url)
+    if place_id:
+        now = datetime.now(timezone.utc)
+        month_start = int(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp())
+        six_months_ago = int((now - timedelta(days=180)).timestamp())
+        print(f"   🚨 Mentions: {store.count_mentions(place_id, since=six_months_ago)} "
+              f"in the last 6 months, {store.count_mentions(place_id, since=month_start)} this month")
+
+
+def sync_one(url, api_key, store, max_reviews):
+    """Sync a single restaurant, streaming its reviews into the store"""
+    print(f"\n📥 {url}")
+    try:
+        result = sync_restaurant_reviews(url, api_key, store, max_reviews=max_reviews)
+    except Exception as e:
+        print(f"❌ Sync failed: {e}")
+        return 0.0
+
+    # Manual syncs count against the refresh scheduler's daily budget too
+    store.record_spend(url, result['fetched'], result['estimated_cost'])
+    print(f"   Reviews since: {result['start_date']}")
+    print(f"   Fetched: {result['fetched']}  New: {result['added']}  "
+          f"Stored: {store.count_reviews(url)}")
+    print_mentions(store, url)
+    return result['estimated_cost']
+
+
+def canonicalize_urls(urls, store, resolver):
+    """
+    Map every URL to its canonical form
+
+    Duplicates (the same restaurant in different URL forms) are merged, and
+    reviews stored under an older form move to the canonical one.
+
+    Returns:
+        Dictionary of canonical URL -> CanonicalUrl, in input order
+    """
+    canonical = {}
+    for item in resolver.canonicalize_many(urls):
+        if item.url in canonical:
+            print(f"🔗 {item.aliases[0] if item.aliases else item.url} is the same restaurant "
+                  f"as an earlier URL - syncing it once")
+            continue
+        canonical[item.url] = item
+        moved = store.adopt_key(item.url, item.aliases)
+        if moved:
+            print(f"🔗 Moved {moved} stored review(s) to {item.url}")
+    return canonical
+
+
+def learn_aliases(canonical, store, resolver):
+    """Remember which place id each synced ?cid= URL turned out to be"""
+    for item in canonical.values():
+        if item.cid and not item.place_id:
+            resolver.learn(item.cid, store.get_place_id(item.url))
+
+
+async def sync_many(urls, api_key, store, args):
+    """Sync several restaurants with packed, parallel scraper runs"""
+    from api.apify_batch import sync_restaurants
+
+    cache = None if args.no_reuse else ResponseCache()
+    total_cost = 0.0
+    done = 0
+
+    async for result in sync_restaurants(urls, api_key, store, max_reviews=args.max_reviews,
+                                         per_run=args.urls_per_run,
+                                         max_parallel_runs=args.parallel_runs, cache=cache):
+        done += 1
+        store.record_spend(result['url'], result['fetched'], result['estimated_cost'])
+        print(f"\n📥 [{done}/{len(urls)}] {result['url']}")
+        if result['error']:
+            print(f"❌ Sync failed: {result['error']}")
+            continue
+
+        total_cost += result['estimated_cost']
+        reused = " (picked up a run still in progress)" if result['reused'] else ""
+        print(f"   Reviews since: {result['start_date']}{reused}")
+        print(f"   Fetched: {result['fetched']}  New: {result['added']}  "
+              f"Stored: {store.count_reviews(result['url'])}")
+        print_mentions(store, result['url'])
+
+    return total_cost
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Fetch new reviews for restaurants and merge them into the local store',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python sync_reviews.py "https://maps.app.goo.gl/KXuHZ6dNENB9R3sr8"
+  python sync_reviews.py URL1 URL2 --max-reviews 200
+  python sync_reviews.py --input-file restaurants.txt --parallel-runs 10
+  python sync_reviews.py --input-file restaurants.txt --profile sync-profile.json
+        """
+    )
+
+    parser.add_argument('urls', nargs='*', help='Google Maps restaurant URL(s)')
+    parser.add_argument('--input-file', help='File with one Google Maps URL per line')
+    parser.add_argument('--max-reviews', type=int, default=MAX_REVIEWS,
+                        help=f'Maximum reviews to fetch per restaurant (default: {MAX_REVIEWS})')
+    parser.add_argument('--urls-per-run', type=int, default=URLS_PER_RUN,
+                        help=f'Restaurants packed into one scraper run (default: {URLS_PER_RUN})')
+    parser.add_argument('--parallel-runs', type=int, default=MAX_PARALLEL_RUNS,
+                        help=f'Scraper runs in flight at once (default: {MAX_PARALLEL_RUNS})')
+    parser.add_argument('--no-reuse', action='store_true',
+                        help='Always start new scraper runs, even if an identical one from an '
+                             'interrupted sync is still running')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Time every stage and print a profile; optionally save it '
+                             '(.json for JSON, anything else for Prometheus text)')
+
+    args = parser.parse_args()
+
+    # Imported after parsing so --help stays fast
+    import asyncio
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    if args.profile:
+        metrics.enable()
+
+    urls = list(args.urls)
+    if args.input_file:
+        urls += read_lookup_file(args.input_file)
+    if not urls:
+        parser.error("give at least one URL or --input-file")
+
+    api_key = os.getenv('APIFY_API_KEY')
+    if not api_key:
+        print("❌ ERROR: APIFY_API_KEY not found in .env file")
+        sys.exit(1)
+
+    print("\n🔄 REVIEW SYNC")
+    print("=" * 60)
+
+    store = ReviewStore()
+    resolver = UrlResolver(cache=ResponseCache())
+    canonical = canonicalize_urls(urls, store, resolver)
+    urls = list(canonical)
+
+    # One restaurant streams straight into the store; several share runs
+    if len(urls) == 1:
+        total_cost = sync_one(urls[0], api_key, store, args.max_reviews)
+    else:
+        total_cost = asyncio.run(sync_many(urls, api_key, store, args))
+
+    learn_aliases(canonical, store, resolver)
+    store.close()
+
+    if args.profile:
+        metrics.report(args.profile)
+
+    print("\n" + "=" * 60)
+    print(f"💰 Estimated cost: ~${total_cost:.2f}")
+    print("✅ Done!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,14 @@ This script will:
 
 import os
 from dotenv import load_dotenv
-import requests
 import json
 
+from api.http_client import get_client
+from api.google_maps_client import TEXT_SEARCH_URL, PLACE_DETAILS_URL, api_url
+
 # Load environment variables from .env file
 load_dotenv()
 
-# New Places API endpoints
-TEXT_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
-PLACE_DETAILS_URL = "https://places.googleapis.com/v1/places/{place_id}"
-
 def get_api_key():
     """Get and validate API key from environment"""
     api_key = os.getenv('GOOGLE_MAPS_API_KEY')
@@ -68,7 +66,8 @@ def test_restaurant_search(api_key):
     }
 
     try:
-        response = requests.post(TEXT_SEARCH_URL, headers=headers, json=request_body)
+        response = get_client().post(api_url(TEXT_SEARCH_URL), endpoint='places:searchText',
+                                     headers=headers, json=request_body)
 
         # Check if request was successful
         if response.status_code == 200:
@@ -117,7 +116,8 @@ def test_fetch_reviews(api_key, place):
         print(f"Place ID: {place_id}")
 
         # Build the URL with place_id
-        url = PLACE_DETAILS_URL.format(place_id=place_id)
+        # (PLACES_API_URL can point this at the local stand-in server)
+        url = api_url(PLACE_DETAILS_URL.format(place_id=place_id))
 
         # Headers with field mask specifying we want reviews
         # The field mask tells the API exactly which data to return
@@ -127,7 +127,7 @@ def test_fetch_reviews(api_key, place):
             "X-Goog-FieldMask": "id,displayName,rating,userRatingCount,reviews"
         }
 
-        response = requests.get(url, headers=headers)
+        response = get_client().get(url, endpoint='places/{id}', headers=headers)
 
         if response.status_code == 200:
             result = response.json()
@@ -213,6 +213,7 @@ def main():
         print("You may need to make multiple requests or use pagination for more.")
     else:
         print("⚠️  Some tests had issues. Please review the output above.")
+    get_client().print_latency_report()
     print("=" * 60)
 
 if __name__ == "__main__":
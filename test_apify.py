@@ -1,18 +1,23 @@
 """
 Test script for Apify API integration
 Tests Google Maps Reviews Scraper with 6-month filtering and 1000 review cap
+
+The Apify SDK and the detection engine are imported inside the test, so
+--help starts instantly.
 """
 
 import os
-from dotenv import load_dotenv
-from apify_client import ApifyClient
+import argparse
 from datetime import datetime, timedelta
 
-# Load environment variables
-load_dotenv()
+from utils import metrics
 
 def test_apify_connection():
     """Test basic connection to Apify API"""
+    # Heavy imports happen here, only when the test actually runs
+    from api.apify_client import iter_dataset_pages, make_client
+    from engine.pipeline import stream_analysis, RESTAURANT, FLAGGED, SUMMARY
+
     print("\n🔍 APIFY API TEST SCRIPT")
     print("=" * 60)
     print()
@@ -35,7 +40,7 @@ def test_apify_connection():
     # Step 2: Initialize Apify client
     print("Step 2: Connecting to Apify...")
     try:
-        client = ApifyClient(api_key)
+        client = make_client(api_key)
         print("✓ Connected to Apify successfully")
         print()
     except Exception as e:
@@ -72,26 +77,52 @@ def test_apify_connection():
             "reviewsSort": "newest"             # Get most recent first
         }
 
-        # Run the actor (Google Maps Reviews Scraper)
+        # Start the actor (Google Maps Reviews Scraper) without waiting for it -
+        # results are read page by page while it is still running
         # Actor ID: compass/google-maps-reviews-scraper
-        run = client.actor("compass/google-maps-reviews-scraper").call(run_input=run_input)
+        with metrics.timer('stage_seconds', stage='start_run'):
+            run = client.actor("compass/google-maps-reviews-scraper").start(run_input=run_input)
 
-        print("✓ Scraper completed successfully")
+        print("✓ Scraper started")
         print()
 
-        # Step 5: Fetch results
-        print("Step 5: Retrieving results...")
-
-        # Each item in the dataset is a REVIEW (not a restaurant object with nested reviews)
-        reviews = []
-        for item in client.dataset(run["defaultDatasetId"]).iterate_items():
-            reviews.append(item)
+        # Step 5: Stream results
+        print("Step 5: Streaming results and scanning for food poisoning mentions...")
+        print()
 
-        if not reviews:
+        # Each item in the dataset is a REVIEW (not a restaurant object with nested reviews).
+        # Pages are analyzed as they arrive, so nothing is held in one big list
+        pages = iter_dataset_pages(client, run["defaultDatasetId"], run_id=run["id"])
+
+        restaurant = {}
+        summary = {}
+        flagged_count = 0
+        reviews_count = 0
+
+        with metrics.timer('stage_seconds', stage='stream'):
+            for kind, data in stream_analysis(pages):
+                if kind == RESTAURANT and not restaurant:
+                    restaurant = data
+                elif kind == FLAGGED:
+                    flagged_count += 1
+                    print(f"🚨 Flagged: {data.get('name', 'Anonymous')} "
+                          f"({data.get('publishedAtDate', 'N/A')}) - {', '.join(data['matched_keywords'])}")
+                elif kind == SUMMARY:
+                    summary = data
+
+        # Duplicates are not analyzed but were still fetched (and billed)
+        duplicate_count = 0
+        for totals in summary.values():
+            reviews_count += totals['analyzed_reviews_count'] + totals['duplicate_reviews_count']
+            duplicate_count += totals['duplicate_reviews_count']
+
+        if not reviews_count:
             print("❌ No results returned")
             return False
 
-        print(f"✓ Results retrieved: {len(reviews)} reviews")
+        print(f"✓ Results retrieved: {reviews_count} reviews")
+        if duplicate_count:
+            print(f"✓ Skipped {duplicate_count} duplicate reviews (translations / repeats)")
         print()
 
         # Step 6: Display results
@@ -100,26 +131,27 @@ def test_apify_connection():
         print("=" * 60)
         print()
 
-        # Restaurant info (from first review)
-        first_review = reviews[0]
-        print(f"Restaurant: {first_review.get('title', 'N/A')}")
-        print(f"Address: {first_review.get('address', 'N/A')}")
-        print(f"Rating: {first_review.get('totalScore', 'N/A')}/5")
-        print(f"Total Reviews (on Google): {first_review.get('reviewsCount', 'N/A'):,}")
+        # Restaurant info (split off the first review)
+        print(f"Restaurant: {restaurant.get('title', 'N/A')}")
+        print(f"Address: {restaurant.get('address', 'N/A')}")
+        print(f"Rating: {restaurant.get('totalScore', 'N/A')}/5")
+        print(f"Total Reviews (on Google): {restaurant.get('reviewsCount', 'N/A'):,}")
         print()
 
         # Reviews fetched
-        print(f"Reviews Fetched: {len(reviews)}")
+        print(f"Reviews Fetched: {reviews_count}")
         print()
 
-        if reviews:
-            # Show first 3 reviews as samples
+        # Show first 3 reviews as samples (re-read just the first page)
+        with metrics.timer('stage_seconds', stage='samples'):
+            samples = client.dataset(run["defaultDatasetId"]).list_items(limit=3).items
+        if samples:
             print("-" * 60)
             print("Sample Reviews:")
             print("-" * 60)
             print()
 
-            for i, review in enumerate(reviews[:3], 1):
+            for i, review in enumerate(samples, 1):
                 print(f"Review #{i}")
                 print("-" * 40)
                 print(f"Author: {review.get('name', 'Anonymous')}")
@@ -129,21 +161,21 @@ def test_apify_connection():
                 print(f"Review: {review_text[:200] if review_text else 'No text'}...")
                 print()
 
-            # Statistics
-            print("=" * 60)
-            print("STATISTICS")
-            print("=" * 60)
-            print()
-            print(f"Total reviews fetched: {len(reviews)}")
-            print()
+        # Statistics
+        print("=" * 60)
+        print("STATISTICS")
+        print("=" * 60)
+        print()
+        print(f"Total reviews fetched: {reviews_count}")
+        print(f"Reviews analyzed (without duplicates): {reviews_count - duplicate_count}")
+        print(f"Reviews mentioning food poisoning: {flagged_count}")
+        print()
 
-            # Show date range
-            if reviews:
-                latest_date = reviews[0].get('publishedAtDate', '')
-                oldest_date = reviews[-1].get('publishedAtDate', '')
-                print(f"Latest review: {latest_date}")
-                print(f"Oldest review: {oldest_date}")
-                print()
+        # Show date range
+        for totals in summary.values():
+            print(f"Latest review: {totals['newest_review']}")
+            print(f"Oldest review: {totals['oldest_review']}")
+            print()
 
         # Step 7: Success
         print("=" * 60)
@@ -155,9 +187,9 @@ def test_apify_connection():
         print()
 
         # Cost estimation
-        cost = (len(reviews) / 1000) * 0.35
+        cost = (reviews_count / 1000) * 0.35
         print(f"💰 Cost for this test: ~${cost:.2f}")
-        print(f"   ({len(reviews)} reviews × $0.35 per 1,000)")
+        print(f"   ({reviews_count} reviews × $0.35 per 1,000)")
         print()
 
         return True
@@ -173,8 +205,24 @@ def test_apify_connection():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Test the Apify Google Maps Reviews Scraper integration')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Time every stage and print a profile; optionally save it '
+                             '(.json for JSON, anything else for Prometheus text)')
+    args = parser.parse_args()
+
+    # Load environment variables (after parsing, so --help doesn't pay for it)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if args.profile:
+        metrics.enable()
+
     success = test_apify_connection()
 
+    if args.profile:
+        metrics.report(args.profile)
+
     if not success:
         print("❌ Test failed. Please fix the issues above and try again.")
         print()
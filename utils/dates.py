@@ -0,0 +1,174 @@
+"""
+Date helpers for review timestamps
+
+Reviews carry an exact publish time (Apify 'publishedAtDate', Places API
+'publishTime') and a relative description ("2 months ago"). The exact time
+is always preferred; the relative text is only parsed when nothing else is
+available, and is approximate.
+
+Months are handled as integer "month buckets" (months since January 1970),
+so grouping and comparing months is integer arithmetic instead of building
+and formatting a datetime for every review.
+"""
+
+import calendar
+import re
+import time
+from datetime import datetime, timezone
+
+# Fractional seconds longer than microseconds (Places API sends nanoseconds)
+_LONG_FRACTION = re.compile(r'(\.\d{6})\d+')
+
+# Relative descriptions: "2 months ago", "a week ago", "an hour ago",
+# "Edited 3 weeks ago", "in the last week"
+_RELATIVE_TIME = re.compile(
+    r'\b(?:(\d+|an?|one)\s+|in the last\s+|last\s+)?'
+    r'(second|minute|hour|day|week|month|year)s?\b(?:\s+ago)?',
+    re.IGNORECASE
+)
+
+# Approximate length of each relative unit in seconds
+_UNIT_SECONDS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+    'month': 30 * 86400,
+    'year': 365 * 86400,
+}
+
+# Exact publish-time fields, in order of preference
+EXACT_TIME_FIELDS = ('publishedAtDate', 'publishTime')
+
+# Relative description fields (Apify, Places API (New), legacy Places API)
+RELATIVE_TIME_FIELDS = ('publishAt', 'relativePublishTimeDescription', 'relative_time_description')
+
+
+def parse_iso_timestamp(value):
+    """
+    Parse an ISO-8601 timestamp from Apify or the Places API
+
+    Handles the trailing 'Z' and nanosecond precision, e.g.
+      "2025-09-28T10:30:00.000Z"             (Apify publishedAtDate)
+      "2025-09-28T10:30:00.123456789Z"       (Places publishTime)
+
+    Args:
+        value: Timestamp string (or None)
+
+    Returns:
+        Timezone-aware UTC datetime, or None if the value is empty/invalid
+    """
+    if not value:
+        return None
+
+    text = _LONG_FRACTION.sub(r'\1', value.strip())
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def to_epoch(value):
+    """
+    Convert an ISO-8601 timestamp to integer epoch seconds
+
+    Returns:
+        int, or None if the value is empty/invalid
+    """
+    parsed = parse_iso_timestamp(value)
+    return int(parsed.timestamp()) if parsed else None
+
+
+def parse_relative_time(text, now=None):
+    """
+    Convert a relative description like "2 months ago" to epoch seconds
+
+    This is approximate (a month is 30 days) - only use it when the review
+    has no exact publish time.
+
+    Examples:
+      "in the last week" -> 7 days ago
+      "2 months ago"     -> 60 days ago
+      "a year ago"       -> 365 days ago
+
+    Args:
+        text: Relative time description
+        now: Reference epoch seconds (defaults to the current time)
+
+    Returns:
+        int, or None if the text isn't recognised
+    """
+    if not text:
+        return None
+
+    match = _RELATIVE_TIME.search(text)
+    if not match:
+        return None
+
+    count = match.group(1)
+    count = int(count) if count and count.isdigit() else 1
+    if now is None:
+        now = time.time()
+    return int(now) - count * _UNIT_SECONDS[match.group(2).lower()]
+
+
+def resolve_published_at(review, now=None):
+    """
+    Work out when a review was published, as epoch seconds
+
+    Prefers the exact timestamp fields and only falls back to the relative
+    description when they are missing. Works with Apify items, Places API
+    review objects and Review records (see api/models.py).
+
+    Args:
+        review: Review dictionary or Review record
+        now: Reference epoch seconds for relative descriptions
+
+    Returns:
+        int, or None if the review has no usable date
+    """
+    if not isinstance(review, dict):
+        if review.published_at is not None:
+            return review.published_at
+        return parse_relative_time(review.relative_time, now)
+
+    for field in EXACT_TIME_FIELDS:
+        epoch = to_epoch(review.get(field))
+        if epoch is not None:
+            return epoch
+
+    for field in RELATIVE_TIME_FIELDS:
+        epoch = parse_relative_time(review.get(field), now)
+        if epoch is not None:
+            return epoch
+    return None
+
+
+def month_bucket(epoch):
+    """
+    Return the month an epoch second falls in as months since January 1970 (UTC)
+
+    Buckets are plain integers, so consecutive months differ by 1.
+    """
+    year, month = time.gmtime(epoch)[:2]
+    return (year - 1970) * 12 + month - 1
+
+
+def month_key(bucket):
+    """Format a month bucket as 'YYYY-MM'"""
+    year, month = divmod(bucket, 12)
+    return f"{year + 1970:04d}-{month + 1:02d}"
+
+
+def month_label(bucket):
+    """Format a month bucket as 'Jan 2025'"""
+    year, month = divmod(bucket, 12)
+    return f"{calendar.month_abbr[month + 1]} {year + 1970}"
@@ -0,0 +1,301 @@
+"""
+Lightweight instrumentation: timers, counters and histograms
+
+Scripts report progress with print(), which says nothing about where the
+time goes. This module keeps process-wide measurements for every I/O and
+CPU stage (API calls, JSON decoding, cache lookups, detection, rendering)
+and exports them as Prometheus text or JSON.
+
+Instrumentation is OFF until enable() is called (scripts do this for
+--profile), and while it is off every call returns straight away, so the
+hooks can stay in hot code paths.
+
+Usage:
+    from utils import metrics
+
+    metrics.enable()
+    with metrics.timer('detect_seconds', stage='page'):
+        ...
+    metrics.count('cache_lookups_total', state='hit')
+    metrics.write('profile.prom')        # or 'profile.json'
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds (Prometheus-style, cumulative)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Metric names are prefixed with this in the Prometheus export
+PREFIX = 'bali_'
+
+
+def _label_key(labels):
+    """Sorted label pairs; values become strings so e.g. status=200 and status='ReadTimeout' sort together"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    """Bucketed distribution of observed values (count, sum, min, max)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot = above every bucket
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Record one value"""
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets
+
+        Returns the upper bound of the bucket holding the q-th value (the
+        largest observed value for the overflow bucket), or None if empty.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Registry of counters and histograms, keyed by name and labels
+
+    Safe to share between threads. Use the module-level functions rather
+    than creating one of these.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget every measurement"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def count(self, name, value=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record a value (usually seconds) in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into the histogram `name`"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """
+        Return every measurement as plain data
+
+        Returns:
+            Dictionary with 'uptime_s', 'counters' and 'histograms'; each
+            metric is a list of {'labels': {...}, ...} entries
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            histograms = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append({'labels': dict(labels), **histogram.to_dict()})
+        return {
+            'uptime_s': round(time.time() - self.started_at, 3),
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def to_prometheus(self):
+        """Return every measurement in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {histogram.total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    """Format label pairs as {a="1",b="2"} (empty string for no labels)"""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+# Process-wide registry used by the functions below
+METRICS = Metrics()
+
+
+def enable():
+    """Start recording measurements"""
+    METRICS.enabled = True
+    METRICS.reset()
+
+
+def is_enabled():
+    """Return True if measurements are being recorded"""
+    return METRICS.enabled
+
+
+def count(name, value=1, **labels):
+    """Add to a counter (no-op unless enabled)"""
+    METRICS.count(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    """Record a value in a histogram (no-op unless enabled)"""
+    METRICS.observe(name, value, **labels)
+
+
+def timer(name, **labels):
+    """Context manager timing a block into a histogram (no-op unless enabled)"""
+    return METRICS.timer(name, **labels)
+
+
+def total(name):
+    """
+    Return a metric summed over all its labels
+
+    Counters give their value, histograms the sum of observed values
+    (e.g. total seconds). Useful for rates such as reviews per second.
+    """
+    snapshot = METRICS.snapshot()
+    if name in snapshot['counters']:
+        return sum(entry['value'] for entry in snapshot['counters'][name])
+    return sum(entry['sum'] for entry in snapshot['histograms'].get(name, []))
+
+
+def write(path):
+    """
+    Save every measurement to a file
+
+    Args:
+        path: Output file; '.json' gives JSON, anything else Prometheus text
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            json.dump(METRICS.snapshot(), f, indent=2)
+        else:
+            f.write(METRICS.to_prometheus())
+
+
+def print_summary(file=None):
+    """Print the measurements in the same style as the scripts (to stdout by default)"""
+    snapshot = METRICS.snapshot()
+    if not snapshot['counters'] and not snapshot['histograms']:
+        return
+
+    print("\n📈 Profile:", file=file)
+    for name, entries in snapshot['histograms'].items():
+        for entry in entries:
+            label = ', '.join(f"{k}={v}" for k, v in entry['labels'].items())
+            print(f"   {name}{f' [{label}]' if label else ''}: {entry['count']}x, "
+                  f"total {entry['sum'] * 1000:.1f}ms, p50 ≤{entry['p50'] * 1000:.1f}ms, "
+                  f"max {entry['max'] * 1000:.1f}ms", file=file)
+    for name, entries in snapshot['counters'].items():
+        for entry in entries:
+            label = ', '.join(f"{k}={v}" for k, v in entry['labels'].items())
+            print(f"   {name}{f' [{label}]' if label else ''}: {entry['value']:g}", file=file)
+
+
+def report(path=None, file=None):
+    """
+    Print the summary and, if a path is given, save the measurements
+
+    Scripts call this at the end of a --profile run.
+
+    Args:
+        path: Output file (see write()), or None / '-' to only print
+        file: Where to print (stdout by default)
+    """
+    print_summary(file=file)
+    reviews = total('reviews_analyzed_total')
+    detect_time = total('detect_seconds')
+    if reviews and detect_time:
+        print(f"   Detection throughput: {reviews / detect_time:,.0f} reviews/s", file=file)
+    if path and path != '-':
+        write(path)
+        print(f"💾 Profile saved to {path}", file=file)
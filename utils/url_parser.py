@@ -0,0 +1,241 @@
+"""
+Google Maps URL parsing
+
+Helpers for turning user input (a restaurant name or a Google Maps link)
+into something the Places API can look up.
+
+The same restaurant can be shared in many forms - a maps.app.goo.gl short
+link, a /maps/place/<Name>/@lat,lng URL, a ?cid= URL, a place_id URL -
+each with different tracking parameters. canonical_url() maps every form
+it can identify to ONE URL, so caches, the review store and de-duplication
+treat them as the same restaurant. Short links must be resolved first (see
+api/url_resolver.py).
+"""
+
+import re
+from collections import namedtuple
+from urllib.parse import urlparse, parse_qs, unquote_plus, quote_plus, urlencode, urlunparse
+
+
+# Domains that identify a Google Maps link
+GOOGLE_MAPS_PATTERNS = [
+    'google.com/maps',
+    'maps.google.com',
+    'goo.gl/maps',
+    'maps.app.goo.gl'
+]
+
+# Short links that must be followed to find the real place URL
+SHORT_LINK_PATTERNS = [
+    'goo.gl/maps',
+    'maps.app.goo.gl'
+]
+
+# Canonical URL forms, strongest identity first
+PLACE_ID_URL = "https://www.google.com/maps/place/?q=place_id:{place_id}"
+CID_URL = "https://maps.google.com/?cid={cid}"
+NAME_URL = "https://www.google.com/maps/place/{name}/"
+
+# Coordinates in canonical URLs are rounded to 4 decimals (about 11 m)
+COORDINATE_DECIMALS = 4
+
+# Query parameters that only track how a link was shared
+TRACKING_PARAMS = {'entry', 'g_ep', 'g_st', 'hl', 'gl', 'authuser', 'shorturl', 'skid', 'coh', 'ucbcb'}
+
+# Everything a Google Maps URL can tell us about the place it points to
+MapsUrl = namedtuple('MapsUrl', ['place_id', 'cid', 'name', 'latitude', 'longitude'])
+
+
+def is_google_maps_url(text):
+    """Return True if the text looks like a Google Maps URL"""
+    text = text.lower()
+    return any(pattern in text for pattern in GOOGLE_MAPS_PATTERNS)
+
+
+def is_short_link(url):
+    """Return True for goo.gl / maps.app.goo.gl short links"""
+    url = url.lower()
+    return any(pattern in url for pattern in SHORT_LINK_PATTERNS)
+
+
+def validate_google_maps_url(url):
+    """
+    Validate if URL is a Google Maps URL
+
+    Args:
+        url: URL string to validate
+
+    Returns:
+        bool: True if valid Google Maps URL
+
+    Raises:
+        ValueError: If URL is not a valid Google Maps URL
+    """
+    if not is_google_maps_url(url):
+        raise ValueError("Invalid Google Maps URL. Please provide a valid restaurant link from Google Maps.")
+    return True
+
+
+def extract_place_id(url):
+    """
+    Extract a Places API place ID (the "ChIJ..." form) from a URL
+
+    Handles:
+      https://www.google.com/maps/place/?q=place_id:ChIJ...
+      https://www.google.com/maps/search/?api=1&query=...&query_place_id=ChIJ...
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        Place ID string, or None if the URL doesn't contain one
+    """
+    match = re.search(r'place_id[:=]([A-Za-z0-9_-]+)', url)
+    if match:
+        return match.group(1)
+
+    params = parse_qs(urlparse(url).query)
+    for name in ('place_id', 'query_place_id'):
+        if name in params:
+            return params[name][0]
+
+    return None
+
+
+def place_name_from_url(url):
+    """
+    Extract the restaurant name from a /maps/place/<Name>/ URL
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        Name string (e.g. "Uma Garden Seminyak"), or None
+    """
+    match = re.search(r'/maps/place/([^/@?]+)', url)
+    if not match:
+        return None
+    name = unquote_plus(match.group(1)).strip()
+    return name or None
+
+
+def extract_cid(url):
+    """
+    Extract a Google Maps CID (customer id, a large decimal number) from a URL
+
+    Handles:
+      https://maps.google.com/?cid=1234567890
+      https://www.google.com/maps?ludocid=1234567890
+      https://www.google.com/maps/place/Name/data=!4m6!3m5!1s0x2dd2...:0x112210732e0fd4d2!...
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        CID as a decimal string, or None
+    """
+    params = parse_qs(urlparse(url).query)
+    for name in ('cid', 'ludocid'):
+        if name in params and params[name][0].isdigit():
+            return params[name][0]
+
+    # The "feature id" in the data parameter ends with the CID in hex
+    match = re.search(r'!1s0x[0-9a-fA-F]+:0x([0-9a-fA-F]+)', url)
+    if match:
+        return str(int(match.group(1), 16))
+    return None
+
+
+def extract_coordinates(url):
+    """
+    Extract the place's coordinates from a URL
+
+    The place pin (!3d<lat>!4d<lng> in the data parameter) is preferred over
+    the map centre (@lat,lng,zoom), which moves as the user pans.
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        Tuple of (latitude, longitude) floats, or None
+    """
+    match = (re.search(r'!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)', url)
+             or re.search(r'@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)', url))
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def parse_maps_url(url):
+    """
+    Pull every identifying part out of a Google Maps URL
+
+    Args:
+        url: Google Maps URL (resolve short links first)
+
+    Returns:
+        MapsUrl(place_id, cid, name, latitude, longitude); missing parts are None
+    """
+    coordinates = extract_coordinates(url) or (None, None)
+    return MapsUrl(extract_place_id(url), extract_cid(url), place_name_from_url(url), *coordinates)
+
+
+def canonical_url(url):
+    """
+    Map any form of a Google Maps link to one canonical URL
+
+    In order of preference:
+      place id   -> https://www.google.com/maps/place/?q=place_id:ChIJ...
+      CID        -> https://maps.google.com/?cid=1234567890
+      name (+pin)-> https://www.google.com/maps/place/Uma+Garden/@-8.6913,115.1682
+      otherwise  -> the URL without tracking parameters or fragment
+
+    Every canonical URL is itself a working Google Maps link, so it can be
+    sent to the scraper as well as used as a key. Short links are returned
+    unchanged - resolve them first (api/url_resolver.py).
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        Canonical URL string
+    """
+    url = url.strip()
+    if is_short_link(url):
+        return url
+
+    parsed = parse_maps_url(url)
+    if parsed.place_id:
+        return PLACE_ID_URL.format(place_id=parsed.place_id)
+    if parsed.cid:
+        return CID_URL.format(cid=parsed.cid)
+    if parsed.name:
+        canonical = NAME_URL.format(name=quote_plus(' '.join(parsed.name.split())))
+        if parsed.latitude is not None:
+            canonical += (f"@{parsed.latitude:.{COORDINATE_DECIMALS}f},"
+                          f"{parsed.longitude:.{COORDINATE_DECIMALS}f}")
+        return canonical
+
+    parts = urlparse(url)
+    query = [(key, value) for key, values in sorted(parse_qs(parts.query).items())
+             if key not in TRACKING_PARAMS and not key.startswith('utm_') for value in values]
+    return urlunparse(('https', parts.netloc.lower(), parts.path, '', urlencode(query), ''))
+
+
+def resolve_short_link(url, client=None):
+    """
+    Follow a short link's redirects to the full Google Maps URL
+
+    Args:
+        url: Short link (e.g. https://maps.app.goo.gl/KXuHZ6dNENB9R3sr8)
+        client: HttpClient to use (defaults to the shared client)
+
+    Returns:
+        The final URL after redirects
+    """
+    if client is None:
+        from api.http_client import get_client     # loads requests only when needed
+        client = get_client()
+    response = client.get(url, endpoint='shortlink', allow_redirects=True, stream=True)
+    response.close()
+    return response.url